@@ -1,6 +1,10 @@
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
 from typing import Optional
+import asyncio
 import os
+import threading
+import time
 import jwt
 from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status
@@ -69,17 +73,20 @@ class UserCreate(BaseModel):
     password: str
     full_name: str
     phone: str = ""
+    cart_id: Optional[str] = None  # Guest cart to merge into the new account
 
 class UserLogin(BaseModel):
     """Model for user login."""
     email: EmailStr
     password: str
+    cart_id: Optional[str] = None  # Guest cart to merge into the user's cart
 
 class UserToken(BaseModel):
     """Token response for customer users."""
     access_token: str
     token_type: str = "bearer"
     user: dict
+    cart_id: Optional[str] = None  # User's cart after a guest cart merge
 
 class UserTokenData(BaseModel):
     """Decoded token data for customers."""
@@ -93,6 +100,94 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
 def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
+# =============================================================================
+# Off-Loop Password Hashing
+# =============================================================================
+#
+# bcrypt deliberately burns tens to hundreds of milliseconds of CPU. Running it
+# inside an async handler blocks the whole event loop, so request handlers use
+# the async wrappers below, which run on a small dedicated thread pool (bcrypt
+# releases the GIL while hashing). The pool size is the concurrency limit;
+# excess calls wait in the executor queue and that wait is measured.
+
+PASSWORD_HASH_WORKERS = int(
+    os.environ.get("PASSWORD_HASH_WORKERS", min(4, os.cpu_count() or 1))
+)
+_password_executor = ThreadPoolExecutor(
+    max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="bcrypt"
+)
+
+
+class PasswordHashMetrics:
+    """Counters for the password hashing executor."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.waiting = 0
+        self.running = 0
+        self.total_queue_seconds = 0.0
+        self.max_queue_seconds = 0.0
+        self.total_run_seconds = 0.0
+
+    def submitted(self) -> None:
+        with self._lock:
+            self.waiting += 1
+
+    def started(self, queue_seconds: float) -> None:
+        with self._lock:
+            self.waiting -= 1
+            self.running += 1
+            self.total_queue_seconds += queue_seconds
+            self.max_queue_seconds = max(self.max_queue_seconds, queue_seconds)
+
+    def finished(self, run_seconds: float) -> None:
+        with self._lock:
+            self.running -= 1
+            self.calls += 1
+            self.total_run_seconds += run_seconds
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "workers": PASSWORD_HASH_WORKERS,
+                "calls": self.calls,
+                "waiting": self.waiting,
+                "running": self.running,
+                "avg_queue_ms": round(1000 * self.total_queue_seconds / self.calls, 2) if self.calls else 0.0,
+                "max_queue_ms": round(1000 * self.max_queue_seconds, 2),
+                "avg_run_ms": round(1000 * self.total_run_seconds / self.calls, 2) if self.calls else 0.0,
+            }
+
+
+password_hash_metrics = PasswordHashMetrics()
+
+
+async def _run_password_job(func, *args):
+    submitted_at = time.perf_counter()
+    password_hash_metrics.submitted()
+
+    def job():
+        started_at = time.perf_counter()
+        password_hash_metrics.started(started_at - submitted_at)
+        try:
+            return func(*args)
+        finally:
+            password_hash_metrics.finished(time.perf_counter() - started_at)
+
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_password_executor, job)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """`verify_password` on the bounded hashing pool."""
+    return await _run_password_job(verify_password, plain_password, hashed_password)
+
+
+async def get_password_hash_async(password: str) -> str:
+    """`get_password_hash` on the bounded hashing pool."""
+    return await _run_password_job(get_password_hash, password)
+
 # JWT utilities
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     to_encode = data.copy()
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Benchmark response serialization CPU cost per request.
+
+Compares FastAPI's default path (response_model validation ->
+jsonable_encoder -> json.dumps) with the fast path used when FAST_RESPONSES
+is enabled (pre-validated documents -> single fast JSON encode).
+Runs entirely in memory; no database or server required.
+
+Usage: python bench_responses.py [--iterations 2000] [--page-size 20]
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent))
+
+# server.py reads these at import time; nothing connects during the benchmark
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+os.environ.setdefault("DB_NAME", "alveera_bench")
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+
+import fast_json
+from fast_json import FastJSONResponse
+from server import Order, PaginatedProductsResponse, Product
+
+
+def sample_product(i: int) -> dict:
+    return {
+        "id": str(uuid.uuid4()),
+        "design_no": f"D.NO.{1490 + i}",
+        "name": f"Alveera Midnight Blue Embroidered Saree {i}",
+        "description": "Exquisitely designed saree with intricate floral and abstract patterns in a navy blue base.",
+        "price": 2499.0 + i,
+        "material": "Georgette",
+        "color": "Navy Blue",
+        "images": [f"https://images.unsplash.com/photo-{i}-{n}?w=600" for n in range(3)],
+        "image_url": f"https://images.unsplash.com/photo-{i}-0?w=600",
+        "category": "festive",
+        "in_stock": True,
+        "created_at": datetime.now(timezone.utc),
+    }
+
+
+def sample_order(items: int) -> dict:
+    return {
+        "id": str(uuid.uuid4()),
+        "customer_name": "Test Customer",
+        "customer_email": "customer@example.com",
+        "customer_phone": "+91 90000 00000",
+        "user_id": str(uuid.uuid4()),
+        "items": [
+            {
+                "product_id": str(uuid.uuid4()),
+                "quantity": 1 + n % 3,
+                "product_name": f"Saree {n}",
+                "product_image": f"https://images.unsplash.com/photo-{n}?w=600",
+                "product_price": 1999.0 + n,
+            }
+            for n in range(items)
+        ],
+        "total": 12345.0,
+        "payment_method": "razorpay",
+        "status": "pending",
+        "created_at": datetime.now(timezone.utc),
+    }
+
+
+def cpu_per_call(func, iterations: int) -> float:
+    """Average CPU microseconds per call."""
+    for _ in range(min(100, iterations)):
+        func()
+    start = time.process_time()
+    for _ in range(iterations):
+        func()
+    return (time.process_time() - start) / iterations * 1_000_000
+
+
+def main(iterations: int, page_size: int):
+    loop = asyncio.new_event_loop()
+
+    def validated(model, content):
+        field = create_response_field(name=f"Response_{model.__name__}", type_=model)
+
+        def run():
+            value = loop.run_until_complete(
+                serialize_response(field=field, response_content=content)
+            )
+            return JSONResponse(value).body
+        return run
+
+    product = sample_product(0)
+    order = sample_order(5)
+    page = {
+        "products": [sample_product(i) for i in range(page_size)],
+        "total_products": 500,
+        "total_pages": 25,
+        "current_page": 1,
+        "limit": page_size,
+        "has_more": True,
+        "next_cursor": None,
+    }
+
+    cases = [
+        ("product detail", validated(Product, product), lambda: FastJSONResponse(product).body),
+        ("order detail (5 items)", validated(Order, order), lambda: FastJSONResponse(order).body),
+        (
+            f"product list ({page_size})",
+            validated(PaginatedProductsResponse, page),
+            lambda: FastJSONResponse(page).body,
+        ),
+        (
+            f"product list ({page_size}), encoded once",
+            lambda: JSONResponse(jsonable_encoder(page)).body,
+            lambda: FastJSONResponse(page).body,
+        ),
+    ]
+
+    encoder = "orjson" if fast_json.orjson is not None else "json (orjson not installed)"
+    print(f"Fast encoder: {encoder}; {iterations} iterations per case\n")
+    print(f"{'case':<36}{'default us':>12}{'fast us':>12}{'speedup':>10}")
+    for name, default, fast in cases:
+        assert len(default()) > 0 and len(fast()) > 0
+        default_us = cpu_per_call(default, iterations)
+        fast_us = cpu_per_call(fast, iterations)
+        print(f"{name:<36}{default_us:>12.1f}{fast_us:>12.1f}{default_us / fast_us:>9.1f}x")
+    loop.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark response serialization")
+    parser.add_argument("--iterations", type=int, default=2000)
+    parser.add_argument("--page-size", type=int, default=20)
+    args = parser.parse_args()
+    main(args.iterations, args.page_size)
@@ -0,0 +1,779 @@
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional, Tuple
+import asyncio
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+
+from pymongo import ReturnDocument
+
+try:
+    import redis.asyncio as redis_asyncio
+except ImportError:  # pragma: no cover - optional shared backend
+    redis_asyncio = None
+
+logger = logging.getLogger(__name__)
+
+# =============================================================================
+# In-Process LRU Cache
+# =============================================================================
+
+class LRUCache:
+    """
+    Bounded in-memory cache with least-recently-used eviction.
+
+    Entries live until they are evicted by size pressure, explicitly
+    invalidated, or (when `ttl_seconds` is set) expire. Hit/miss/eviction
+    counters are kept for monitoring.
+    """
+
+    def __init__(self, name: str, max_entries: int = 512, ttl_seconds: Optional[float] = None):
+        self.name = name
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        # key -> (expires_at or None, value)
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            try:
+                expires_at, value = self._entries[key]
+            except KeyError:
+                self.misses += 1
+                return None
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        expires_at = time.monotonic() + self.ttl_seconds if self.ttl_seconds else None
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key: Hashable) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        """Drop every entry (used for write-driven invalidation)."""
+        with self._lock:
+            self._entries.clear()
+            self.invalidations += 1
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "name": self.name,
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+def make_cache_key(**params) -> str:
+    """
+    Build a stable cache key from query parameters.
+
+    None values are dropped and strings are stripped so that equivalent
+    requests (e.g. `?search=silk` vs `?search=silk%20`) share one entry.
+    """
+    normalized = {}
+    for key, value in params.items():
+        if value is None:
+            continue
+        if isinstance(value, str):
+            value = value.strip()
+            if not value:
+                continue
+        normalized[key] = value
+    return json.dumps(normalized, sort_keys=True, separators=(",", ":"), default=str)
+
+
+# =============================================================================
+# Catalog Version
+# =============================================================================
+
+class CatalogVersion:
+    """
+    Monotonic version of the product catalog, bumped on every product write.
+
+    Used to derive ETags and Last-Modified for catalog responses and to key
+    cached catalog pages. Every worker adopts the same shared (epoch, counter)
+    - from Redis with the shared backend, otherwise from MongoDB - so ETags
+    agree across workers. The boot token is only used while no shared version
+    is reachable, and keeps versions from different processes from colliding.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.boot_id = f"{os.getpid()}.{time.time_ns()}"
+        self.scope = self.boot_id
+        self.counter = 0
+        self.last_modified = datetime.now(timezone.utc).replace(microsecond=0)
+
+    @property
+    def tag(self) -> str:
+        return f"{self.scope}:{self.counter}"
+
+    def bump(self) -> None:
+        """Advance the version locally (process-scoped tag)."""
+        with self._lock:
+            self.scope = self.boot_id
+            self.counter += 1
+            self.last_modified = datetime.now(timezone.utc).replace(microsecond=0)
+
+    def apply(self, scope: str, counter: int, last_modified: datetime) -> Optional[int]:
+        """
+        Adopt a shared version if it is newer.
+
+        Returns None if it is not newer, otherwise the counter it replaced
+        (-1 after a scope change, when nothing is known about the versions
+        in between). A result below `counter - 1` means versions were skipped
+        and their changes have not been seen by this worker.
+        """
+        with self._lock:
+            if scope == self.scope and counter <= self.counter:
+                return None
+            previous = self.counter if scope == self.scope else -1
+            self.scope = scope
+            self.counter = counter
+            self.last_modified = last_modified
+            return previous
+
+
+catalog_version = CatalogVersion()
+
+# =============================================================================
+# Cache Backends
+# =============================================================================
+#
+# Named caches store through a backend chosen with CACHE_BACKEND:
+#   memory - per-process LRU caches (default). Fine for a single worker; with
+#            several workers each one warms its own copy and invalidations
+#            only reach the worker that made the write.
+#   redis  - a Redis-protocol server (Redis, Valkey, KeyDB, ...) shared by all
+#            workers. Catalog version bumps and invalidations are broadcast
+#            over pub/sub so every worker drops stale state.
+
+CACHE_BACKEND = os.environ.get("CACHE_BACKEND", "memory").strip().lower()
+CACHE_REDIS_URL = os.environ.get("CACHE_REDIS_URL", "redis://localhost:6379/0")
+CACHE_KEY_PREFIX = os.environ.get("CACHE_KEY_PREFIX", "alveera")
+# Expiry for shared entries without their own TTL. Catalog entries are keyed
+# by catalog version, so superseded versions simply age out.
+CACHE_SHARED_TTL_SECONDS = float(os.environ.get("CACHE_SHARED_TTL_SECONDS", "3600"))
+
+# Identifies this worker so it can ignore its own broadcasts
+WORKER_ID = catalog_version.boot_id
+
+
+def _dump_value(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return {"$date": value.isoformat()}
+    raise TypeError(f"Cannot cache value of type {type(value).__name__}")
+
+
+def _load_object(obj: dict) -> Any:
+    if len(obj) == 1 and "$date" in obj:
+        return datetime.fromisoformat(obj["$date"])
+    return obj
+
+
+def serialize(value: Any) -> bytes:
+    """JSON-encode a cached value, preserving datetimes."""
+    return json.dumps(value, default=_dump_value, separators=(",", ":")).encode("utf-8")
+
+
+def deserialize(raw: bytes) -> Any:
+    return json.loads(raw, object_hook=_load_object)
+
+
+def _key_string(key: Hashable) -> str:
+    if isinstance(key, tuple):
+        return "|".join(str(part) for part in key)
+    return str(key)
+
+
+class MemoryCacheBackend:
+    """Per-process LRU caches."""
+
+    name = "memory"
+    shared = False
+
+    def __init__(self):
+        self._caches: Dict[str, LRUCache] = {}
+
+    def _lru(self, cache: "Cache") -> LRUCache:
+        lru = self._caches.get(cache.name)
+        if lru is None:
+            lru = self._caches[cache.name] = LRUCache(cache.name, cache.max_entries, cache.ttl_seconds)
+        return lru
+
+    async def get(self, cache: "Cache", key: Hashable) -> Optional[Any]:
+        return self._lru(cache).get(key)
+
+    async def set(self, cache: "Cache", key: Hashable, value: Any) -> None:
+        self._lru(cache).set(key, value)
+
+    async def delete(self, cache: "Cache", key: Hashable) -> None:
+        self._lru(cache).delete(key)
+
+    async def clear(self, cache: "Cache") -> None:
+        self._lru(cache).clear()
+
+    def local_stats(self, cache: "Cache") -> dict:
+        stats = self._lru(cache).stats()
+        return {k: stats[k] for k in ("entries", "evictions", "invalidations")}
+
+    async def start(self, handler: Callable[[dict], Awaitable[None]]) -> None:
+        pass
+
+    async def close(self) -> None:
+        pass
+
+
+class RedisCacheBackend:
+    """
+    Shared cache on a Redis-protocol server.
+
+    Values are stored as JSON (datetimes preserved) under
+    `<prefix>:<cache>:<key>`. The catalog version lives in a hash so all
+    workers derive identical ETags; its epoch changes if the server loses
+    its data, so old ETags can never match again.
+    """
+
+    name = "redis"
+    shared = True
+
+    def __init__(self, url: str, prefix: str, default_ttl_seconds: float):
+        if redis_asyncio is None:
+            raise RuntimeError("CACHE_BACKEND=redis requires the 'redis' package (pip install redis)")
+        self.client = redis_asyncio.from_url(url)
+        self.prefix = prefix
+        self.default_ttl_seconds = default_ttl_seconds
+        self.channel = f"{prefix}:events"
+        self.version_key = f"{prefix}:catalog_version"
+        self._listener: Optional[asyncio.Task] = None
+
+    def _key(self, cache: "Cache", key: Hashable) -> str:
+        return f"{self.prefix}:{cache.name}:{_key_string(key)}"
+
+    async def get(self, cache: "Cache", key: Hashable) -> Optional[Any]:
+        raw = await self.client.get(self._key(cache, key))
+        return None if raw is None else deserialize(raw)
+
+    async def set(self, cache: "Cache", key: Hashable, value: Any) -> None:
+        ttl = cache.ttl_seconds or self.default_ttl_seconds
+        await self.client.set(self._key(cache, key), serialize(value), px=int(ttl * 1000))
+
+    async def delete(self, cache: "Cache", key: Hashable) -> None:
+        await self.client.delete(self._key(cache, key))
+
+    async def clear(self, cache: "Cache") -> None:
+        batch = []
+        async for key in self.client.scan_iter(match=f"{self.prefix}:{cache.name}:*", count=500):
+            batch.append(key)
+            if len(batch) >= 500:
+                await self.client.delete(*batch)
+                batch = []
+        if batch:
+            await self.client.delete(*batch)
+
+    def local_stats(self, cache: "Cache") -> dict:
+        return {}
+
+    async def _version(self, bump: bool) -> Tuple[str, int, datetime]:
+        now = int(time.time())
+        async with self.client.pipeline(transaction=True) as pipe:
+            pipe.hsetnx(self.version_key, "epoch", uuid.uuid4().hex[:12])
+            pipe.hsetnx(self.version_key, "modified", now)
+            if bump:
+                pipe.hincrby(self.version_key, "counter", 1)
+                pipe.hset(self.version_key, "modified", now)
+            pipe.hgetall(self.version_key)
+            results = await pipe.execute()
+        fields = {k.decode(): v.decode() for k, v in results[-1].items()}
+        return (
+            f"shared.{fields['epoch']}",
+            int(fields.get("counter", 0)),
+            datetime.fromtimestamp(int(fields["modified"]), tz=timezone.utc)
+        )
+
+    async def read_version(self) -> Tuple[str, int, datetime]:
+        return await self._version(bump=False)
+
+    async def bump_version(self, product_ids: Optional[List[str]] = None) -> Tuple[str, int, datetime]:
+        # Changed ids travel with the pub/sub broadcast instead
+        return await self._version(bump=True)
+
+    async def changes_after(self, counter: int) -> Optional[List[str]]:
+        # Broadcasts are not kept, so skipped versions mean a full refresh
+        return None
+
+    async def publish(self, event: dict) -> None:
+        await self.client.publish(self.channel, json.dumps(event))
+
+    async def start(self, handler: Callable[[dict], Awaitable[None]]) -> None:
+        self._listener = asyncio.create_task(self._listen(handler))
+
+    async def _listen(self, handler: Callable[[dict], Awaitable[None]]) -> None:
+        backoff = 1.0
+        while True:
+            pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+            try:
+                await pubsub.subscribe(self.channel)
+                backoff = 1.0
+                # Catch up on anything broadcast while (re)connecting
+                await handler({"type": "resync"})
+                async for message in pubsub.listen():
+                    try:
+                        event = json.loads(message["data"])
+                    except (TypeError, ValueError):
+                        continue
+                    await handler(event)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Cache event subscription lost ({e}); retrying in {backoff:.0f}s")
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, 30.0)
+            finally:
+                await pubsub.reset()
+
+    async def close(self) -> None:
+        if self._listener is not None:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except asyncio.CancelledError:
+                pass
+            self._listener = None
+        # redis-py >= 5.0.1 renamed close() to aclose()
+        close = getattr(self.client, "aclose", None) or self.client.close
+        await close()
+
+
+def create_cache_backend():
+    if CACHE_BACKEND == "memory":
+        return MemoryCacheBackend()
+    if CACHE_BACKEND == "redis":
+        return RedisCacheBackend(CACHE_REDIS_URL, CACHE_KEY_PREFIX, CACHE_SHARED_TTL_SECONDS)
+    raise ValueError(f"Unknown CACHE_BACKEND {CACHE_BACKEND!r} (expected 'memory' or 'redis')")
+
+
+cache_backend = create_cache_backend()
+
+
+class Cache:
+    """
+    Named cache stored through the configured backend.
+
+    Backend failures are logged and treated as misses so a cache outage
+    degrades to database reads instead of failing requests.
+    """
+
+    def __init__(self, name: str, max_entries: int = 512, ttl_seconds: Optional[float] = None):
+        self.name = name
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+
+    def _failed(self, operation: str, error: Exception) -> None:
+        self.errors += 1
+        logger.warning(f"Cache {self.name} {operation} failed: {error}")
+
+    async def get(self, key: Hashable) -> Optional[Any]:
+        try:
+            value = await cache_backend.get(self, key)
+        except Exception as e:
+            self._failed("get", e)
+            value = None
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    async def set(self, key: Hashable, value: Any) -> None:
+        try:
+            await cache_backend.set(self, key, value)
+        except Exception as e:
+            self._failed("set", e)
+
+    async def delete(self, key: Hashable) -> None:
+        try:
+            await cache_backend.delete(self, key)
+        except Exception as e:
+            self._failed("delete", e)
+
+    async def clear(self) -> None:
+        try:
+            await cache_backend.clear(self)
+        except Exception as e:
+            self._failed("clear", e)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "name": self.name,
+            "backend": cache_backend.name,
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "errors": self.errors,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            **cache_backend.local_stats(self),
+        }
+
+# =============================================================================
+# Shared Cache Instances
+# =============================================================================
+
+# Per-process catalog and facet entries expire after this long, bounding how
+# stale a worker that did not see a product write can be. Shared entries are
+# keyed by the shared catalog version instead and need no short TTL.
+CATALOG_CACHE_TTL_SECONDS = float(os.environ.get("CATALOG_CACHE_TTL_SECONDS", "30"))
+_catalog_ttl = None if cache_backend.shared else CATALOG_CACHE_TTL_SECONDS
+# Catalog invalidations naming more products than this are broadcast as a
+# full refresh instead
+MAX_CHANGED_PRODUCT_IDS = int(os.environ.get("MAX_CHANGED_PRODUCT_IDS", "2000"))
+
+# Product listing pages keyed by catalog version + normalized parameters.
+# Invalidated by every admin product write.
+catalog_cache = Cache("catalog", max_entries=512, ttl_seconds=_catalog_ttl)
+
+# Sidebar facet counts keyed by catalog version + normalized filters.
+facet_cache = Cache("facets", max_entries=256, ttl_seconds=_catalog_ttl)
+
+# Authenticated admin/customer documents keyed by (kind, token subject).
+# Accounts are only edited directly in MongoDB, so the TTL is the
+# invalidation bound: a disabled account keeps working for up to this long.
+PRINCIPAL_CACHE_TTL_SECONDS = float(os.environ.get("PRINCIPAL_CACHE_TTL_SECONDS", "30"))
+principal_cache = Cache("principals", max_entries=4096, ttl_seconds=PRINCIPAL_CACHE_TTL_SECONDS)
+
+# Admin dashboard rollup. Order writes delete it; the TTL bounds staleness
+# for workers that did not see the write (memory backend).
+STATS_CACHE_TTL_SECONDS = float(os.environ.get("STATS_CACHE_TTL_SECONDS", "10"))
+stats_cache = Cache("stats", max_entries=8, ttl_seconds=STATS_CACHE_TTL_SECONDS)
+
+# Customer order history, one entry per user id holding that user's recently
+# requested pages ({page key: response}) so a single delete drops them all.
+# New orders delete it; the TTL bounds staleness after admin status changes.
+ORDER_HISTORY_CACHE_TTL_SECONDS = float(os.environ.get("ORDER_HISTORY_CACHE_TTL_SECONDS", "60"))
+order_history_cache = Cache("order_history", max_entries=2048, ttl_seconds=ORDER_HISTORY_CACHE_TTL_SECONDS)
+
+# =============================================================================
+# Invalidation
+# =============================================================================
+
+# Called with the changed product ids (None = everything) when another
+# worker changes the catalog, e.g. to refresh the in-process search index.
+CatalogListener = Callable[[Optional[List[str]]], Awaitable[None]]
+_catalog_listeners: List[CatalogListener] = []
+
+
+def add_catalog_listener(listener: CatalogListener) -> None:
+    _catalog_listeners.append(listener)
+
+
+async def _notify_catalog_listeners(product_ids: Optional[List[str]]) -> None:
+    for listener in _catalog_listeners:
+        try:
+            await listener(product_ids)
+        except Exception as e:
+            logger.error(f"Catalog listener failed: {e}")
+
+
+async def _clear_local_catalog() -> None:
+    # Per-process entries under the old version can never be read again
+    if not cache_backend.shared:
+        await catalog_cache.clear()
+        await facet_cache.clear()
+
+
+async def _missed_changes(since: int) -> Optional[List[str]]:
+    """Product ids changed after counter `since`, or None to refresh everything."""
+    store = _version_store()
+    if since < 0 or store is None:
+        return None
+    try:
+        return await store.changes_after(since)
+    except Exception as e:
+        logger.error(f"Could not read skipped catalog changes: {e}")
+        return None
+
+
+async def invalidate_catalog(product_ids: Optional[List[str]] = None) -> None:
+    """
+    Invalidate all cached catalog data after a product write.
+
+    `product_ids` names the changed products (None when unknown) so other
+    workers can refresh just those. Larger sets than
+    MAX_CHANGED_PRODUCT_IDS are sent as None (full refresh) to keep the
+    broadcast and the version document small.
+    """
+    if product_ids is not None and len(product_ids) > MAX_CHANGED_PRODUCT_IDS:
+        product_ids = None
+    store = _version_store()
+    if store is None:
+        catalog_version.bump()
+        await _clear_local_catalog()
+        return
+    try:
+        scope, counter, last_modified = await store.bump_version(product_ids)
+    except Exception as e:
+        # Keep this worker correct; others catch up on the next resync
+        logger.error(f"Shared catalog version bump failed: {e}")
+        catalog_version.bump()
+        await _clear_local_catalog()
+        return
+    previous = catalog_version.apply(scope, counter, last_modified)
+    if previous is not None and previous < counter - 1:
+        # This write overtook versions from other workers that this worker
+        # has not adopted yet; their events will now look stale, so catch up
+        # on their product ids here
+        await _notify_catalog_listeners(await _missed_changes(previous))
+    if not cache_backend.shared:
+        # Other workers pick the change up by polling the version document
+        await _clear_local_catalog()
+        return
+    # Old entries are keyed by the superseded version and expire on their own
+    try:
+        await cache_backend.publish({
+            "type": "catalog",
+            "origin": WORKER_ID,
+            "scope": scope,
+            "counter": counter,
+            "last_modified": last_modified.isoformat(),
+            "product_ids": product_ids,
+        })
+    except Exception as e:
+        logger.error(f"Catalog invalidation broadcast failed: {e}")
+
+
+async def invalidate_stats() -> None:
+    """Drop the cached dashboard rollup after an order or product write."""
+    await stats_cache.delete("dashboard")
+
+
+async def invalidate_order_history(user_id: str) -> None:
+    """Drop every cached order-history page of a customer."""
+    await order_history_cache.delete(user_id)
+
+
+async def _handle_cache_event(event: dict) -> None:
+    if event.get("type") == "resync":
+        scope, counter, last_modified = await _version_store().read_version()
+        if catalog_version.apply(scope, counter, last_modified) is not None:
+            await _clear_local_catalog()
+            await _notify_catalog_listeners(None)
+        return
+    if event.get("type") != "catalog" or event.get("origin") == WORKER_ID:
+        return
+    counter = event["counter"]
+    previous = catalog_version.apply(
+        event["scope"],
+        counter,
+        datetime.fromisoformat(event["last_modified"])
+    )
+    if previous is None:
+        return
+    product_ids = event.get("product_ids")
+    # The event's ids cover the versions after `since` (a broadcast: just
+    # its own). If this worker is further behind, the versions in between
+    # would otherwise never reach the listeners: any older event now looks
+    # stale.
+    if previous < event.get("since", counter - 1):
+        product_ids = await _missed_changes(previous)
+    await _clear_local_catalog()
+    await _notify_catalog_listeners(product_ids)
+
+# =============================================================================
+# Shared Catalog Version in MongoDB (memory backend)
+# =============================================================================
+#
+# Without a shared cache server, workers agree on the catalog version through
+# one document in the `meta` collection. Product writes bump it atomically and
+# record the changed product ids; every worker polls it every
+# CATALOG_VERSION_POLL_SECONDS and adopts newer versions, so all workers send
+# the same ETags and drop stale cached pages within one poll interval.
+
+CATALOG_VERSION_COLLECTION = "meta"
+CATALOG_VERSION_ID = "catalog_version"
+CATALOG_VERSION_POLL_SECONDS = float(os.environ.get("CATALOG_VERSION_POLL_SECONDS", "2"))
+# Recent (counter, product ids) entries kept for pollers to catch up from
+RECENT_CHANGES_LIMIT = 50
+
+
+class MongoCatalogVersionStore:
+    """Catalog version document plus a poller that emits catalog events."""
+
+    def __init__(self, collection):
+        self.collection = collection
+        self._poller: Optional[asyncio.Task] = None
+
+    @staticmethod
+    def _version(doc: dict) -> Tuple[str, int, datetime]:
+        last_modified = doc["modified"]
+        if last_modified.tzinfo is None:
+            last_modified = last_modified.replace(tzinfo=timezone.utc)
+        return f"mongo.{doc['epoch']}", int(doc.get("counter", 0)), last_modified
+
+    def _now(self) -> datetime:
+        return datetime.now(timezone.utc).replace(microsecond=0)
+
+    async def read_version(self) -> Tuple[str, int, datetime]:
+        doc = await self.collection.find_one_and_update(
+            {"_id": CATALOG_VERSION_ID},
+            {"$setOnInsert": {"epoch": uuid.uuid4().hex[:12], "counter": 0, "modified": self._now(), "changes": []}},
+            projection={"changes": 0},
+            upsert=True,
+            return_document=ReturnDocument.AFTER,
+        )
+        return self._version(doc)
+
+    async def bump_version(self, product_ids: Optional[List[str]] = None) -> Tuple[str, int, datetime]:
+        # Pipeline update: the change entry is tagged with the new counter in
+        # the same atomic write
+        doc = await self.collection.find_one_and_update(
+            {"_id": CATALOG_VERSION_ID},
+            [
+                {"$set": {
+                    "epoch": {"$ifNull": ["$epoch", uuid.uuid4().hex[:12]]},
+                    "counter": {"$add": [{"$ifNull": ["$counter", 0]}, 1]},
+                    "modified": self._now(),
+                }},
+                {"$set": {"changes": {"$slice": [
+                    {"$concatArrays": [
+                        {"$ifNull": ["$changes", []]},
+                        [{"counter": "$counter", "product_ids": {"$literal": product_ids}}],
+                    ]},
+                    -RECENT_CHANGES_LIMIT,
+                ]}}},
+            ],
+            projection={"changes": 0},
+            upsert=True,
+            return_document=ReturnDocument.AFTER,
+        )
+        return self._version(doc)
+
+    async def changes_after(self, counter: int) -> Optional[List[str]]:
+        """Product ids changed after `counter` (None: refresh everything)."""
+        doc = await self.collection.find_one({"_id": CATALOG_VERSION_ID}, {"changes": 1, "counter": 1})
+        if doc is None:
+            return None
+        return self.changes_since(doc, counter)
+
+    def changes_since(self, doc: dict, counter: int) -> Optional[List[str]]:
+        """Product ids changed after `counter`, or None if unknown (full refresh)."""
+        entries = {entry["counter"]: entry.get("product_ids") for entry in doc.get("changes", [])}
+        product_ids = []
+        for missed in range(counter + 1, int(doc.get("counter", 0)) + 1):
+            ids = entries.get(missed)
+            if ids is None:
+                return None
+            product_ids.extend(ids)
+        return list(dict.fromkeys(product_ids))
+
+    async def poll_once(self, handler: Callable[[dict], Awaitable[None]]) -> None:
+        doc = await self.collection.find_one({"_id": CATALOG_VERSION_ID}, {"changes": 0})
+        if doc is None:
+            return
+        scope, counter, last_modified = self._version(doc)
+        since = catalog_version.counter
+        if scope == catalog_version.scope:
+            if counter <= since:
+                return
+            # Only fetch the change log when there is something to catch up on
+            product_ids = await self.changes_after(since)
+        else:
+            product_ids = None
+        await handler({
+            "type": "catalog",
+            "scope": scope,
+            "counter": counter,
+            "since": since,
+            "last_modified": last_modified.isoformat(),
+            "product_ids": product_ids,
+        })
+
+    async def start(self, handler: Callable[[dict], Awaitable[None]]) -> None:
+        self._poller = asyncio.create_task(self._poll(handler))
+
+    async def _poll(self, handler: Callable[[dict], Awaitable[None]]) -> None:
+        while True:
+            await asyncio.sleep(CATALOG_VERSION_POLL_SECONDS)
+            try:
+                await self.poll_once(handler)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Catalog version poll failed: {e}")
+
+    async def close(self) -> None:
+        if self._poller is not None:
+            self._poller.cancel()
+            try:
+                await self._poller
+            except asyncio.CancelledError:
+                pass
+            self._poller = None
+
+
+_mongo_version_store: Optional[MongoCatalogVersionStore] = None
+
+
+def configure_catalog_version_store(db) -> None:
+    """Keep the catalog version in `db` when no shared cache backend is used."""
+    global _mongo_version_store
+    _mongo_version_store = MongoCatalogVersionStore(db[CATALOG_VERSION_COLLECTION])
+
+
+def _version_store():
+    if cache_backend.shared:
+        return cache_backend
+    return _mongo_version_store
+
+
+async def start_cache() -> None:
+    """Adopt the shared catalog version and subscribe to invalidations."""
+    store = _version_store()
+    if store is None:
+        return
+    try:
+        scope, counter, last_modified = await store.read_version()
+        catalog_version.apply(scope, counter, last_modified)
+    except Exception as e:
+        # The subscriber/poller resyncs once the server is reachable
+        logger.error(f"Could not read the shared catalog version: {e}")
+    await store.start(_handle_cache_event)
+
+
+async def stop_cache() -> None:
+    if _mongo_version_store is not None:
+        await _mongo_version_store.close()
+    await cache_backend.close()
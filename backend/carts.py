@@ -0,0 +1,253 @@
+from datetime import datetime, timedelta, timezone
+from typing import Iterable, List, Optional
+import os
+import uuid
+
+from pymongo import ReturnDocument, UpdateMany
+from pymongo.errors import DuplicateKeyError
+
+# =============================================================================
+# Server-Side Carts
+# =============================================================================
+#
+# One document per cart in the `carts` collection. Every line carries a
+# snapshot of the product (name, image, price) taken when it was added and
+# kept current by product writes, so checkout reads the cart and nothing
+# else. Lines are changed with single atomic updates ($inc / $push / $pull
+# on the positional line); there is no read-modify-write.
+#
+# Guest carts have no `user_id` and are addressed by their unguessable id; a
+# customer has at most one cart (unique sparse index on `user_id`).
+# `expires_at` is pushed forward on every write and a TTL index removes
+# abandoned carts.
+
+CARTS_COLLECTION = "carts"
+CART_TTL_DAYS = float(os.environ.get("CART_TTL_DAYS", "30"))
+
+# Cart line snapshot field -> product field
+SNAPSHOT_FIELDS = {
+    "product_name": "name",
+    "product_image": "image_url",
+    "product_price": "price",
+}
+SNAPSHOT_PROJECTION = {"_id": 0, "id": 1, **{field: 1 for field in SNAPSHOT_FIELDS.values()}}
+CART_PROJECTION = {"_id": 0}
+
+
+def _carts(db):
+    return db[CARTS_COLLECTION]
+
+
+def _touch(now: Optional[datetime] = None) -> dict:
+    now = now or datetime.now(timezone.utc)
+    return {"updated_at": now, "expires_at": now + timedelta(days=CART_TTL_DAYS)}
+
+
+def cart_filter(cart_id: str, user_id: Optional[str]) -> dict:
+    """Match a cart only for its owner (`user_id` None = guest cart)."""
+    return {"id": cart_id, "user_id": user_id}
+
+
+def snapshot(product: dict) -> dict:
+    """Line snapshot fields for a product document."""
+    return {line_field: product[field] for line_field, field in SNAPSHOT_FIELDS.items()}
+
+
+def cart_total(cart: dict) -> float:
+    return round(sum(line["product_price"] * line["quantity"] for line in cart.get("items", [])), 2)
+
+
+def _new_cart(user_id: Optional[str], now: datetime) -> dict:
+    cart = {"id": str(uuid.uuid4()), "items": [], "created_at": now, **_touch(now)}
+    if user_id is not None:
+        cart["user_id"] = user_id
+    return cart
+
+
+async def open_cart(db, user_id: Optional[str] = None) -> dict:
+    """Create a guest cart, or return (creating if needed) the user's cart."""
+    now = datetime.now(timezone.utc)
+    if user_id is None:
+        doc = _new_cart(None, now)
+        await _carts(db).insert_one(doc)
+        doc.pop("_id", None)
+        return doc
+    new_cart = _new_cart(user_id, now)
+    try:
+        return await _carts(db).find_one_and_update(
+            {"user_id": user_id},
+            {
+                "$set": _touch(now),
+                "$setOnInsert": {
+                    k: v for k, v in new_cart.items() if k not in ("user_id", "updated_at", "expires_at")
+                },
+            },
+            projection=CART_PROJECTION,
+            upsert=True,
+            return_document=ReturnDocument.AFTER,
+        )
+    except DuplicateKeyError:
+        # A concurrent request created it first
+        return await _carts(db).find_one({"user_id": user_id}, CART_PROJECTION)
+
+
+async def find_cart(db, cart_id: str, user_id: Optional[str]) -> Optional[dict]:
+    return await _carts(db).find_one(cart_filter(cart_id, user_id), CART_PROJECTION)
+
+
+async def add_line(db, match: dict, line: dict) -> Optional[dict]:
+    """
+    Add `line["quantity"]` of a product to the cart matched by `match`.
+
+    Increments the existing line (refreshing its snapshot) or appends a new
+    one. Returns the updated cart, or None if no cart matched.
+    """
+    product_id = line["product_id"]
+    fields = {k: v for k, v in line.items() if k not in ("product_id", "quantity")}
+    carts = _carts(db)
+    for _ in range(2):
+        cart = await carts.find_one_and_update(
+            {**match, "items.product_id": product_id},
+            {
+                "$inc": {"items.$.quantity": line["quantity"]},
+                "$set": {**_touch(), **{f"items.$.{k}": v for k, v in fields.items()}},
+            },
+            projection=CART_PROJECTION,
+            return_document=ReturnDocument.AFTER,
+        )
+        if cart is not None:
+            return cart
+        cart = await carts.find_one_and_update(
+            {**match, "items.product_id": {"$ne": product_id}},
+            {"$push": {"items": line}, "$set": _touch()},
+            projection=CART_PROJECTION,
+            return_document=ReturnDocument.AFTER,
+        )
+        if cart is not None:
+            return cart
+        # Either the cart does not exist or a concurrent request just added
+        # the line; the second pass tells them apart
+    return None
+
+
+async def set_line_quantity(db, match: dict, product_id: str, quantity: int) -> Optional[dict]:
+    """Set a line's quantity; returns None if the cart or line is missing."""
+    return await _carts(db).find_one_and_update(
+        {**match, "items.product_id": product_id},
+        {"$set": {"items.$.quantity": quantity, **_touch()}},
+        projection=CART_PROJECTION,
+        return_document=ReturnDocument.AFTER,
+    )
+
+
+async def remove_line(db, match: dict, product_id: str) -> Optional[dict]:
+    """Remove a line (no-op if absent); returns None if the cart is missing."""
+    return await _carts(db).find_one_and_update(
+        match,
+        {"$pull": {"items": {"product_id": product_id}}, "$set": _touch()},
+        projection=CART_PROJECTION,
+        return_document=ReturnDocument.AFTER,
+    )
+
+
+async def discard_cart(db, match: dict) -> bool:
+    result = await _carts(db).delete_one(match)
+    return result.deleted_count > 0
+
+
+async def claim_cart(db, match: dict) -> Optional[dict]:
+    """
+    Atomically remove and return a non-empty cart for checkout.
+
+    Only one of several concurrent checkouts of the same cart gets it;
+    the others see None.
+    """
+    return await _carts(db).find_one_and_delete(
+        {**match, "items.0": {"$exists": True}}, projection=CART_PROJECTION
+    )
+
+
+async def restore_cart(db, cart: dict) -> None:
+    """Put back a claimed cart whose checkout failed."""
+    try:
+        await _carts(db).insert_one(dict(cart))
+    except DuplicateKeyError:
+        # The customer already has a new cart; fold the lines into it
+        if cart.get("user_id"):
+            await merge_lines(db, {"user_id": cart["user_id"]}, cart.get("items", []))
+
+
+async def merge_lines(db, match: dict, lines: Iterable[dict]) -> None:
+    for line in lines:
+        await add_line(db, match, line)
+
+
+async def merge_guest_cart(db, guest_cart_id: str, user_id: str) -> Optional[str]:
+    """
+    Fold a guest cart into the user's cart at login; returns the user's cart id.
+
+    If the user has no cart yet the guest cart is simply claimed. Otherwise
+    each guest line is added to the user's cart and the guest cart deleted.
+    """
+    carts = _carts(db)
+    user_cart = await carts.find_one({"user_id": user_id}, {"_id": 0, "id": 1})
+    if user_cart is None:
+        try:
+            claimed = await carts.find_one_and_update(
+                cart_filter(guest_cart_id, None),
+                {"$set": {"user_id": user_id, **_touch()}},
+                projection={"_id": 0, "id": 1},
+            )
+        except DuplicateKeyError:
+            # The user's cart was created concurrently; merge into it instead
+            claimed = None
+            user_cart = await carts.find_one({"user_id": user_id}, {"_id": 0, "id": 1})
+        if claimed is not None:
+            return claimed["id"]
+        if user_cart is None:
+            return None
+
+    guest = await carts.find_one_and_delete(cart_filter(guest_cart_id, None), projection=CART_PROJECTION)
+    if guest is not None:
+        await merge_lines(db, {"id": user_cart["id"]}, guest.get("items", []))
+    return user_cart["id"]
+
+
+# =============================================================================
+# Snapshot Maintenance
+# =============================================================================
+
+async def refresh_cart_lines(db, products: Iterable[dict]) -> int:
+    """Copy current name/image/price of `products` into every cart line."""
+    operations = [
+        UpdateMany(
+            {"items.product_id": product["id"]},
+            {"$set": {f"items.$[line].{k}": v for k, v in snapshot(product).items()}},
+            array_filters=[{"line.product_id": product["id"]}],
+        )
+        for product in products
+    ]
+    if not operations:
+        return 0
+    result = await _carts(db).bulk_write(operations, ordered=False)
+    return result.modified_count
+
+
+async def refresh_all_cart_lines(db) -> int:
+    """Refresh every product referenced by any cart (after bulk imports)."""
+    product_ids = await _carts(db).distinct("items.product_id")
+    if not product_ids:
+        return 0
+    products = await db.products.find(
+        {"id": {"$in": product_ids}}, SNAPSHOT_PROJECTION
+    ).to_list(len(product_ids))
+    return await refresh_cart_lines(db, products)
+
+
+async def remove_cart_lines(db, product_ids: List[str]) -> int:
+    """Drop lines for deleted products from every cart."""
+    result = await _carts(db).update_many(
+        {"items.product_id": {"$in": product_ids}},
+        {"$pull": {"items": {"product_id": {"$in": product_ids}}}},
+    )
+    return result.modified_count
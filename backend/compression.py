@@ -0,0 +1,206 @@
+from typing import Optional
+import gzip
+import os
+import zlib
+
+from starlette.datastructures import Headers, MutableHeaders
+
+from cache import LRUCache
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional speedup
+    try:
+        import brotlicffi as brotli
+    except ImportError:
+        brotli = None
+
+# =============================================================================
+# Response Compression
+# =============================================================================
+#
+# gzip/brotli for JSON and text responses at or above COMPRESSION_MIN_SIZE,
+# negotiated from Accept-Encoding (brotli preferred when installed). Responses
+# that carry a strong ETag (catalog pages, facets, product detail, categories)
+# are byte-for-byte identical per tag, so their compressed bodies are kept in
+# an in-process LRU keyed by (ETag, encoding) and reused on repeat hits; since
+# that work is amortized they are compressed at a higher level. Streaming
+# responses (exports) are compressed incrementally.
+
+COMPRESSION_ENABLED = os.environ.get("COMPRESSION_ENABLED", "true").lower() in ("1", "true", "yes")
+COMPRESSION_MIN_SIZE = int(os.environ.get("COMPRESSION_MIN_SIZE", "500"))
+GZIP_LEVEL = int(os.environ.get("COMPRESSION_GZIP_LEVEL", "6"))
+GZIP_CACHED_LEVEL = int(os.environ.get("COMPRESSION_GZIP_CACHED_LEVEL", "9"))
+BROTLI_QUALITY = int(os.environ.get("COMPRESSION_BROTLI_QUALITY", "4"))
+BROTLI_CACHED_QUALITY = int(os.environ.get("COMPRESSION_BROTLI_CACHED_QUALITY", "9"))
+
+COMPRESSIBLE_TYPES = (
+    "application/json",
+    "application/x-ndjson",
+    "application/javascript",
+    "application/xml",
+    "text/",
+)
+
+# (strong ETag, encoding) -> compressed body
+compressed_cache = LRUCache(
+    "compressed",
+    max_entries=int(os.environ.get("COMPRESSION_CACHE_ENTRIES", "1024"))
+)
+
+
+def supported_encodings() -> tuple:
+    return ("br", "gzip") if brotli is not None else ("gzip",)
+
+
+def negotiate_encoding(accept_encoding: str) -> Optional[str]:
+    """Pick the preferred supported encoding the client accepts (q > 0)."""
+    accepted = {}
+    for part in accept_encoding.split(","):
+        token, _, params = part.strip().partition(";")
+        token = token.strip().lower()
+        if not token:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        accepted[token] = q
+    for encoding in supported_encodings():
+        q = accepted.get(encoding, accepted.get("*", 0.0))
+        if q > 0:
+            return encoding
+    return None
+
+
+def compress(body: bytes, encoding: str, cached: bool = False) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_CACHED_QUALITY if cached else BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=GZIP_CACHED_LEVEL if cached else GZIP_LEVEL, mtime=0)
+
+
+class _StreamCompressor:
+    def __init__(self, encoding: str):
+        if encoding == "br":
+            self._brotli = brotli.Compressor(quality=BROTLI_QUALITY)
+            self._zlib = None
+        else:
+            self._brotli = None
+            self._zlib = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)
+
+    def chunk(self, data: bytes) -> bytes:
+        # Flush per chunk so clients see rows as they are produced
+        if self._brotli is not None:
+            return self._brotli.process(data) + self._brotli.flush()
+        return self._zlib.compress(data) + self._zlib.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        if self._brotli is not None:
+            return self._brotli.finish()
+        return self._zlib.flush()
+
+
+def _compressible(headers: Headers) -> bool:
+    if "content-encoding" in headers:
+        return False
+    content_type = headers.get("content-type", "")
+    return content_type.startswith(COMPRESSIBLE_TYPES)
+
+
+# =============================================================================
+# ASGI Middleware
+# =============================================================================
+
+class CompressionMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] == "HEAD":
+            await self.app(scope, receive, send)
+            return
+        encoding = negotiate_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        await _CompressionResponder(send, encoding).run(self.app, scope, receive)
+
+
+class _CompressionResponder:
+    def __init__(self, send, encoding: str):
+        self.send = send
+        self.encoding = encoding
+        self.start_message: Optional[dict] = None
+        # None until the first body message decides the mode
+        self.compressing: Optional[bool] = None
+        self.stream: Optional[_StreamCompressor] = None
+
+    async def run(self, app, scope, receive):
+        await app(scope, receive, self.wrapped_send)
+
+    def _mark_encoded(self, headers: MutableHeaders) -> None:
+        headers["Content-Encoding"] = self.encoding
+        vary = headers.get("vary", "")
+        if "accept-encoding" not in vary.lower():
+            headers["Vary"] = f"{vary}, Accept-Encoding" if vary else "Accept-Encoding"
+        # The compressed bytes are a different representation of the same
+        # resource; a weak tag still revalidates (If-None-Match ignores W/)
+        etag = headers.get("etag")
+        if etag and not etag.startswith("W/"):
+            headers["ETag"] = f"W/{etag}"
+
+    async def wrapped_send(self, message):
+        message_type = message["type"]
+        if message_type == "http.response.start":
+            self.start_message = message
+            return
+        if message_type != "http.response.body":
+            await self.send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if self.compressing is None:
+            start = self.start_message
+            headers = MutableHeaders(scope=start)
+            if not _compressible(headers) or (not more_body and len(body) < COMPRESSION_MIN_SIZE):
+                self.compressing = False
+                await self.send(start)
+                await self.send(message)
+                return
+            self.compressing = True
+
+            if not more_body:
+                # Whole body in one message: reuse the stored bytes when tagged
+                etag = headers.get("etag") if start["status"] == 200 else None
+                if etag and not etag.startswith("W/"):
+                    key = (etag, self.encoding)
+                    compressed = compressed_cache.get(key)
+                    if compressed is None:
+                        compressed = compress(body, self.encoding, cached=True)
+                        compressed_cache.set(key, compressed)
+                else:
+                    compressed = compress(body, self.encoding)
+                self._mark_encoded(headers)
+                headers["Content-Length"] = str(len(compressed))
+                await self.send(start)
+                await self.send({"type": "http.response.body", "body": compressed})
+                return
+
+            self.stream = _StreamCompressor(self.encoding)
+            self._mark_encoded(headers)
+            del headers["Content-Length"]
+            await self.send(start)
+
+        if not self.compressing:
+            await self.send(message)
+            return
+
+        data = self.stream.chunk(body) if body else b""
+        if not more_body:
+            data += self.stream.finish()
+        await self.send({"type": "http.response.body", "body": data, "more_body": more_body})
@@ -0,0 +1,113 @@
+from typing import Optional
+import logging
+import os
+
+from pymongo.read_preferences import Nearest, Primary, PrimaryPreferred, Secondary, SecondaryPreferred
+
+# =============================================================================
+# MongoDB Client Configuration
+# =============================================================================
+#
+# Connection pool, timeout, compression and read-routing settings come from
+# environment variables. Unset values are not passed to the driver, so options
+# in MONGO_URL (or pymongo's defaults) apply. Public catalog reads can be
+# routed to secondaries with MONGO_CATALOG_READ_PREFERENCE; orders, auth and
+# every write always use the primary.
+
+logger = logging.getLogger(__name__)
+
+# Env var -> MongoClient keyword, for integer options
+INT_OPTIONS = {
+    "MONGO_MAX_POOL_SIZE": "maxPoolSize",
+    "MONGO_MIN_POOL_SIZE": "minPoolSize",
+    "MONGO_MAX_CONNECTING": "maxConnecting",
+    "MONGO_MAX_IDLE_TIME_MS": "maxIdleTimeMS",
+    "MONGO_WAIT_QUEUE_TIMEOUT_MS": "waitQueueTimeoutMS",
+    "MONGO_SERVER_SELECTION_TIMEOUT_MS": "serverSelectionTimeoutMS",
+    "MONGO_CONNECT_TIMEOUT_MS": "connectTimeoutMS",
+    "MONGO_SOCKET_TIMEOUT_MS": "socketTimeoutMS",
+}
+
+# Optional packages each wire compressor needs; zlib ships with Python
+COMPRESSOR_MODULES = {"snappy": "snappy", "zstd": "zstandard", "zlib": "zlib"}
+
+READ_PREFERENCES = {
+    "primary": Primary,
+    "primaryPreferred": PrimaryPreferred,
+    "secondary": Secondary,
+    "secondaryPreferred": SecondaryPreferred,
+    "nearest": Nearest,
+}
+
+# After a product write this process reads the catalog from the primary for a
+# while, so admins (and caches filled right after the write) never see a
+# lagging secondary's pre-write data.
+CATALOG_PRIMARY_WINDOW_SECONDS = float(os.environ.get("MONGO_CATALOG_PRIMARY_WINDOW_SECONDS", "10"))
+
+
+def _int_env(name: str) -> Optional[int]:
+    value = os.environ.get(name, "").strip()
+    if not value:
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        raise ValueError(f"{name} must be an integer, got {value!r}")
+
+
+def available_compressors(names: str) -> list:
+    """Keep only the requested compressors whose libraries are installed."""
+    compressors = []
+    for name in (n.strip() for n in names.split(",")):
+        if not name:
+            continue
+        module = COMPRESSOR_MODULES.get(name)
+        if module is None:
+            logger.warning(f"Unknown MongoDB compressor ignored: {name}")
+            continue
+        try:
+            __import__(module)
+        except ImportError:
+            logger.warning(f"MongoDB compressor {name} unavailable ({module} not installed)")
+            continue
+        compressors.append(name)
+    return compressors
+
+
+def client_options() -> dict:
+    """Keyword arguments for AsyncIOMotorClient from MONGO_* variables."""
+    options = {}
+    for env_name, option in INT_OPTIONS.items():
+        value = _int_env(env_name)
+        if value is not None:
+            options[option] = value
+    compressors = available_compressors(os.environ.get("MONGO_COMPRESSORS", ""))
+    if compressors:
+        options["compressors"] = compressors
+        level = _int_env("MONGO_ZLIB_COMPRESSION_LEVEL")
+        if level is not None:
+            options["zlibCompressionLevel"] = level
+    return options
+
+
+def catalog_read_preference():
+    """
+    Read preference for public catalog reads.
+
+    MONGO_CATALOG_READ_PREFERENCE takes a mode name (primary,
+    primaryPreferred, secondary, secondaryPreferred, nearest); staleness can
+    be bounded with MONGO_CATALOG_MAX_STALENESS_SECONDS (MongoDB minimum 90).
+    """
+    name = os.environ.get("MONGO_CATALOG_READ_PREFERENCE", "primary").strip() or "primary"
+    if name not in READ_PREFERENCES:
+        raise ValueError(f"MONGO_CATALOG_READ_PREFERENCE must be one of {', '.join(READ_PREFERENCES)}")
+    if name == "primary":
+        return Primary()
+    max_staleness = _int_env("MONGO_CATALOG_MAX_STALENESS_SECONDS")
+    return READ_PREFERENCES[name](max_staleness=max_staleness if max_staleness is not None else -1)
+
+
+def describe(options: dict, catalog_preference) -> str:
+    """One-line summary for the startup log."""
+    settings = ", ".join(f"{k}={v}" for k, v in sorted(options.items())) or "driver defaults"
+    return f"MongoDB client: {settings}; catalog reads: {catalog_preference.name}"
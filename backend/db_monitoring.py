@@ -0,0 +1,253 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, Optional
+import logging
+import os
+import threading
+
+from pymongo import monitoring
+
+from metrics import Counter, Histogram, UNMATCHED_ROUTE, registry
+
+# =============================================================================
+# MongoDB Command Monitoring
+# =============================================================================
+#
+# A pymongo CommandListener attributes every command's duration to the request
+# that issued it. Motor runs pymongo calls on its executor with a copy of the
+# caller's context, so a per-request stats object stored in a ContextVar is
+# reachable from the listener thread. Per-route DB time and command counts are
+# exported on /metrics; commands slower than SLOW_QUERY_MS are logged with
+# their filter shape (field names and operators, values replaced by "?").
+
+logger = logging.getLogger(__name__)
+
+DB_MONITORING_ENABLED = os.environ.get("DB_MONITORING", "true").lower() in ("1", "true", "yes")
+# Log commands at or above this duration; 0 logs every command, negative disables
+SLOW_QUERY_MS = float(os.environ.get("SLOW_QUERY_MS", "100"))
+# Add Server-Timing / X-DB-Commands headers to responses (handy in tests and dev)
+DB_TIMING_HEADERS = os.environ.get("DB_TIMING_HEADERS", "false").lower() in ("1", "true", "yes")
+
+DB_LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+MONGODB_COMMAND_DURATION = registry.register(Histogram(
+    "mongodb_command_duration_seconds",
+    "MongoDB command latency by command name",
+    ("command",),
+    DB_LATENCY_BUCKETS,
+))
+MONGODB_COMMAND_FAILURES = registry.register(Counter(
+    "mongodb_command_failures_total",
+    "Failed MongoDB commands by command name",
+    ("command",),
+))
+REQUEST_DB_DURATION = registry.register(Histogram(
+    "http_request_db_duration_seconds",
+    "Total MongoDB time per request by route template",
+    ("method", "route"),
+    DB_LATENCY_BUCKETS,
+))
+REQUEST_DB_COMMANDS = registry.register(Counter(
+    "http_request_db_commands_total",
+    "MongoDB commands issued by route template",
+    ("method", "route"),
+))
+
+# Where the filter lives in each command document
+SHAPE_FIELDS = {
+    "find": ("filter", "sort"),
+    "aggregate": ("pipeline",),
+    "count": ("query",),
+    "distinct": ("key", "query"),
+    "findAndModify": ("query", "sort"),
+    "update": ("updates",),
+    "delete": ("deletes",),
+}
+# update/delete batches can hold thousands of statements
+MAX_SHAPE_STATEMENTS = 3
+
+
+class RequestDBStats:
+    """MongoDB commands and time attributed to one request (or tracked block)."""
+
+    def __init__(self, scope: Optional[dict] = None):
+        self.scope = scope
+        self.commands = 0
+        self.failures = 0
+        self.duration_seconds = 0.0
+        self.by_command: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def record(self, command_name: str, seconds: float, failed: bool = False) -> None:
+        with self._lock:
+            self.commands += 1
+            self.duration_seconds += seconds
+            self.by_command[command_name] = self.by_command.get(command_name, 0) + 1
+            if failed:
+                self.failures += 1
+
+    @property
+    def route(self) -> str:
+        if self.scope is None:
+            return "-"
+        return getattr(self.scope.get("route"), "path", UNMATCHED_ROUTE)
+
+    def as_dict(self) -> dict:
+        with self._lock:
+            return {
+                "commands": self.commands,
+                "failures": self.failures,
+                "duration_ms": round(self.duration_seconds * 1000, 2),
+                "by_command": dict(self.by_command),
+            }
+
+
+_current_stats: ContextVar[Optional[RequestDBStats]] = ContextVar("db_request_stats", default=None)
+
+
+def current_db_stats() -> Optional[RequestDBStats]:
+    return _current_stats.get()
+
+
+@contextmanager
+def track_db_commands(scope: Optional[dict] = None) -> Iterator[RequestDBStats]:
+    """
+    Count MongoDB commands issued inside the block.
+
+    Used by the request middleware, and directly by tests to catch N+1
+    regressions, e.g. `with track_db_commands() as s: ...; assert s.commands <= 2`.
+    """
+    stats = RequestDBStats(scope)
+    token = _current_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _current_stats.reset(token)
+
+
+def filter_shape(value: Any) -> Any:
+    """Keep field names and operators; replace values with "?"."""
+    if isinstance(value, dict):
+        return {key: filter_shape(item) for key, item in value.items()}
+    if isinstance(value, list) and value and all(isinstance(item, dict) for item in value):
+        # $or/$and clauses and pipeline stages carry structure
+        return [filter_shape(item) for item in value]
+    return "?"
+
+
+def command_shape(command_name: str, command: dict) -> dict:
+    shape = {}
+    for field in SHAPE_FIELDS.get(command_name, ()):
+        if field not in command:
+            continue
+        value = command[field]
+        if field == "sort" or field == "key":
+            shape[field] = value
+        elif field in ("updates", "deletes"):
+            statements = value[:MAX_SHAPE_STATEMENTS]
+            shape[field] = [filter_shape(statement.get("q", {})) for statement in statements]
+            if len(value) > MAX_SHAPE_STATEMENTS:
+                shape[f"{field}_total"] = len(value)
+        else:
+            shape[field] = filter_shape(value)
+    return shape
+
+
+def _collection_name(command_name: str, command: dict) -> str:
+    target = command.get(command_name)
+    # getMore carries the cursor id in its command field
+    return target if isinstance(target, str) else command.get("collection", "?")
+
+
+class CommandMonitor(monitoring.CommandListener):
+    """Attribute command durations to requests and log slow commands."""
+
+    def __init__(self, slow_query_ms: float = SLOW_QUERY_MS):
+        self.slow_query_ms = slow_query_ms
+        # (connection, request id) -> command document, kept for the slow log
+        self._pending: Dict[tuple, dict] = {}
+
+    def started(self, event: monitoring.CommandStartedEvent) -> None:
+        if self.slow_query_ms >= 0:
+            self._pending[(event.connection_id, event.request_id)] = event.command
+
+    def succeeded(self, event: monitoring.CommandSucceededEvent) -> None:
+        self._finish(event, failed=False)
+
+    def failed(self, event: monitoring.CommandFailedEvent) -> None:
+        self._finish(event, failed=True)
+
+    def _finish(self, event, failed: bool) -> None:
+        command = self._pending.pop((event.connection_id, event.request_id), None)
+        seconds = event.duration_micros / 1_000_000
+        name = event.command_name
+        # Runs on Motor's executor threads; metrics lock internally
+        MONGODB_COMMAND_DURATION.observe((name,), seconds)
+        if failed:
+            MONGODB_COMMAND_FAILURES.inc((name,))
+
+        stats = _current_stats.get()
+        if stats is not None:
+            stats.record(name, seconds, failed)
+
+        if command is not None and seconds * 1000 >= self.slow_query_ms:
+            logger.warning(
+                "Slow MongoDB command: %s %s.%s took %.1fms (route=%s, failed=%s) shape=%s",
+                name,
+                event.database_name,
+                _collection_name(name, command),
+                seconds * 1000,
+                stats.route if stats is not None else "-",
+                failed,
+                command_shape(name, command),
+            )
+
+
+command_monitor = CommandMonitor()
+
+
+def mongo_event_listeners() -> list:
+    """Listeners to pass to AsyncIOMotorClient(event_listeners=...)."""
+    return [command_monitor] if DB_MONITORING_ENABLED else []
+
+
+# =============================================================================
+# ASGI Middleware
+# =============================================================================
+
+class DBStatsMiddleware:
+    """
+    Track MongoDB commands per request and export per-route DB time.
+
+    With DB_TIMING_HEADERS enabled, responses carry `X-DB-Commands` and a
+    `Server-Timing: db;dur=...` entry covering commands issued before the
+    response started.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        with track_db_commands(scope) as stats:
+            if DB_TIMING_HEADERS:
+                async def send_wrapper(message):
+                    if message["type"] == "http.response.start":
+                        snapshot = stats.as_dict()
+                        headers = list(message.get("headers", []))
+                        headers.append((b"x-db-commands", str(snapshot["commands"]).encode()))
+                        headers.append((b"server-timing", f"db;dur={snapshot['duration_ms']}".encode()))
+                        message = {**message, "headers": headers}
+                    await send(message)
+            else:
+                send_wrapper = send
+            try:
+                await self.app(scope, receive, send_wrapper)
+            finally:
+                labels = (scope["method"], stats.route)
+                REQUEST_DB_DURATION.observe(labels, stats.duration_seconds)
+                if stats.commands:
+                    REQUEST_DB_COMMANDS.inc(labels, stats.commands)
@@ -0,0 +1,76 @@
+from datetime import date, datetime
+from typing import Any, Optional
+import json
+import os
+
+from fastapi import Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None
+
+# =============================================================================
+# Fast JSON Responses
+# =============================================================================
+#
+# By default FastAPI validates a route's return value against its
+# `response_model`, runs it through `jsonable_encoder` and then `json.dumps`.
+# For documents that were validated on the way into MongoDB that second pass
+# is pure overhead. With FAST_RESPONSES enabled, routes hand their already
+# validated data to `respond`, which serializes it in one step (orjson when
+# installed) and skips response-model validation.
+#
+# Benchmark: python bench_responses.py
+
+FAST_RESPONSES_ENABLED = os.environ.get("FAST_RESPONSES", "false").lower() in ("1", "true", "yes")
+
+
+def _default(value: Any) -> Any:
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, BaseModel):
+        return value.model_dump(mode="json")
+    return jsonable_encoder(value)
+
+
+def dumps(content: Any) -> bytes:
+    """Serialize to compact JSON bytes, using orjson when available."""
+    if orjson is not None:
+        return orjson.dumps(content, default=_default)
+    return json.dumps(
+        content, default=_default, ensure_ascii=False, allow_nan=False, separators=(",", ":")
+    ).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse rendered with the fast encoder."""
+
+    def render(self, content: Any) -> bytes:
+        if isinstance(content, BaseModel):
+            return content.model_dump_json().encode("utf-8")
+        return dumps(content)
+
+
+def respond(content: Any, response: Optional[Response] = None) -> Any:
+    """
+    Return `content` via the fast path when FAST_RESPONSES is enabled.
+
+    Otherwise `content` is returned unchanged so FastAPI validates it against
+    the route's `response_model` as usual. Headers and status already set on
+    the injected `response` are carried over in fast mode.
+    """
+    if not FAST_RESPONSES_ENABLED:
+        return content
+    if isinstance(content, dict):
+        content.pop("_id", None)
+    if response is None:
+        return FastJSONResponse(content)
+    return FastJSONResponse(
+        content,
+        status_code=response.status_code or 200,
+        headers=dict(response.headers)
+    )
@@ -0,0 +1,80 @@
+from datetime import datetime
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Optional
+import hashlib
+
+from starlette.requests import Request
+from starlette.responses import Response
+
+# =============================================================================
+# Conditional GET (ETag / Last-Modified) Helpers
+# =============================================================================
+#
+# Catalog ETags are derived from the catalog version (bumped on every product
+# write) plus the request's normalized parameters, so a revalidation can be
+# answered with 304 before any cache or database lookup.
+
+CATALOG_CACHE_CONTROL = "public, max-age=300"
+
+
+def make_etag(*parts) -> str:
+    """Build a strong ETag from the given identifying parts."""
+    digest = hashlib.sha1("|".join(str(p) for p in parts).encode()).hexdigest()
+    return f'"{digest[:20]}"'
+
+
+def http_date(value: datetime) -> str:
+    return format_datetime(value, usegmt=True)
+
+
+def _etag_matches(header: str, etag: str) -> bool:
+    if header.strip() == "*":
+        return True
+    # If-None-Match uses weak comparison, so ignore W/ prefixes
+    candidates = [tag.strip() for tag in header.split(",")]
+    return any(tag.removeprefix("W/") == etag for tag in candidates)
+
+
+def is_not_modified(request: Request, etag: str, last_modified: Optional[datetime]) -> bool:
+    """
+    Evaluate If-None-Match / If-Modified-Since for a GET request.
+
+    If-None-Match takes precedence; If-Modified-Since is only consulted when
+    the client sent no entity tags (RFC 9110 section 13.2.2).
+    """
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        return _etag_matches(if_none_match, etag)
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and last_modified is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        if since.tzinfo is None:
+            return False
+        return last_modified.replace(microsecond=0) <= since
+    return False
+
+
+def validator_headers(
+    etag: str,
+    last_modified: Optional[datetime],
+    cache_control: str = CATALOG_CACHE_CONTROL
+) -> dict:
+    headers = {
+        "ETag": etag,
+        "Cache-Control": cache_control,
+        "Vary": "Accept-Encoding",
+    }
+    if last_modified is not None:
+        headers["Last-Modified"] = http_date(last_modified)
+    return headers
+
+
+def not_modified_response(
+    etag: str,
+    last_modified: Optional[datetime],
+    cache_control: str = CATALOG_CACHE_CONTROL
+) -> Response:
+    return Response(status_code=304, headers=validator_headers(etag, last_modified, cache_control))
@@ -0,0 +1,345 @@
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+import asyncio
+import logging
+import os
+import socket
+import uuid
+
+from pymongo import IndexModel
+from pymongo.errors import DuplicateKeyError, PyMongoError
+
+logger = logging.getLogger(__name__)
+
+# =============================================================================
+# Declarative Index Registry
+# =============================================================================
+#
+# Every index the application relies on is declared here, per collection.
+# `ensure_indexes` diffs this set against what exists and builds only the
+# missing ones; `inspect_indexes` reports the same diff without building;
+# `explain_query_shapes` checks that the hot query shapes actually use an
+# index.
+
+# Options compared when deciding whether an existing index matches a spec
+INDEX_OPTIONS = ("unique", "sparse", "expireAfterSeconds", "partialFilterExpression")
+
+INDEX_REGISTRY: Dict[str, List[dict]] = {
+    "products": [
+        {"keys": [("id", 1)], "unique": True},
+        {"keys": [("category", 1)]},
+        {"keys": [("price", 1)]},
+        {"keys": [("design_no", 1)], "unique": True, "sparse": True},
+        {"keys": [("name", 1)]},
+        # Keyset pagination seeks on (sort key, id)
+        {"keys": [("created_at", -1), ("id", -1)]},
+        {"keys": [("category", 1), ("created_at", -1), ("id", -1)]},
+        {"keys": [("price", 1), ("id", 1)]},
+    ],
+    "orders": [
+        {"keys": [("id", 1)], "unique": True},
+        # Compound index for fast dashboard queries
+        {"keys": [("created_at", -1), ("status", 1)]},
+        # Status filter + created_at range/sort (equality before range); its
+        # prefix also serves status-only filters
+        {"keys": [("status", 1), ("created_at", -1)]},
+        {"keys": [("customer_email", 1)]},
+        # Customer order history: keyset pagination per user (newest first)
+        {"keys": [("user_id", 1), ("created_at", -1), ("id", -1)]},
+    ],
+    "carts": [
+        {"keys": [("id", 1)], "unique": True},
+        # One cart per customer; guest carts have no user_id
+        {"keys": [("user_id", 1)], "unique": True, "sparse": True},
+        # Abandoned carts are removed once expires_at passes
+        {"keys": [("expires_at", 1)], "expireAfterSeconds": 0},
+        # Snapshot refresh on product writes
+        {"keys": [("items.product_id", 1)]},
+    ],
+    "admins": [
+        {"keys": [("email", 1)], "unique": True},
+    ],
+    "users": [
+        {"keys": [("id", 1)], "unique": True},
+        {"keys": [("email", 1)], "unique": True},
+    ],
+}
+
+# Representative filters/sorts for every hot query path. Values are
+# placeholders; only the shape matters to the query planner.
+QUERY_SHAPES: List[dict] = [
+    {"collection": "products", "route": "get_product", "filter": {"id": "?"}},
+    {"collection": "products", "route": "get_products", "filter": {"category": "?"},
+     "sort": [("created_at", -1), ("id", -1)]},
+    {"collection": "products", "route": "get_products", "filter": {},
+     "sort": [("created_at", -1), ("id", -1)]},
+    {"collection": "products", "route": "get_products", "filter": {"price": {"$gte": 0}},
+     "sort": [("price", 1), ("id", 1)]},
+    {"collection": "products", "route": "create_order", "filter": {"id": {"$in": ["?"]}}},
+    {"collection": "orders", "route": "get_order", "filter": {"id": "?"}},
+    {"collection": "orders", "route": "get_all_orders", "filter": {},
+     "sort": [("created_at", -1)]},
+    {"collection": "orders", "route": "get_all_orders", "filter": {"status": "pending"},
+     "sort": [("created_at", -1)]},
+    {"collection": "orders", "route": "get_all_orders",
+     "filter": {"created_at": {"$gte": datetime(2000, 1, 1, tzinfo=timezone.utc)}},
+     "sort": [("created_at", -1)]},
+    {"collection": "orders", "route": "get_all_orders",
+     "filter": {"status": "pending",
+                "created_at": {"$gte": datetime(2000, 1, 1, tzinfo=timezone.utc)}},
+     "sort": [("created_at", -1)]},
+    {"collection": "orders", "route": "get_user_orders", "filter": {"user_id": "?"},
+     "sort": [("created_at", -1), ("id", -1)]},
+    {"collection": "carts", "route": "get_cart", "filter": {"id": "?", "user_id": None}},
+    {"collection": "carts", "route": "create_cart", "filter": {"user_id": "?"}},
+    {"collection": "carts", "route": "update_product", "filter": {"items.product_id": "?"}},
+    {"collection": "admins", "route": "get_current_admin", "filter": {"email": "?"}},
+    {"collection": "users", "route": "get_current_user", "filter": {"email": "?"}},
+]
+
+
+def index_name(keys: List[tuple]) -> str:
+    """MongoDB's default index name for a key pattern, e.g. `created_at_-1_status_1`."""
+    return "_".join(f"{field}_{direction}" for field, direction in keys)
+
+
+def _spec_options(spec: dict) -> dict:
+    return {opt: spec[opt] for opt in INDEX_OPTIONS if opt in spec}
+
+
+def _existing_options(info: dict) -> dict:
+    return {opt: info[opt] for opt in INDEX_OPTIONS if opt in info}
+
+
+def diff_indexes(specs: List[dict], existing: Dict[str, dict]) -> dict:
+    """
+    Compare declared specs with `index_information()` output.
+
+    Returns the specs that are missing, those whose key pattern exists with
+    different options (reported, never rebuilt automatically), and indexes
+    present in the database but not declared.
+    """
+    # Key specs are compared as-is: numeric directions compare equal whether
+    # reported as 1 or 1.0, and special types ("text", "hashed", "2dsphere")
+    # simply never match a differently declared index
+    existing_by_keys = {
+        tuple((field, direction) for field, direction in info["key"]): (name, info)
+        for name, info in existing.items()
+    }
+    missing, present, conflicts = [], [], []
+    declared_keys = set()
+    for spec in specs:
+        keys = tuple(spec["keys"])
+        declared_keys.add(keys)
+        match = existing_by_keys.get(keys)
+        if match is None:
+            missing.append(spec)
+            continue
+        name, info = match
+        if _existing_options(info) != _spec_options(spec):
+            conflicts.append({
+                "name": name,
+                "declared": _spec_options(spec),
+                "existing": _existing_options(info),
+            })
+        else:
+            present.append(name)
+    unmanaged = [
+        name for keys, (name, _) in existing_by_keys.items()
+        if keys not in declared_keys and name != "_id_"
+    ]
+    return {"missing": missing, "present": present, "conflicts": conflicts, "unmanaged": unmanaged}
+
+
+# =============================================================================
+# Cross-Worker Build Lock
+# =============================================================================
+#
+# A lease document in the `locks` collection: whoever upserts it first (or
+# after the previous lease expired) owns it. Works across processes and hosts
+# without extra infrastructure.
+
+LOCKS_COLLECTION = "locks"
+INDEX_BUILD_LOCK = "index-build"
+INDEX_BUILD_LOCK_TTL_SECONDS = 600
+
+
+async def acquire_lock(db, name: str, ttl_seconds: float) -> Optional[str]:
+    """Take the named lease; returns an owner token, or None if held elsewhere."""
+    owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+    now = datetime.now(timezone.utc)
+    try:
+        await db[LOCKS_COLLECTION].update_one(
+            {"_id": name, "expires_at": {"$lt": now}},
+            {"$set": {
+                "owner": owner,
+                "acquired_at": now,
+                "expires_at": now + timedelta(seconds=ttl_seconds)
+            }},
+            upsert=True
+        )
+    except DuplicateKeyError:
+        # The lease exists and has not expired
+        return None
+    return owner
+
+
+async def release_lock(db, name: str, owner: str) -> None:
+    await db[LOCKS_COLLECTION].delete_one({"_id": name, "owner": owner})
+
+
+# =============================================================================
+# Index Builds
+# =============================================================================
+
+async def _inspect(db, collection: str, specs: List[dict]) -> dict:
+    try:
+        existing = await db[collection].index_information()
+    except PyMongoError as e:
+        logger.error(f"Error inspecting indexes on {collection}: {e}")
+        return {"error": str(e)}
+    return diff_indexes(specs, existing)
+
+
+async def _inspect_all(db, registry: Dict[str, List[dict]]) -> Dict[str, dict]:
+    collections = list(registry)
+    diffs = await asyncio.gather(*(_inspect(db, c, registry[c]) for c in collections))
+    return dict(zip(collections, diffs))
+
+
+async def _build(db, collection: str, missing: List[dict]) -> dict:
+    models = [
+        IndexModel(spec["keys"], name=index_name(spec["keys"]), **_spec_options(spec))
+        for spec in missing
+    ]
+    try:
+        # One createIndexes command builds all of a collection's indexes in one pass
+        created = await db[collection].create_indexes(models)
+    except PyMongoError as e:
+        logger.error(f"Error building indexes on {collection}: {e}")
+        return {"error": str(e)}
+    logger.info(f"{collection}: created indexes {created}")
+    return {"created": created}
+
+
+async def inspect_indexes(db, registry: Optional[Dict[str, List[dict]]] = None) -> dict:
+    """Report declared vs existing indexes per collection without building."""
+    diffs = await _inspect_all(db, registry or INDEX_REGISTRY)
+    report = {}
+    for collection, diff in diffs.items():
+        if "error" in diff:
+            report[collection] = diff
+            continue
+        report[collection] = {
+            "present": diff["present"],
+            "missing": [index_name(spec["keys"]) for spec in diff["missing"]],
+            "conflicts": diff["conflicts"],
+            "unmanaged": diff["unmanaged"],
+        }
+    return report
+
+
+async def ensure_indexes(db, registry: Optional[Dict[str, List[dict]]] = None) -> dict:
+    """
+    Build every declared index that does not exist yet.
+
+    All collections are inspected concurrently. If anything is missing, the
+    worker holding the `index-build` lock re-checks and runs the builds for
+    all collections concurrently; workers that find the lock held skip
+    building and start without waiting. Failures are logged per collection
+    and never raised - indexes are an optimization and the app should still
+    start without them.
+    """
+    registry = registry or INDEX_REGISTRY
+    diffs = await _inspect_all(db, registry)
+    builds: Dict[str, dict] = {}
+    skipped = False
+
+    if any(diff.get("missing") for diff in diffs.values()):
+        try:
+            owner = await acquire_lock(db, INDEX_BUILD_LOCK, INDEX_BUILD_LOCK_TTL_SECONDS)
+        except PyMongoError as e:
+            logger.error(f"Could not take the index build lock: {e}")
+            owner = None
+        if owner is None:
+            skipped = True
+            logger.info("Index build running in another worker; skipping builds here")
+        else:
+            try:
+                # Another worker may have finished the builds meanwhile
+                diffs = await _inspect_all(db, registry)
+                pending = [c for c, diff in diffs.items() if diff.get("missing")]
+                results = await asyncio.gather(
+                    *(_build(db, c, diffs[c]["missing"]) for c in pending)
+                )
+                builds = dict(zip(pending, results))
+            finally:
+                await release_lock(db, INDEX_BUILD_LOCK, owner)
+
+    report = {}
+    for collection, diff in diffs.items():
+        if "error" in diff:
+            report[collection] = diff
+            continue
+        for conflict in diff["conflicts"]:
+            logger.warning(
+                f"Index {collection}.{conflict['name']} exists with options "
+                f"{conflict['existing']}, registry declares {conflict['declared']}"
+            )
+        build = builds.get(collection, {})
+        report[collection] = {
+            "present": diff["present"],
+            "created": build.get("created", []),
+            "conflicts": diff["conflicts"],
+            "unmanaged": diff["unmanaged"],
+        }
+        if "error" in build:
+            report[collection]["error"] = build["error"]
+        if skipped and diff["missing"]:
+            report[collection]["pending"] = [index_name(spec["keys"]) for spec in diff["missing"]]
+    return report
+
+
+def _plan_stages(plan) -> List[str]:
+    """Collect every `stage` name in an explain plan tree."""
+    stages = []
+    if isinstance(plan, dict):
+        if "stage" in plan:
+            stages.append(plan["stage"])
+        for value in plan.values():
+            stages.extend(_plan_stages(value))
+    elif isinstance(plan, list):
+        for item in plan:
+            stages.extend(_plan_stages(item))
+    return stages
+
+
+async def explain_query_shapes(db, shapes: Optional[List[dict]] = None) -> List[dict]:
+    """Explain each registered query shape and flag collection scans."""
+    results = []
+    for shape in shapes or QUERY_SHAPES:
+        cursor = db[shape["collection"]].find(shape["filter"])
+        if shape.get("sort"):
+            cursor = cursor.sort(shape["sort"])
+        try:
+            explain = await cursor.explain()
+        except PyMongoError as e:
+            results.append({**_shape_summary(shape), "error": str(e)})
+            continue
+        stages = _plan_stages(explain.get("queryPlanner", {}).get("winningPlan", {}))
+        collscan = "COLLSCAN" in stages
+        if collscan:
+            logger.warning(
+                f"COLLSCAN for {shape['route']} on {shape['collection']}: {shape['filter']}"
+            )
+        results.append({**_shape_summary(shape), "stages": stages, "collscan": collscan})
+    return results
+
+
+def _shape_summary(shape: dict) -> dict:
+    return {
+        "collection": shape["collection"],
+        "route": shape["route"],
+        "filter": shape["filter"],
+        "sort": shape.get("sort"),
+    }
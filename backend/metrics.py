@@ -0,0 +1,220 @@
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Tuple
+import threading
+import time
+
+# =============================================================================
+# Lightweight Prometheus-Style Metrics
+# =============================================================================
+#
+# A tiny in-process registry rendered in the Prometheus text exposition
+# format. Updates are plain dict/list operations (no label validation) under
+# a per-metric lock: some metrics are updated from driver threads (MongoDB
+# command listeners) while /metrics renders on the event loop. Uncontended
+# locks cost well under a microsecond, so instrumentation stays cheap enough
+# to leave enabled in production. Each worker process exposes its own values.
+
+# Request latency buckets in seconds
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+LabelValues = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Tuple[str, ...], values: LabelValues, extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    def __init__(self, name: str, help_text: str, label_names: Tuple[str, ...] = ()):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self.values: Dict[LabelValues, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, labels: LabelValues = (), amount: float = 1) -> None:
+        with self._lock:
+            self.values[labels] = self.values.get(labels, 0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            items = sorted(self.values.items())
+        for labels, value in items:
+            lines.append(f"{self.name}{_labels(self.label_names, labels)} {_format(value)}")
+        return lines
+
+
+class Gauge(Counter):
+    def dec(self, labels: LabelValues = (), amount: float = 1) -> None:
+        with self._lock:
+            self.values[labels] = self.values.get(labels, 0) - amount
+
+    def set(self, labels: LabelValues, value: float) -> None:
+        with self._lock:
+            self.values[labels] = value
+
+    def render(self) -> List[str]:
+        lines = super().render()
+        lines[1] = f"# TYPE {self.name} gauge"
+        return lines
+
+
+class Histogram:
+    def __init__(
+        self,
+        name: str,
+        help_text: str,
+        label_names: Tuple[str, ...] = (),
+        buckets: Tuple[float, ...] = LATENCY_BUCKETS
+    ):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self.buckets = buckets
+        # labels -> [per-bucket counts..., +Inf count, sum]
+        self.values: Dict[LabelValues, List[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, labels: LabelValues, value: float) -> None:
+        with self._lock:
+            series = self.values.get(labels)
+            if series is None:
+                series = self.values[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[bisect_left(self.buckets, value)] += 1
+            series[-1] += value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            # Copy each series so a concurrent observe cannot tear a row
+            items = [(labels, list(series)) for labels, series in sorted(self.values.items())]
+        for labels, series in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), series[:-1]):
+                cumulative += count
+                le = 'le="' + _format(bound) + '"'
+                lines.append(f"{self.name}_bucket{_labels(self.label_names, labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.label_names, labels)} {_format(series[-1])}")
+            lines.append(f"{self.name}_count{_labels(self.label_names, labels)} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self.metrics: List = []
+        # Callables returning extra exposition lines (e.g. cache counters)
+        self.collectors: List[Callable[[], Iterable[str]]] = []
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def add_collector(self, collector: Callable[[], Iterable[str]]) -> None:
+        self.collectors.append(collector)
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self.metrics:
+            lines.extend(metric.render())
+        for collector in self.collectors:
+            lines.extend(collector())
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+REQUEST_LATENCY = registry.register(Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route template",
+    ("method", "route"),
+))
+REQUESTS_TOTAL = registry.register(Counter(
+    "http_requests_total",
+    "HTTP requests by route template and status code",
+    ("method", "route", "status"),
+))
+REQUESTS_IN_FLIGHT = registry.register(Gauge(
+    "http_requests_in_flight",
+    "HTTP requests currently being served",
+    ("method",),
+))
+
+UNMATCHED_ROUTE = "<unmatched>"
+
+
+def stats_collector(prefix: str, source: Callable[[], Dict[str, dict]], fields: Tuple[str, ...]):
+    """
+    Expose numeric fields of `stats()`-style dicts as gauges.
+
+    `source` returns {name: stats_dict}; each field becomes
+    `<prefix>_<field>{name="..."}`.
+    """
+    def collect() -> List[str]:
+        snapshot = source()
+        lines = []
+        for field in fields:
+            metric = f"{prefix}_{field}"
+            lines.append(f"# TYPE {metric} gauge")
+            for name, stats in sorted(snapshot.items()):
+                value = stats.get(field)
+                if isinstance(value, (int, float)) and not isinstance(value, bool):
+                    lines.append(f'{metric}{{name="{_escape(name)}"}} {_format(value)}')
+        return lines
+    return collect
+
+
+# =============================================================================
+# ASGI Middleware
+# =============================================================================
+
+class MetricsMiddleware:
+    """
+    Record latency, status codes and in-flight requests per route template.
+
+    A plain ASGI middleware (not BaseHTTPMiddleware) so it adds no extra task
+    or body buffering. Routes are labelled by their template
+    (`/api/products/{product_id}`), never the raw path, to bound cardinality.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        REQUESTS_IN_FLIGHT.inc((method,))
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            duration = time.perf_counter() - start
+            REQUESTS_IN_FLIGHT.dec((method,))
+            route = scope.get("route")
+            template = getattr(route, "path", UNMATCHED_ROUTE)
+            REQUEST_LATENCY.observe((method, template), duration)
+            REQUESTS_TOTAL.inc((method, template, str(status_code)))
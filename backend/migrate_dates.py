@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Migrate `created_at` from ISO-8601 strings to native BSON dates.
+
+Older versions stored `created_at` as `datetime.isoformat()` strings. The API
+now writes and reads native dates, which sort and range-filter correctly and
+need no per-row parsing. Documents are converted in batches with unordered
+bulk writes; the script is idempotent and safe to re-run.
+
+Usage: python migrate_dates.py [--batch-size 1000] [--dry-run]
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent))
+
+from dotenv import load_dotenv
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import UpdateOne
+
+# Load environment variables
+ROOT_DIR = Path(__file__).parent
+load_dotenv(ROOT_DIR / '.env')
+
+from rollups import rebuild_dashboard_stats
+
+COLLECTIONS = ["products", "orders", "users", "admins"]
+
+
+def parse_created_at(value: str) -> datetime:
+    """Parse a stored ISO string; naive values were always written as UTC."""
+    parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed
+
+
+async def migrate_collection(db, name: str, batch_size: int, dry_run: bool) -> dict:
+    """Convert every string `created_at` in one collection."""
+    collection = db[name]
+    converted = 0
+    failed = []
+    string_filter = {"created_at": {"$type": "string"}}
+
+    if dry_run:
+        pending = await collection.count_documents(string_filter)
+        return {"pending": pending, "converted": 0, "failed": []}
+
+    while True:
+        # Converted docs drop out of the filter, so always read the first batch
+        # (skipping ones that failed to parse)
+        query = dict(string_filter)
+        if failed:
+            query["_id"] = {"$nin": [f["_id"] for f in failed]}
+        batch = await collection.find(query, {"_id": 1, "created_at": 1}).limit(batch_size).to_list(batch_size)
+        if not batch:
+            break
+
+        operations = []
+        for doc in batch:
+            try:
+                created_at = parse_created_at(doc["created_at"])
+            except ValueError:
+                failed.append({"_id": doc["_id"], "created_at": doc["created_at"]})
+                continue
+            operations.append(UpdateOne(
+                {"_id": doc["_id"], "created_at": doc["created_at"]},
+                {"$set": {"created_at": created_at}}
+            ))
+
+        if operations:
+            result = await collection.bulk_write(operations, ordered=False)
+            converted += result.modified_count
+        print(f"  {name}: {converted} converted so far")
+
+    return {"pending": 0, "converted": converted, "failed": failed}
+
+
+async def migrate_dates(batch_size: int, dry_run: bool):
+    mongo_url = os.environ.get('MONGO_URL')
+    db_name = os.environ.get('DB_NAME')
+
+    if not mongo_url or not db_name:
+        print("Error: MONGO_URL or DB_NAME not set in environment")
+        return False
+
+    client = AsyncIOMotorClient(mongo_url, tz_aware=True)
+    db = client[db_name]
+
+    try:
+        ok = True
+        for name in COLLECTIONS:
+            result = await migrate_collection(db, name, batch_size, dry_run)
+            if dry_run:
+                print(f"{name}: {result['pending']} documents need conversion")
+                continue
+            print(f"{name}: converted {result['converted']} documents")
+            for failure in result["failed"]:
+                ok = False
+                print(f"  Could not parse created_at {failure['created_at']!r} (_id={failure['_id']})")
+
+        if not dry_run:
+            # The dashboard rollup embeds recent orders; refresh their dates
+            await rebuild_dashboard_stats(db)
+            print("Dashboard stats rebuilt")
+        return ok
+    except Exception as e:
+        print(f"Error migrating dates: {e}")
+        return False
+    finally:
+        client.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--dry-run", action="store_true", help="Only count documents to convert")
+    args = parser.parse_args()
+    result = asyncio.run(migrate_dates(args.batch_size, args.dry_run))
+    sys.exit(0 if result else 1)
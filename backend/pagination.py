@@ -0,0 +1,92 @@
+from datetime import datetime
+from typing import Any, Dict, List, Tuple
+import base64
+import binascii
+import json
+
+# =============================================================================
+# Keyset (Cursor) Pagination Utilities
+# =============================================================================
+
+# Supported catalog sort orders: name -> (field, direction).
+# Every sort is tie-broken on the unique `id` field so the seek is total.
+PRODUCT_SORTS: Dict[str, Tuple[str, int]] = {
+    "newest": ("created_at", -1),
+    "price_asc": ("price", 1),
+    "price_desc": ("price", -1),
+}
+
+
+# Cursor fields and the JSON types they may hold. Values end up inside Mongo
+# filters, so anything else (objects, arrays) is rejected as tampering.
+CURSOR_FIELDS: Dict[str, Tuple[type, ...]] = {
+    "s": (str,),
+    "id": (str,),
+    "v": (str, int, float, bool, type(None), datetime),
+}
+
+
+class InvalidCursorError(ValueError):
+    """Raised when a client supplies a malformed or tampered cursor."""
+
+
+def _encode_value(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return {"$date": value.isoformat()}
+    return value
+
+
+def _decode_value(value: Any) -> Any:
+    if isinstance(value, dict) and list(value) == ["$date"]:
+        # Raises TypeError/ValueError for anything but an ISO string
+        return datetime.fromisoformat(value["$date"])
+    return value
+
+
+def encode_cursor(**fields: Any) -> str:
+    """Encode cursor fields as an opaque, URL-safe token."""
+    payload = {key: _encode_value(value) for key, value in fields.items()}
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Dict[str, Any]:
+    """
+    Decode a token produced by `encode_cursor`.
+
+    Raises InvalidCursorError unless every field is a known cursor field of
+    an allowed type.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if not isinstance(payload, dict):
+            raise InvalidCursorError("Invalid cursor")
+        fields = {key: _decode_value(value) for key, value in payload.items()}
+    except (binascii.Error, ValueError, TypeError, UnicodeDecodeError):
+        raise InvalidCursorError("Invalid cursor")
+    for key, value in fields.items():
+        if key not in CURSOR_FIELDS or not isinstance(value, CURSOR_FIELDS[key]):
+            raise InvalidCursorError("Invalid cursor")
+    return fields
+
+
+def seek_filter(field: str, direction: int, value: Any, last_id: str) -> dict:
+    """
+    Build the filter that resumes strictly after (value, last_id).
+
+    Equivalent to `(field, id) > (value, last_id)` in the given direction,
+    which MongoDB answers with an index seek on a `(field, id)` index.
+    """
+    op = "$gt" if direction > 0 else "$lt"
+    return {
+        "$or": [
+            {field: {op: value}},
+            {field: value, "id": {op: last_id}},
+        ]
+    }
+
+
+def sort_spec(field: str, direction: int) -> List[Tuple[str, int]]:
+    """Sort specification matching `seek_filter`."""
+    return [(field, direction), ("id", direction)]
@@ -0,0 +1,187 @@
+from datetime import datetime, timezone
+from typing import Awaitable, Callable, Iterable, Iterator, List, Optional, Tuple, Type
+import asyncio
+import csv
+import json
+import time
+import uuid
+
+from pydantic import BaseModel, ValidationError
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+
+# =============================================================================
+# Bulk Product Import
+# =============================================================================
+#
+# Rows are parsed and validated one at a time from the uploaded file and
+# upserted by `design_no` in unordered `bulk_write` chunks, so a 20k-SKU
+# supplier catalog costs a few dozen round trips instead of 20k inserts.
+# Reading and validating each chunk runs in a worker thread so the event
+# loop keeps serving requests during large imports.
+
+IMPORT_CHUNK_SIZE = 1000
+MAX_REPORTED_ERRORS = 1000
+# CSV has no list type: images are separated by "|"
+CSV_IMAGE_SEPARATOR = "|"
+
+
+def iter_jsonl_rows(lines: Iterable[str]) -> Iterator[Tuple[int, Optional[dict], Optional[str]]]:
+    """Yield (row number, parsed row or None, parse error or None)."""
+    for row_number, line in enumerate(lines, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as e:
+            yield row_number, None, f"Invalid JSON: {e}"
+            continue
+        if not isinstance(row, dict):
+            yield row_number, None, "Each line must be a JSON object"
+            continue
+        yield row_number, row, None
+
+
+def iter_csv_rows(lines: Iterable[str]) -> Iterator[Tuple[int, Optional[dict], Optional[str]]]:
+    """Yield (row number, parsed row, None); row 1 is the header."""
+    reader = csv.DictReader(lines)
+    for row_number, row in enumerate(reader, start=2):
+        images = row.get("images")
+        row = {k.strip(): v.strip() for k, v in row.items() if k and v is not None and v.strip() != ""}
+        if images is not None:
+            row["images"] = [url.strip() for url in images.split(CSV_IMAGE_SEPARATOR) if url.strip()]
+        if "in_stock" in row:
+            row["in_stock"] = row["in_stock"].lower() in ("1", "true", "yes", "y")
+        yield row_number, row, None
+
+
+def upsert_operation(product: BaseModel, now: datetime) -> UpdateOne:
+    """Upsert by design_no; id/created_at are only set for new products."""
+    fields = product.model_dump(exclude_none=True)
+    fields["image_url"] = fields["images"][0] if fields.get("images") else ""
+    set_on_insert = {"id": str(uuid.uuid4()), "created_at": now}
+    if "in_stock" not in fields:
+        set_on_insert["in_stock"] = True
+    return UpdateOne(
+        {"design_no": fields["design_no"]},
+        {"$set": fields, "$setOnInsert": set_on_insert},
+        upsert=True
+    )
+
+
+class ImportReport:
+    def __init__(self):
+        self.rows = 0
+        self.valid = 0
+        self.inserted = 0
+        self.updated = 0
+        self.unchanged = 0
+        self.error_count = 0
+        self.errors: List[dict] = []
+        self.started_at = time.perf_counter()
+
+    def add_error(self, row_number: int, design_no: Optional[str], errors: List[str]) -> None:
+        self.error_count += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"row": row_number, "design_no": design_no, "errors": errors})
+
+    def as_dict(self) -> dict:
+        elapsed = time.perf_counter() - self.started_at
+        return {
+            "rows": self.rows,
+            "valid": self.valid,
+            "inserted": self.inserted,
+            "updated": self.updated,
+            "unchanged": self.unchanged,
+            "failed": self.error_count,
+            "errors": self.errors,
+            "errors_truncated": self.error_count > len(self.errors),
+            "elapsed_seconds": round(elapsed, 3),
+            "rows_per_second": round(self.rows / elapsed, 1) if elapsed > 0 else None,
+        }
+
+
+def _validation_messages(error: ValidationError) -> List[str]:
+    return [
+        f"{'.'.join(str(p) for p in e['loc']) or 'row'}: {e['msg']}"
+        for e in error.errors()
+    ]
+
+
+async def _flush(collection, chunk: List[Tuple[int, str, UpdateOne]], report: ImportReport) -> List[str]:
+    """Write one chunk; returns the design numbers that were written."""
+    operations = [op for _, _, op in chunk]
+    failed = set()
+    try:
+        result = await collection.bulk_write(operations, ordered=False)
+        details = result.bulk_api_result
+    except BulkWriteError as e:
+        details = e.details
+        for write_error in details.get("writeErrors", []):
+            failed.add(write_error["index"])
+            row_number, design_no, _ = chunk[write_error["index"]]
+            report.add_error(row_number, design_no, [write_error.get("errmsg", "Write failed")])
+    inserted = details.get("nUpserted", 0)
+    matched = details.get("nMatched", 0)
+    modified = details.get("nModified", 0)
+    report.inserted += inserted
+    report.updated += modified
+    report.unchanged += matched - modified
+    return [design_no for i, (_, design_no, _) in enumerate(chunk) if i not in failed]
+
+
+def _read_chunk(
+    rows: Iterator[Tuple[int, Optional[dict], Optional[str]]],
+    row_model: Type[BaseModel],
+    report: ImportReport,
+    now: datetime,
+    chunk_size: int
+) -> List[Tuple[int, str, UpdateOne]]:
+    """Parse and validate rows until a chunk is full or the file ends (blocking)."""
+    chunk: List[Tuple[int, str, UpdateOne]] = []
+    for row_number, row, parse_error in rows:
+        report.rows += 1
+        if parse_error:
+            report.add_error(row_number, None, [parse_error])
+            continue
+        try:
+            product = row_model.model_validate(row)
+        except ValidationError as e:
+            report.add_error(row_number, row.get("design_no"), _validation_messages(e))
+            continue
+        report.valid += 1
+        chunk.append((row_number, product.design_no, upsert_operation(product, now)))
+        if len(chunk) >= chunk_size:
+            break
+    return chunk
+
+
+async def import_products(
+    collection,
+    rows: Iterator[Tuple[int, Optional[dict], Optional[str]]],
+    row_model: Type[BaseModel],
+    chunk_size: int = IMPORT_CHUNK_SIZE,
+    on_written: Optional[Callable[[List[str]], Awaitable[None]]] = None
+) -> dict:
+    """
+    Validate rows with `row_model` and upsert them in chunks.
+
+    `rows` may block (file reads); it is only consumed in a worker thread.
+    `on_written` is awaited with the design numbers of each written chunk,
+    e.g. to update the search index incrementally.
+
+    Returns a report with insert/update counts, per-row errors and throughput.
+    """
+    report = ImportReport()
+    now = datetime.now(timezone.utc)
+    while True:
+        chunk = await asyncio.to_thread(_read_chunk, rows, row_model, report, now, chunk_size)
+        if not chunk:
+            break
+        written = await _flush(collection, chunk, report)
+        if on_written is not None and written:
+            await on_written(written)
+        if len(chunk) < chunk_size:
+            break
+    return report.as_dict()
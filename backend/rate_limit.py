@@ -0,0 +1,215 @@
+from collections import OrderedDict
+from typing import Dict, Hashable, Optional, Tuple
+import math
+import os
+import time
+
+from fastapi import HTTPException, Request, status
+
+# =============================================================================
+# Rate Limiting & Admission Control
+# =============================================================================
+#
+# Expensive unauthenticated routes (login, signup, checkout) are guarded by:
+#   - token buckets per client IP and per account, and
+#   - a concurrency cap per route class, so a burst can never occupy more than
+#     a fixed number of in-flight requests (and bcrypt threads).
+# Requests over a limit are rejected immediately with 429 and Retry-After
+# instead of queueing until they time out. State is per worker process and is
+# only touched from the event loop, so no locking is needed.
+
+RATE_LIMIT_ENABLED = os.environ.get("RATE_LIMIT_ENABLED", "true").lower() in ("1", "true", "yes")
+# Use the proxy-appended X-Forwarded-For entry as the client IP (behind nginx)
+RATE_LIMIT_TRUST_PROXY = os.environ.get("RATE_LIMIT_TRUST_PROXY", "false").lower() in ("1", "true", "yes")
+# Number of trusted proxies that append to X-Forwarded-For (nginx alone: 1,
+# CDN -> nginx: 2). Entries left of them are client-controlled.
+RATE_LIMIT_PROXY_HOPS = max(1, int(os.environ.get("RATE_LIMIT_PROXY_HOPS", "1")))
+# Idle buckets beyond this are dropped oldest-first (bounds memory under IP floods)
+MAX_TRACKED_KEYS = 100_000
+
+PERIODS = {"second": 1, "minute": 60, "hour": 3600}
+
+
+def parse_rate(spec: str) -> Tuple[int, float]:
+    """Parse "<count>/<second|minute|hour>" into (count, period seconds)."""
+    try:
+        count, period = spec.strip().split("/")
+        return int(count), PERIODS[period.strip()]
+    except (KeyError, ValueError):
+        raise ValueError(f"Invalid rate {spec!r}; expected e.g. '10/minute'")
+
+
+class TokenBucketLimiter:
+    """
+    Token buckets keyed by client (IP, account, ...).
+
+    Each key may burst up to `capacity` requests, refilled continuously at
+    `capacity / period` per second.
+    """
+
+    def __init__(self, name: str, rate: str, max_keys: int = MAX_TRACKED_KEYS):
+        self.name = name
+        self.rate = rate
+        self.capacity, period = parse_rate(rate)
+        self.refill_per_second = self.capacity / period
+        self.max_keys = max_keys
+        # key -> (tokens, last update monotonic time), least recently used first
+        self._buckets: "OrderedDict[Hashable, Tuple[float, float]]" = OrderedDict()
+        self.allowed = 0
+        self.limited = 0
+
+    def hit(self, key: Hashable, cost: float = 1.0) -> float:
+        """Take `cost` tokens; returns 0 if allowed, else seconds until allowed."""
+        now = time.monotonic()
+        bucket = self._buckets.pop(key, None)
+        if bucket is None:
+            tokens = float(self.capacity)
+        else:
+            tokens = min(self.capacity, bucket[0] + (now - bucket[1]) * self.refill_per_second)
+        if tokens >= cost:
+            tokens -= cost
+            wait = 0.0
+            self.allowed += 1
+        else:
+            wait = (cost - tokens) / self.refill_per_second
+            self.limited += 1
+        self._buckets[key] = (tokens, now)
+        if len(self._buckets) > self.max_keys:
+            self._buckets.popitem(last=False)
+        return wait
+
+    def stats(self) -> dict:
+        return {
+            "rate": self.rate,
+            "allowed": self.allowed,
+            "limited": self.limited,
+            "tracked_keys": len(self._buckets),
+        }
+
+
+class ConcurrencyLimiter:
+    """Cap in-flight requests for a route class; excess is shed, not queued."""
+
+    def __init__(self, name: str, limit: int):
+        self.name = name
+        self.limit = limit
+        self.active = 0
+        self.peak = 0
+        self.shed = 0
+
+    def try_acquire(self) -> bool:
+        if self.active >= self.limit:
+            self.shed += 1
+            return False
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        return True
+
+    def release(self) -> None:
+        self.active -= 1
+
+    def stats(self) -> dict:
+        return {"limit": self.limit, "active": self.active, "peak": self.peak, "shed": self.shed}
+
+
+# =============================================================================
+# Configured Limits
+# =============================================================================
+
+login_ip_limiter = TokenBucketLimiter(
+    "login_per_ip", os.environ.get("RATE_LIMIT_LOGIN_PER_IP", "20/minute")
+)
+login_account_limiter = TokenBucketLimiter(
+    "login_per_account", os.environ.get("RATE_LIMIT_LOGIN_PER_ACCOUNT", "10/minute")
+)
+signup_ip_limiter = TokenBucketLimiter(
+    "signup_per_ip", os.environ.get("RATE_LIMIT_SIGNUP_PER_IP", "5/minute")
+)
+checkout_ip_limiter = TokenBucketLimiter(
+    "checkout_per_ip", os.environ.get("RATE_LIMIT_CHECKOUT_PER_IP", "30/minute")
+)
+checkout_account_limiter = TokenBucketLimiter(
+    "checkout_per_account", os.environ.get("RATE_LIMIT_CHECKOUT_PER_ACCOUNT", "10/minute")
+)
+
+# Route classes: "auth" (bcrypt-bound login/signup) and "checkout"
+CONCURRENCY_LIMITERS: Dict[str, ConcurrencyLimiter] = {
+    "auth": ConcurrencyLimiter("auth", int(os.environ.get("CONCURRENCY_LIMIT_AUTH", "16"))),
+    "checkout": ConcurrencyLimiter("checkout", int(os.environ.get("CONCURRENCY_LIMIT_CHECKOUT", "32"))),
+}
+
+TOKEN_BUCKETS = [
+    login_ip_limiter,
+    login_account_limiter,
+    signup_ip_limiter,
+    checkout_ip_limiter,
+    checkout_account_limiter,
+]
+
+
+def rate_limit_stats() -> dict:
+    return {
+        "enabled": RATE_LIMIT_ENABLED,
+        "buckets": {limiter.name: limiter.stats() for limiter in TOKEN_BUCKETS},
+        "concurrency": {name: limiter.stats() for name, limiter in CONCURRENCY_LIMITERS.items()},
+    }
+
+# =============================================================================
+# FastAPI Integration
+# =============================================================================
+
+def too_many_requests(retry_after: float, detail: str = "Too many requests, please retry later") -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        detail=detail,
+        headers={"Retry-After": str(max(1, math.ceil(retry_after)))}
+    )
+
+
+def client_ip(request: Request) -> str:
+    if RATE_LIMIT_TRUST_PROXY:
+        # Every trusted proxy appends the address it received the request
+        # from, so the entry RATE_LIMIT_PROXY_HOPS from the right is the
+        # client as seen by the outermost one; anything further left may be
+        # forged. Joined repeated headers are split the same way.
+        entries = [
+            entry.strip()
+            for header in request.headers.getlist("x-forwarded-for")
+            for entry in header.split(",")
+            if entry.strip()
+        ]
+        if len(entries) >= RATE_LIMIT_PROXY_HOPS:
+            return entries[-RATE_LIMIT_PROXY_HOPS]
+    return request.client.host if request.client else "unknown"
+
+
+def enforce_rate_limit(limiter: TokenBucketLimiter, key: Hashable) -> None:
+    """Raise 429 if `key` has exhausted its bucket."""
+    if not RATE_LIMIT_ENABLED:
+        return
+    wait = limiter.hit(key)
+    if wait:
+        raise too_many_requests(wait)
+
+
+def admission(route_class: str, ip_limiter: Optional[TokenBucketLimiter] = None):
+    """
+    Build a route dependency enforcing the per-IP bucket, then holding one
+    concurrency slot of `route_class` for the lifetime of the request.
+    """
+    concurrency = CONCURRENCY_LIMITERS[route_class]
+
+    async def dependency(request: Request):
+        if not RATE_LIMIT_ENABLED:
+            yield
+            return
+        if ip_limiter is not None:
+            enforce_rate_limit(ip_limiter, client_ip(request))
+        if not concurrency.try_acquire():
+            raise too_many_requests(1, "Server busy, please retry shortly")
+        try:
+            yield
+        finally:
+            concurrency.release()
+
+    return dependency
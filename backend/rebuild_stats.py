@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Rebuild the admin dashboard rollup document from the orders and products
+collections. Run this after bulk data changes made outside the API, or if
+the counters are ever suspected to have drifted.
+
+Usage: python rebuild_stats.py
+"""
+
+import asyncio
+import os
+import sys
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent))
+
+from dotenv import load_dotenv
+from motor.motor_asyncio import AsyncIOMotorClient
+
+# Load environment variables
+ROOT_DIR = Path(__file__).parent
+load_dotenv(ROOT_DIR / '.env')
+
+from db_config import client_options
+from rollups import rebuild_dashboard_stats
+
+
+async def rebuild_stats():
+    """Recompute the dashboard rollup document."""
+
+    mongo_url = os.environ.get('MONGO_URL')
+    db_name = os.environ.get('DB_NAME')
+
+    if not mongo_url or not db_name:
+        print("Error: MONGO_URL or DB_NAME not set in environment")
+        return False
+
+    # Same client settings as server.py: dates are read back as aware UTC,
+    # matching what the live rollup updates store
+    client = AsyncIOMotorClient(mongo_url, tz_aware=True, **client_options())
+    db = client[db_name]
+
+    try:
+        stats = await rebuild_dashboard_stats(db)
+        print("Dashboard stats rebuilt:")
+        print(f"  Products: {stats['total_products']}")
+        print(f"  Orders:   {stats['total_orders']}")
+        print(f"  Revenue:  {stats['total_revenue']:.2f}")
+        for status, count in stats["orders_by_status"].items():
+            print(f"    {status}: {count}")
+        return True
+    except Exception as e:
+        print(f"Error rebuilding stats: {e}")
+        return False
+    finally:
+        client.close()
+
+if __name__ == "__main__":
+    result = asyncio.run(rebuild_stats())
+    sys.exit(0 if result else 1)
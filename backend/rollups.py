@@ -0,0 +1,169 @@
+from datetime import datetime, timezone
+from typing import Dict, Optional
+
+# =============================================================================
+# Dashboard Rollups
+# =============================================================================
+#
+# A single document in the `stats` collection holds the admin dashboard
+# counters. Write paths keep it current with atomic `$inc` updates, so
+# `/api/admin/stats` is one `_id` lookup instead of several collection-wide
+# counts and a `$group` over every order.
+#
+# Incremental updates never upsert: if the document is missing, the next
+# read rebuilds it from the collections instead of starting from zero.
+
+STATS_COLLECTION = "stats"
+DASHBOARD_ID = "dashboard"
+ORDER_STATUSES = ["pending", "confirmed", "shipped", "delivered", "cancelled"]
+# Allowed forward moves for bulk fulfilment updates
+ORDER_STATUS_TRANSITIONS = {
+    "pending": {"confirmed", "shipped", "cancelled"},
+    "confirmed": {"shipped", "cancelled"},
+    "shipped": {"delivered"},
+    "delivered": set(),
+    "cancelled": set(),
+}
+RECENT_ORDERS_LIMIT = 10
+
+
+def _stats(db):
+    return db[STATS_COLLECTION]
+
+
+async def record_order_created(db, order_doc: dict) -> None:
+    """Count a new order and push it onto the recent orders list."""
+    status = order_doc.get("status", "pending")
+    recent = {k: v for k, v in order_doc.items() if k != "_id"}
+    await _stats(db).update_one(
+        {"_id": DASHBOARD_ID},
+        {
+            "$inc": {
+                "total_orders": 1,
+                "total_revenue": order_doc.get("total", 0.0),
+                f"orders_by_status.{status}": 1,
+            },
+            "$push": {
+                "recent_orders": {
+                    "$each": [recent],
+                    "$position": 0,
+                    "$slice": RECENT_ORDERS_LIMIT,
+                }
+            },
+            "$set": {"updated_at": datetime.now(timezone.utc)},
+        },
+    )
+
+
+async def record_order_status_change(
+    db, order_id: str, old_status: Optional[str], new_status: str
+) -> None:
+    """Move one order between status counters."""
+    if old_status == new_status:
+        return
+    inc = {f"orders_by_status.{new_status}": 1}
+    if old_status:
+        inc[f"orders_by_status.{old_status}"] = -1
+    await _stats(db).update_one(
+        {"_id": DASHBOARD_ID},
+        {
+            "$inc": inc,
+            "$set": {
+                "recent_orders.$[o].status": new_status,
+                "updated_at": datetime.now(timezone.utc),
+            },
+        },
+        array_filters=[{"o.id": order_id}],
+    )
+
+
+async def record_bulk_status_change(db, moved: Dict[str, int], new_status: str) -> None:
+    """
+    Apply a bulk status update: `moved` maps previous status -> order count.
+
+    The recent orders list is re-read (one indexed query) because a bulk
+    update cannot cheaply tell which of those orders it touched.
+    """
+    inc: Dict[str, int] = {}
+    for old_status, count in moved.items():
+        if not count or old_status == new_status:
+            continue
+        inc[f"orders_by_status.{old_status}"] = inc.get(f"orders_by_status.{old_status}", 0) - count
+        inc[f"orders_by_status.{new_status}"] = inc.get(f"orders_by_status.{new_status}", 0) + count
+    if not inc:
+        return
+    recent_orders = await db.orders.find({}, {"_id": 0}).sort(
+        "created_at", -1
+    ).limit(RECENT_ORDERS_LIMIT).to_list(RECENT_ORDERS_LIMIT)
+    await _stats(db).update_one(
+        {"_id": DASHBOARD_ID},
+        {
+            "$inc": inc,
+            "$set": {
+                "recent_orders": recent_orders,
+                "updated_at": datetime.now(timezone.utc),
+            },
+        },
+    )
+
+
+async def record_product_count_change(db, delta: int) -> None:
+    """Adjust the product counter after a create (+n) or delete (-n)."""
+    if not delta:
+        return
+    await _stats(db).update_one(
+        {"_id": DASHBOARD_ID},
+        {
+            "$inc": {"total_products": delta},
+            "$set": {"updated_at": datetime.now(timezone.utc)},
+        },
+    )
+
+
+async def rebuild_dashboard_stats(db) -> dict:
+    """
+    Recompute the rollup document from scratch.
+
+    Used by `rebuild_stats.py` and as a fallback when the document is missing.
+    """
+    total_products = await db.products.count_documents({})
+
+    by_status_rows = await db.orders.aggregate([
+        {"$group": {
+            "_id": "$status",
+            "count": {"$sum": 1},
+            "revenue": {"$sum": "$total"},
+        }}
+    ]).to_list(None)
+    orders_by_status = {status: 0 for status in ORDER_STATUSES}
+    total_orders = 0
+    total_revenue = 0.0
+    for row in by_status_rows:
+        if row["_id"] is not None:
+            orders_by_status[row["_id"]] = row["count"]
+        total_orders += row["count"]
+        total_revenue += row["revenue"] or 0.0
+
+    recent_orders = await db.orders.find({}, {"_id": 0}).sort(
+        "created_at", -1
+    ).limit(RECENT_ORDERS_LIMIT).to_list(RECENT_ORDERS_LIMIT)
+
+    doc = {
+        "_id": DASHBOARD_ID,
+        "total_products": total_products,
+        "total_orders": total_orders,
+        "total_revenue": total_revenue,
+        "orders_by_status": orders_by_status,
+        "recent_orders": recent_orders,
+        "updated_at": datetime.now(timezone.utc),
+    }
+    await _stats(db).replace_one({"_id": DASHBOARD_ID}, doc, upsert=True)
+    return doc
+
+
+async def get_dashboard_stats(db) -> dict:
+    """Read the rollup document, rebuilding it if it does not exist yet."""
+    doc = await _stats(db).find_one({"_id": DASHBOARD_ID})
+    if doc is None:
+        doc = await rebuild_dashboard_stats(db)
+    return doc
@@ -0,0 +1,273 @@
+from bisect import bisect_left, insort
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional, Set
+import math
+import re
+import threading
+import unicodedata
+
+# =============================================================================
+# In-Process Product Search Index
+# =============================================================================
+
+# Field weights used for relevance ranking
+SEARCH_FIELDS: Dict[str, float] = {
+    "name": 3.0,
+    "design_no": 3.0,
+    "material": 2.0,
+    "color": 2.0,
+    "description": 1.0,
+}
+
+# Attributes kept alongside each document so filters and sorting can be
+# applied without a database round trip
+FILTER_FIELDS = ("category", "material", "color", "price", "created_at")
+
+# Matches on a prefix of a token count for less than exact matches
+PREFIX_WEIGHT = 0.5
+# Upper bound on vocabulary tokens a single prefix term may expand to
+MAX_PREFIX_EXPANSIONS = 64
+MIN_PREFIX_LENGTH = 2
+
+_ASCII_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def _unicode_tokens(text: str) -> List[str]:
+    # NFKD splits accents off their letters ("crêpe" -> "cre" + U+0302) and
+    # folds compatibility forms (full-width digits). Nonspacing marks are
+    # dropped so "crepe" finds "crêpe"; spacing marks such as Devanagari
+    # vowel signs stay inside the token, where `\w` would split on them.
+    tokens, current = [], []
+    for ch in unicodedata.normalize("NFKD", text.casefold()):
+        category = unicodedata.category(ch)
+        if category == "Mn":
+            continue
+        if category[0] in "LN" or category in ("Mc", "Me"):
+            current.append(ch)
+        elif current:
+            tokens.append("".join(current))
+            current = []
+    if current:
+        tokens.append("".join(current))
+    return tokens
+
+
+def tokenize(text: str) -> List[str]:
+    """Casefold and split text into letter/digit tokens (any script)."""
+    if not text:
+        return []
+    if text.isascii():
+        # Fast path for the common case; same result as the Unicode path
+        return _ASCII_TOKEN_RE.findall(text.lower())
+    return _unicode_tokens(text)
+
+
+def _design_no_tokens(design_no: str) -> List[str]:
+    # "D.NO.1490" -> ["d", "no", "1490", "dno1490"] so both the number
+    # and the compact design code are searchable
+    tokens = tokenize(design_no)
+    if len(tokens) > 1:
+        tokens.append("".join(tokens))
+    return tokens
+
+
+class SearchIndex:
+    """
+    Tokenized inverted index over the product catalog.
+
+    Posting lists map each token to the weighted term frequency per product.
+    A sorted vocabulary supports prefix matching with a binary search, so
+    lookup cost depends on the number of matches rather than catalog size.
+    Documents are updated incrementally on product writes.
+    """
+
+    def __init__(self):
+        self._postings: Dict[str, Dict[str, float]] = defaultdict(dict)
+        self._vocabulary: List[str] = []
+        self._doc_tokens: Dict[str, Set[str]] = {}
+        self._doc_attrs: Dict[str, dict] = {}
+        self._lock = threading.RLock()
+        self.ready = False
+
+    def __len__(self) -> int:
+        return len(self._doc_tokens)
+
+    # -------------------------------------------------------------------------
+    # Index maintenance
+    # -------------------------------------------------------------------------
+
+    def rebuild(self, products: Iterable[dict]) -> None:
+        """Replace the index contents with the given product documents."""
+        with self._lock:
+            self._postings = defaultdict(dict)
+            self._vocabulary = []
+            self._doc_tokens = {}
+            self._doc_attrs = {}
+            for product in products:
+                self._add(product, bulk=True)
+            self._vocabulary = sorted(self._postings)
+            self.ready = True
+
+    def upsert(self, product: dict) -> None:
+        """Index a new product or re-index an updated one."""
+        with self._lock:
+            self._remove(product["id"])
+            self._add(product)
+
+    def remove(self, product_id: str) -> None:
+        with self._lock:
+            self._remove(product_id)
+
+    def _add(self, product: dict, bulk: bool = False) -> None:
+        product_id = product["id"]
+        weights: Dict[str, float] = defaultdict(float)
+        for field, weight in SEARCH_FIELDS.items():
+            value = product.get(field) or ""
+            tokens = _design_no_tokens(value) if field == "design_no" else tokenize(value)
+            for token in tokens:
+                weights[token] += weight
+        for token, weight in weights.items():
+            postings = self._postings[token]
+            if not postings and not bulk:
+                insort(self._vocabulary, token)
+            postings[product_id] = weight
+        self._doc_tokens[product_id] = set(weights)
+        self._doc_attrs[product_id] = {field: product.get(field) for field in FILTER_FIELDS}
+
+    def _remove(self, product_id: str) -> None:
+        tokens = self._doc_tokens.pop(product_id, None)
+        self._doc_attrs.pop(product_id, None)
+        if not tokens:
+            return
+        for token in tokens:
+            postings = self._postings.get(token)
+            if postings is None:
+                continue
+            postings.pop(product_id, None)
+            if not postings:
+                del self._postings[token]
+                i = bisect_left(self._vocabulary, token)
+                if i < len(self._vocabulary) and self._vocabulary[i] == token:
+                    del self._vocabulary[i]
+
+    # -------------------------------------------------------------------------
+    # Querying
+    # -------------------------------------------------------------------------
+
+    def _expand_prefix(self, prefix: str) -> List[str]:
+        start = bisect_left(self._vocabulary, prefix)
+        matches = []
+        for token in self._vocabulary[start:start + MAX_PREFIX_EXPANSIONS + 1]:
+            if not token.startswith(prefix):
+                break
+            if token != prefix:
+                matches.append(token)
+        return matches[:MAX_PREFIX_EXPANSIONS]
+
+    def _term_scores(self, term: str) -> Dict[str, float]:
+        """Score every product matching `term` exactly or by prefix."""
+        total_docs = max(len(self._doc_tokens), 1)
+        scores: Dict[str, float] = {}
+        candidates = [(term, 1.0)]
+        if len(term) >= MIN_PREFIX_LENGTH:
+            candidates += [(token, PREFIX_WEIGHT) for token in self._expand_prefix(term)]
+        for token, factor in candidates:
+            postings = self._postings.get(token)
+            if not postings:
+                continue
+            idf = math.log(1 + total_docs / len(postings))
+            for product_id, weight in postings.items():
+                score = weight * idf * factor
+                if score > scores.get(product_id, 0.0):
+                    scores[product_id] = score
+        return scores
+
+    def search(self, text: str, filters: Optional[dict] = None) -> List[str]:
+        """
+        Return product ids matching every term of `text`, best first.
+
+        `filters` supports exact `category`/`material`/`color` matches and
+        `min_price`/`max_price` bounds, mirroring the listing endpoint.
+        """
+        terms = list(dict.fromkeys(tokenize(text)))
+        if not terms:
+            return []
+        with self._lock:
+            # Intersect starting from the most selective term
+            term_scores = sorted((self._term_scores(t) for t in terms), key=len)
+            if not term_scores[0]:
+                return []
+            totals = dict(term_scores[0])
+            for scores in term_scores[1:]:
+                totals = {pid: s + scores[pid] for pid, s in totals.items() if pid in scores}
+                if not totals:
+                    return []
+            if filters:
+                totals = {
+                    pid: s for pid, s in totals.items()
+                    if self._matches(self._doc_attrs.get(pid, {}), filters)
+                }
+            return sorted(totals, key=lambda pid: (-totals[pid], pid))
+
+    @staticmethod
+    def _matches(attrs: dict, filters: dict) -> bool:
+        for field in ("category", "material", "color"):
+            expected = filters.get(field)
+            if expected and attrs.get(field) != expected:
+                return False
+        price = attrs.get("price")
+        min_price = filters.get("min_price")
+        max_price = filters.get("max_price")
+        if min_price is not None and (price is None or price < min_price):
+            return False
+        if max_price is not None and (price is None or price > max_price):
+            return False
+        return True
+
+    def sort_ids(self, product_ids: List[str], field: str, direction: int) -> List[str]:
+        """Reorder matched ids by a stored attribute (e.g. price)."""
+        with self._lock:
+            present, missing = [], []
+            for pid in product_ids:
+                if self._doc_attrs.get(pid, {}).get(field) is None:
+                    missing.append(pid)
+                else:
+                    present.append(pid)
+            present.sort(
+                key=lambda pid: (sort_value(self._doc_attrs[pid][field]), pid),
+                reverse=direction < 0
+            )
+            return present + missing
+
+    def stats(self) -> dict:
+        return {
+            "ready": self.ready,
+            "documents": len(self._doc_tokens),
+            "tokens": len(self._vocabulary),
+        }
+
+
+def sort_value(value) -> tuple:
+    """
+    Sort key that never raises on mixed types.
+
+    Types are ranked in MongoDB's BSON order (numbers, strings, other, booleans,
+    dates) so in-memory sorts agree with the database, e.g. for documents whose
+    `created_at` is still an unmigrated string. Naive datetimes are UTC.
+    """
+    if isinstance(value, bool):
+        return (3, value)
+    if isinstance(value, (int, float)):
+        return (0, value)
+    if isinstance(value, str):
+        return (1, value)
+    if isinstance(value, datetime):
+        return (4, value if value.tzinfo else value.replace(tzinfo=timezone.utc))
+    return (2, str(value))
+
+
+# Projection used to load documents into the index
+SEARCH_PROJECTION = {"_id": 0, "id": 1, **{f: 1 for f in SEARCH_FIELDS}, **{f: 1 for f in FILTER_FIELDS}}
+
+product_search_index = SearchIndex()
@@ -59,7 +59,7 @@ async def seed_admin():
             "hashed_password": get_password_hash(DEFAULT_ADMIN_PASSWORD),
             "full_name": DEFAULT_ADMIN_NAME,
             "is_active": True,
-            "created_at": datetime.now(timezone.utc).isoformat()
+            "created_at": datetime.now(timezone.utc)
         }
         
         await db.admins.insert_one(admin_doc)
@@ -7,11 +7,14 @@ from pathlib import Path
 import uuid
 from datetime import datetime, timezone
 
+from db_config import client_options
+from rollups import rebuild_dashboard_stats
+
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
 mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
+client = AsyncIOMotorClient(mongo_url, tz_aware=True, **client_options())
 db = client[os.environ['DB_NAME']]
 
 products_data = [
@@ -31,7 +34,7 @@ products_data = [
         "image_url": "https://images.unsplash.com/photo-1610030469983-98e550d6193c?w=600",
         "category": "festive",
         "in_stock": True,
-        "created_at": datetime.now(timezone.utc).isoformat()
+        "created_at": datetime.now(timezone.utc)
     },
     {
         "id": str(uuid.uuid4()),
@@ -49,7 +52,7 @@ products_data = [
         "image_url": "https://images.unsplash.com/photo-1617627143750-d86bc21e42bb?w=600",
         "category": "new-arrivals",
         "in_stock": True,
-        "created_at": datetime.now(timezone.utc).isoformat()
+        "created_at": datetime.now(timezone.utc)
     },
     {
         "id": str(uuid.uuid4()),
@@ -67,7 +70,7 @@ products_data = [
         "image_url": "https://images.unsplash.com/photo-1583391733956-3750e0ff4e8b?w=600",
         "category": "new-arrivals",
         "in_stock": True,
-        "created_at": datetime.now(timezone.utc).isoformat()
+        "created_at": datetime.now(timezone.utc)
     },
     {
         "id": str(uuid.uuid4()),
@@ -85,7 +88,7 @@ products_data = [
         "image_url": "https://images.unsplash.com/photo-1610030469983-98e550d6193c?w=600",
         "category": "festive",
         "in_stock": True,
-        "created_at": datetime.now(timezone.utc).isoformat()
+        "created_at": datetime.now(timezone.utc)
     },
     {
         "id": str(uuid.uuid4()),
@@ -103,7 +106,7 @@ products_data = [
         "image_url": "https://images.unsplash.com/photo-1617627143750-d86bc21e42bb?w=600",
         "category": "new-arrivals",
         "in_stock": True,
-        "created_at": datetime.now(timezone.utc).isoformat()
+        "created_at": datetime.now(timezone.utc)
     },
     {
         "id": str(uuid.uuid4()),
@@ -121,7 +124,7 @@ products_data = [
         "image_url": "https://images.unsplash.com/photo-1583391733956-3750e0ff4e8b?w=600",
         "category": "festive",
         "in_stock": True,
-        "created_at": datetime.now(timezone.utc).isoformat()
+        "created_at": datetime.now(timezone.utc)
     },
     {
         "id": str(uuid.uuid4()),
@@ -139,7 +142,7 @@ products_data = [
         "image_url": "https://images.unsplash.com/photo-1610030469983-98e550d6193c?w=600",
         "category": "silk",
         "in_stock": True,
-        "created_at": datetime.now(timezone.utc).isoformat()
+        "created_at": datetime.now(timezone.utc)
     },
     {
         "id": str(uuid.uuid4()),
@@ -157,7 +160,7 @@ products_data = [
         "image_url": "https://images.unsplash.com/photo-1617627143750-d86bc21e42bb?w=600",
         "category": "silk",
         "in_stock": True,
-        "created_at": datetime.now(timezone.utc).isoformat()
+        "created_at": datetime.now(timezone.utc)
     },
     {
         "id": str(uuid.uuid4()),
@@ -175,7 +178,7 @@ products_data = [
         "image_url": "https://images.unsplash.com/photo-1583391733956-3750e0ff4e8b?w=600",
         "category": "new-arrivals",
         "in_stock": True,
-        "created_at": datetime.now(timezone.utc).isoformat()
+        "created_at": datetime.now(timezone.utc)
     },
     {
         "id": str(uuid.uuid4()),
@@ -193,7 +196,7 @@ products_data = [
         "image_url": "https://images.unsplash.com/photo-1610030469983-98e550d6193c?w=600",
         "category": "festive",
         "in_stock": True,
-        "created_at": datetime.now(timezone.utc).isoformat()
+        "created_at": datetime.now(timezone.utc)
     }
 ]
 
@@ -204,6 +207,8 @@ async def seed_products():
         print(f"Seeded {len(products_data)} products successfully!")
     else:
         print("No products to seed.")
+    # Seeding bypasses the API, so recompute the dashboard rollups
+    await rebuild_dashboard_stats(db)
 
 if __name__ == "__main__":
     asyncio.run(seed_products())
@@ -1,12 +1,19 @@
-from fastapi import FastAPI, APIRouter, HTTPException, Query, Depends, status
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, APIRouter, HTTPException, Query, Depends, Request, Response, File, UploadFile, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from fastapi.responses import JSONResponse
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ReturnDocument
 import os
+import asyncio
+import csv
+import io
 import logging
 import math
+import time
 from pathlib import Path
 from pydantic import BaseModel, Field, ConfigDict, EmailStr
 from typing import List, Optional
@@ -14,8 +21,9 @@ import uuid
 from datetime import datetime, timezone, timedelta
 
 from auth import (
-    get_password_hash,
-    verify_password,
+    get_password_hash_async,
+    verify_password_async,
+    password_hash_metrics,
     create_access_token,
     decode_token,
     AdminLogin,
@@ -30,15 +38,112 @@ from auth import (
     decode_user_token,
     create_user_access_token
 )
+from cache import (
+    add_catalog_listener,
+    cache_backend,
+    catalog_cache,
+    catalog_version,
+    configure_catalog_version_store,
+    facet_cache,
+    invalidate_catalog,
+    invalidate_order_history,
+    invalidate_stats,
+    make_cache_key,
+    order_history_cache,
+    principal_cache,
+    start_cache,
+    stats_cache,
+    stop_cache
+)
+from search import SEARCH_PROJECTION, product_search_index
+from fast_json import FastJSONResponse, respond
+from fast_json import dumps as fast_json_dumps
+from http_cache import (
+    is_not_modified,
+    make_etag,
+    not_modified_response,
+    validator_headers
+)
+from indexes import ensure_indexes, explain_query_shapes, inspect_indexes
+from db_config import CATALOG_PRIMARY_WINDOW_SECONDS, client_options, describe as describe_db_config
+from db_config import catalog_read_preference as get_catalog_read_preference
+from compression import COMPRESSION_ENABLED, CompressionMiddleware, compressed_cache
+from db_monitoring import DB_MONITORING_ENABLED, DBStatsMiddleware, mongo_event_listeners
+from rate_limit import (
+    admission,
+    checkout_account_limiter,
+    checkout_ip_limiter,
+    enforce_rate_limit,
+    login_account_limiter,
+    login_ip_limiter,
+    rate_limit_stats,
+    signup_ip_limiter
+)
+from metrics import MetricsMiddleware, registry as metrics_registry, stats_collector
+from product_import import import_products, iter_csv_rows, iter_jsonl_rows
+from rollups import (
+    ORDER_STATUSES,
+    ORDER_STATUS_TRANSITIONS,
+    get_dashboard_stats,
+    record_bulk_status_change,
+    record_order_created,
+    record_order_status_change,
+    record_product_count_change
+)
+from pagination import (
+    PRODUCT_SORTS,
+    InvalidCursorError,
+    decode_cursor,
+    encode_cursor,
+    seek_filter,
+    sort_spec
+)
+from carts import (
+    SNAPSHOT_FIELDS,
+    SNAPSHOT_PROJECTION,
+    add_line,
+    cart_filter,
+    cart_total,
+    claim_cart,
+    discard_cart,
+    find_cart,
+    merge_guest_cart,
+    open_cart,
+    refresh_all_cart_lines,
+    refresh_cart_lines,
+    remove_cart_lines,
+    remove_line,
+    restore_cart,
+    set_line_quantity,
+    snapshot
+)
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
 mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
+mongo_client_options = client_options()
+catalog_read_preference = get_catalog_read_preference()
+# tz_aware: created_at is stored as a native BSON date and read back as UTC
+client = AsyncIOMotorClient(
+    mongo_url,
+    tz_aware=True,
+    event_listeners=mongo_event_listeners(),
+    **mongo_client_options
+)
 db = client[os.environ['DB_NAME']]
+# Public catalog reads only; may be routed to secondaries (see db_config.py)
+catalog_db = client.get_database(os.environ['DB_NAME'], read_preference=catalog_read_preference)
+# Workers agree on the catalog version (ETags) via MongoDB unless CACHE_BACKEND=redis
+configure_catalog_version_store(db)
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await startup()
+    yield
+    await shutdown()
+
+app = FastAPI(lifespan=lifespan)
 api_router = APIRouter(prefix="/api")
 admin_router = APIRouter(prefix="/api/admin")
 auth_router = APIRouter(prefix="/api/auth")  # Customer auth router
@@ -60,41 +165,67 @@ logger = logging.getLogger(__name__)
 async def create_indexes():
     """
     Create MongoDB indexes for optimal query performance.
-    This function runs once on application startup.
+    Runs on every worker's startup; builds happen under a cross-worker lock.
     
-    Indexes created:
-    - Products: category, price, unique design_no
+    The full index set is declared in `indexes.INDEX_REGISTRY`; only indexes
+    that do not exist yet are built. Highlights:
+    - Unique `id` on products, orders and users for single-document lookups
+    - Products: category, price, unique design_no, keyset pagination keys
     - Orders: compound index on (created_at desc, status) for dashboard sorting
-    - Admins: unique email for fast authentication lookups
-    - Users: unique email for customer authentication
+    - Admins/Users: unique email for fast authentication lookups
+    """
+    report = await ensure_indexes(db)
+    created = sum(len(r.get("created", [])) for r in report.values())
+    pending = sum(len(r.get("pending", [])) for r in report.values())
+    failed = [collection for collection, r in report.items() if "error" in r]
+    if failed:
+        logger.warning(f"Index verification incomplete for {', '.join(failed)} ({created} built)")
+    elif pending:
+        logger.info(f"Indexes verified; {pending} being built by another worker")
+    else:
+        logger.info(f"All database indexes created/verified successfully ({created} built)")
+    return report
+
+def catalog_products():
+    """
+    Products collection for public catalog reads.
+    
+    Uses the catalog read preference, except shortly after a product write
+    in this process, when reads stay on the primary so a lagging secondary
+    cannot serve (and get cached as) pre-write data.
+    """
+    since_write = (datetime.now(timezone.utc) - catalog_version.last_modified).total_seconds()
+    if since_write < CATALOG_PRIMARY_WINDOW_SECONDS:
+        return db.products
+    return catalog_db.products
+
+async def refresh_search_index(product_ids: Optional[List[str]]) -> None:
+    """Apply another worker's product writes to this worker's search index."""
+    if product_ids is None:
+        await load_search_index()
+        return
+    docs = await db.products.find({"id": {"$in": product_ids}}, SEARCH_PROJECTION).to_list(None)
+    for doc in docs:
+        product_search_index.upsert(doc)
+    found = {doc["id"] for doc in docs}
+    for product_id in product_ids:
+        if product_id not in found:
+            product_search_index.remove(product_id)
+
+add_catalog_listener(refresh_search_index)
+
+async def load_search_index():
+    """
+    Build the in-process product search index from MongoDB.
+    
+    On failure the index stays unready and `search` falls back to $regex.
     """
     try:
-        # Products indexes
-        await db.products.create_index("category")
-        await db.products.create_index("price")
-        await db.products.create_index("design_no", unique=True, sparse=True)
-        await db.products.create_index("name")  # For search
-        logger.info("Products indexes created successfully")
-        
-        # Orders indexes - compound index for fast dashboard queries
-        await db.orders.create_index([("created_at", -1), ("status", 1)])
-        await db.orders.create_index("status")  # For filtering
-        await db.orders.create_index("customer_email")  # For customer lookup
-        await db.orders.create_index("user_id")  # For user order history
-        logger.info("Orders indexes created successfully")
-        
-        # Admins indexes
-        await db.admins.create_index("email", unique=True)
-        logger.info("Admins indexes created successfully")
-        
-        # Users indexes (customer accounts)
-        await db.users.create_index("email", unique=True)
-        logger.info("Users indexes created successfully")
-        
-        logger.info("All database indexes created/verified successfully")
+        products = await db.products.find({}, SEARCH_PROJECTION).to_list(None)
+        product_search_index.rebuild(products)
+        logger.info(f"Search index built: {len(product_search_index)} products")
     except Exception as e:
-        logger.error(f"Error creating indexes: {e}")
-        # Don't raise - indexes are for optimization, app should still work
+        logger.error(f"Error building search index: {e}")
 
 # =============================================================================
 # Models
@@ -115,6 +246,10 @@ class Product(BaseModel):
     in_stock: bool = True
     created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
 
+# Output schemas: projecting exactly the model's fields means documents read
+# back from MongoDB already match the response model (see fast_json.respond)
+PRODUCT_PROJECTION = {"_id": 0, **{field: 1 for field in Product.model_fields}}
+
 class ProductCreate(BaseModel):
     design_no: str
     name: str
@@ -125,6 +260,11 @@ class ProductCreate(BaseModel):
     images: List[str]
     category: str
 
+class ProductImportRow(ProductCreate):
+    """One row of a bulk product import; unknown columns are ignored."""
+    model_config = ConfigDict(extra="ignore")
+    in_stock: Optional[bool] = None
+
 class ProductUpdate(BaseModel):
     design_no: Optional[str] = None
     name: Optional[str] = None
@@ -138,7 +278,7 @@ class ProductUpdate(BaseModel):
 
 class CartItem(BaseModel):
     product_id: str
-    quantity: int
+    quantity: int = Field(ge=1)
 
 class OrderItem(BaseModel):
     """Order item with snapshot of product at time of purchase."""
@@ -150,10 +290,18 @@ class OrderItem(BaseModel):
     product_price: float
 
 class Cart(BaseModel):
+    """Server-side cart; lines carry the same product snapshot as order items."""
     model_config = ConfigDict(extra="ignore")
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
-    items: List[CartItem]
+    user_id: Optional[str] = None  # None for guest carts
+    items: List[OrderItem] = []
+    total: float = 0.0  # Sum of line snapshots, computed on read
     created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    updated_at: Optional[datetime] = None
+    expires_at: Optional[datetime] = None  # Abandoned carts are removed by a TTL index
+
+class CartQuantityUpdate(BaseModel):
+    quantity: int = Field(ge=0)  # 0 removes the line
 
 class Order(BaseModel):
     model_config = ConfigDict(extra="ignore")
@@ -168,28 +316,74 @@ class Order(BaseModel):
     status: str = "pending"
     created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
 
+ORDER_PROJECTION = {"_id": 0, **{field: 1 for field in Order.model_fields}}
+
 class OrderCreate(BaseModel):
     customer_name: str
     customer_email: str
     customer_phone: str
-    items: List[CartItem]  # Cart items from frontend (product_id + quantity)
-    total: float
+    items: List[CartItem] = []  # Cart items from frontend (product_id + quantity)
+    cart_id: Optional[str] = None  # Check out a server-side cart instead of `items`
+    total: Optional[float] = None  # Ignored: total is computed server-side
     payment_method: str
 
 class OrderStatusUpdate(BaseModel):
     status: str  # pending, confirmed, shipped, delivered, cancelled
 
+class OrderBulkFilter(BaseModel):
+    """Selects orders for a bulk update when no explicit ids are given."""
+    model_config = ConfigDict(populate_by_name=True)
+    status: Optional[str] = None
+    from_date: Optional[datetime] = Field(default=None, alias="from")
+    to_date: Optional[datetime] = Field(default=None, alias="to")
+
+class OrderBulkStatusUpdate(BaseModel):
+    status: str  # Target status
+    order_ids: Optional[List[str]] = Field(default=None, max_length=1000)
+    filter: Optional[OrderBulkFilter] = None
+
 class AdminStats(BaseModel):
     total_revenue: float
     total_orders: int
     total_products: int
     pending_orders: int
+    orders_by_status: dict = {}
     recent_orders: List[dict]
 
 # =============================================================================
 # Auth Dependency
 # =============================================================================
 
+PRINCIPAL_COLLECTIONS = {"admin": "admins", "user": "users"}
+
+
+async def load_principal(kind: str, email: str) -> Optional[dict]:
+    """
+    Fetch an admin/user document by token subject through the principal cache.
+    
+    Cached for a short TTL so authenticated requests normally cost zero DB
+    round trips; account changes made in MongoDB apply once the entry
+    expires. Password hashes are never cached.
+    """
+    key = (kind, email)
+    principal = await principal_cache.get(key)
+    if principal is None:
+        principal = await db[PRINCIPAL_COLLECTIONS[kind]].find_one(
+            {"email": email}, {"_id": 0, "hashed_password": 0}
+        )
+        if principal is not None:
+            await principal_cache.set(key, principal)
+    return principal
+
+
+async def prime_principal(kind: str, account: dict) -> None:
+    """Cache an account document just read by a login handler."""
+    await principal_cache.set(
+        (kind, account["email"]),
+        {k: v for k, v in account.items() if k not in ("_id", "hashed_password")}
+    )
+
+
 async def get_current_admin(
     credentials: HTTPAuthorizationCredentials = Depends(security)
 ) -> dict:
@@ -206,8 +400,8 @@ async def get_current_admin(
     if token_data is None:
         raise credentials_exception
     
-    # Verify admin exists in database
-    admin = await db.admins.find_one({"email": token_data.email}, {"_id": 0})
+    # Verify admin exists (principal cache, falls back to database)
+    admin = await load_principal("admin", token_data.email)
     if admin is None:
         raise credentials_exception
     
@@ -240,8 +434,8 @@ async def get_current_user(
     if token_data is None:
         raise credentials_exception
     
-    # Verify user exists in database
-    user = await db.users.find_one({"email": token_data.email}, {"_id": 0, "hashed_password": 0})
+    # Verify user exists (principal cache, falls back to database)
+    user = await load_principal("user", token_data.email)
     if user is None:
         raise credentials_exception
     
@@ -268,7 +462,7 @@ async def get_optional_current_user(
         if token_data is None:
             return None
         
-        user = await db.users.find_one({"email": token_data.email}, {"_id": 0, "hashed_password": 0})
+        user = await load_principal("user", token_data.email)
         if user is None or not user.get("is_active", True):
             return None
         
@@ -280,9 +474,14 @@ async def get_optional_current_user(
 # Auth Routes
 # =============================================================================
 
-@api_router.post("/admin/login", response_model=Token)
+@api_router.post(
+    "/admin/login",
+    response_model=Token,
+    dependencies=[Depends(admission("auth", login_ip_limiter))]
+)
 async def admin_login(login_data: AdminLogin):
     """Authenticate admin user and return JWT token."""
+    enforce_rate_limit(login_account_limiter, ("admin", login_data.email.lower()))
     admin = await db.admins.find_one({"email": login_data.email}, {"_id": 0})
     
     if not admin:
@@ -291,7 +490,7 @@ async def admin_login(login_data: AdminLogin):
             detail="Invalid email or password"
         )
     
-    if not verify_password(login_data.password, admin["hashed_password"]):
+    if not await verify_password_async(login_data.password, admin["hashed_password"]):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid email or password"
@@ -303,6 +502,8 @@ async def admin_login(login_data: AdminLogin):
             detail="Admin account is disabled"
         )
     
+    await prime_principal("admin", admin)
+    
     # Create access token
     access_token = create_access_token(
         data={"sub": admin["email"], "admin_id": admin["id"]},
@@ -332,7 +533,11 @@ async def get_admin_profile(current_admin: dict = Depends(get_current_admin)):
 # Customer Auth Routes
 # =============================================================================
 
-@auth_router.post("/signup", response_model=UserToken)
+@auth_router.post(
+    "/signup",
+    response_model=UserToken,
+    dependencies=[Depends(admission("auth", signup_ip_limiter))]
+)
 async def user_signup(user_data: UserCreate):
     """Register a new customer user."""
     # Check if email already exists
@@ -353,18 +558,19 @@ async def user_signup(user_data: UserCreate):
     # Create user
     user = User(
         email=user_data.email,
-        hashed_password=get_password_hash(user_data.password),
+        hashed_password=await get_password_hash_async(user_data.password),
         full_name=user_data.full_name,
         phone=user_data.phone
     )
     
     # Save to database
     user_doc = user.model_dump()
-    user_doc['created_at'] = user_doc['created_at'].isoformat()
     await db.users.insert_one(user_doc)
     
     logger.info(f"New user registered: {user.email}")
     
+    cart_id = await merge_guest_cart(db, user_data.cart_id, user.id) if user_data.cart_id else None
+    
     # Create access token
     access_token = create_user_access_token(
         data={"sub": user.email, "user_id": user.id},
@@ -378,13 +584,19 @@ async def user_signup(user_data: UserCreate):
             "email": user.email,
             "full_name": user.full_name,
             "phone": user.phone
-        }
+        },
+        cart_id=cart_id
     )
 
 
-@auth_router.post("/login", response_model=UserToken)
+@auth_router.post(
+    "/login",
+    response_model=UserToken,
+    dependencies=[Depends(admission("auth", login_ip_limiter))]
+)
 async def user_login(login_data: UserLogin):
     """Authenticate customer user and return JWT token."""
+    enforce_rate_limit(login_account_limiter, ("user", login_data.email.lower()))
     user = await db.users.find_one({"email": login_data.email}, {"_id": 0})
     
     if not user:
@@ -393,7 +605,7 @@ async def user_login(login_data: UserLogin):
             detail="Invalid email or password"
         )
     
-    if not verify_password(login_data.password, user["hashed_password"]):
+    if not await verify_password_async(login_data.password, user["hashed_password"]):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid email or password"
@@ -405,6 +617,8 @@ async def user_login(login_data: UserLogin):
             detail="Account is disabled"
         )
     
+    await prime_principal("user", user)
+    
     # Create access token
     access_token = create_user_access_token(
         data={"sub": user["email"], "user_id": user["id"]},
@@ -413,6 +627,8 @@ async def user_login(login_data: UserLogin):
     
     logger.info(f"User logged in: {user['email']}")
     
+    cart_id = await merge_guest_cart(db, login_data.cart_id, user["id"]) if login_data.cart_id else None
+    
     return UserToken(
         access_token=access_token,
         user={
@@ -420,7 +636,8 @@ async def user_login(login_data: UserLogin):
             "email": user["email"],
             "full_name": user["full_name"],
             "phone": user.get("phone", "")
-        }
+        },
+        cart_id=cart_id
     )
 
 
@@ -435,19 +652,92 @@ async def get_user_profile(current_user: dict = Depends(get_current_user)):
     }
 
 
+# Newest first, tie-broken on id; served by the (user_id, created_at, id) index
+ORDER_HISTORY_SORT = ("created_at", -1)
+
+# List view of an order: everything except the item snapshots
+ORDER_SUMMARY_PROJECTION = {
+    "_id": 0,
+    **{field: 1 for field in Order.model_fields if field != "items"},
+    "item_count": {"$size": "$items"}
+}
+
+# MyOrdersPage follows next_cursor ("Load more") for longer histories
+ORDER_HISTORY_PAGE_SIZE = 20
+# Distinct pages kept per user in the order-history cache entry
+ORDER_HISTORY_CACHED_PAGES = 8
+
+
 @auth_router.get("/orders")
-async def get_user_orders(current_user: dict = Depends(get_current_user)):
-    """Get orders for the current logged-in user."""
-    orders = await db.orders.find(
-        {"user_id": current_user["id"]},
-        {"_id": 0}
-    ).sort("created_at", -1).to_list(100)
+async def get_user_orders(
+    limit: int = Query(default=ORDER_HISTORY_PAGE_SIZE, ge=1, le=100, description="Orders per page (max 100)"),
+    cursor: Optional[str] = Query(default=None, description="Opaque cursor from a previous next_cursor"),
+    summary: bool = Query(default=False, description="Leave out item snapshots (adds item_count)"),
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Get orders for the current logged-in user, newest first.
     
-    for order in orders:
-        if isinstance(order.get('created_at'), str):
-            order['created_at'] = datetime.fromisoformat(order['created_at']).isoformat()
+    Keyset paginated on (user_id, created_at, id): pass the returned
+    `next_cursor` back as `cursor` for the next page. `summary=true` returns
+    list-view rows without item snapshots. Pages are cached per user and
+    dropped when the user places an order.
+    """
+    cursor_data = None
+    if cursor:
+        try:
+            cursor_data = decode_cursor(cursor)
+        except InvalidCursorError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        if "id" not in cursor_data or "v" not in cursor_data:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+    
+    user_id = current_user["id"]
+    page_key = make_cache_key(limit=limit, cursor=cursor, summary=summary)
+    pages = await order_history_cache.get(user_id) or {}
+    response_data = pages.get(page_key)
+    if response_data is None:
+        response_data = await _query_user_orders(user_id, limit, cursor_data, summary)
+        pages = {k: v for k, v in pages.items() if k != page_key}
+        pages[page_key] = response_data
+        # Oldest pages first (insertion order); keep the entry bounded
+        await order_history_cache.set(user_id, dict(list(pages.items())[-ORDER_HISTORY_CACHED_PAGES:]))
+    
+    return FastJSONResponse(content=response_data)
+
+
+async def _query_user_orders(
+    user_id: str,
+    limit: int,
+    cursor_data: Optional[dict],
+    summary: bool
+) -> dict:
+    """Fetch one order-history page plus the user's total order count."""
+    field, direction = ORDER_HISTORY_SORT
+    query = {"user_id": user_id}
+    if cursor_data is not None:
+        query.update(seek_filter(field, direction, cursor_data["v"], cursor_data["id"]))
+    projection = ORDER_SUMMARY_PROJECTION if summary else ORDER_PROJECTION
+    
+    # Fetch one extra row to know whether another page exists
+    orders, total = await asyncio.gather(
+        db.orders.find(query, projection).sort(sort_spec(field, direction)).to_list(limit + 1),
+        db.orders.count_documents({"user_id": user_id})
+    )
+    has_more = len(orders) > limit
+    orders = orders[:limit]
+    next_cursor = None
+    if has_more:
+        last = orders[-1]
+        next_cursor = encode_cursor(v=last.get(field), id=last["id"])
     
-    return {"orders": orders, "total": len(orders)}
+    return {
+        "orders": orders,
+        "total": total,
+        "limit": limit,
+        "has_more": has_more,
+        "next_cursor": next_cursor
+    }
 
 # =============================================================================
 # Public Product Routes
@@ -458,38 +748,21 @@ class PaginatedProductsResponse(BaseModel):
     products: List[Product]
     total_products: int
     total_pages: int
-    current_page: int
+    current_page: Optional[int]  # None when paginating by cursor
     limit: int
     has_more: bool
+    next_cursor: Optional[str] = None
 
 
-@api_router.get("/products")
-async def get_products(
+def build_product_query(
     category: Optional[str] = None,
     material: Optional[str] = None,
     color: Optional[str] = None,
     search: Optional[str] = None,
     min_price: Optional[float] = None,
-    max_price: Optional[float] = None,
-    page: int = Query(default=1, ge=1, description="Page number (starts at 1)"),
-    limit: int = Query(default=20, ge=1, le=100, description="Products per page (max 100)"),
-    include_description: bool = Query(default=False, description="Include full description in response")
-):
-    """
-    Get products with optional filtering and server-side pagination.
-    
-    Optimizations:
-    - Server-side pagination reduces payload size and improves load times
-    - Description field excluded by default for lightweight list view
-    - HTTP Cache headers (5 minutes) for browser caching
-    
-    Args:
-        page: Page number (default: 1)
-        limit: Products per page (default: 20, max: 100)
-    
-    Returns:
-        Paginated products with metadata (total_products, total_pages, has_more)
-    """
+    max_price: Optional[float] = None
+) -> dict:
+    """Build the MongoDB filter shared by the catalog listing endpoints."""
     query = {}
     if category:
         query["category"] = category
@@ -509,57 +782,436 @@ async def get_products(
         if max_price is not None:
             price_query["$lte"] = max_price
         query["price"] = price_query
+    return query
+
+
+DEFAULT_PAGE_SIZE = 20
+
+
+def products_cache_key(
+    category: Optional[str] = None,
+    material: Optional[str] = None,
+    color: Optional[str] = None,
+    search: Optional[str] = None,
+    min_price: Optional[float] = None,
+    max_price: Optional[float] = None,
+    page: int = 1,
+    limit: int = DEFAULT_PAGE_SIZE,
+    include_description: bool = False,
+    sort: Optional[str] = None,
+    cursor: Optional[str] = None
+) -> str:
+    """Normalized catalog cache key (shared by requests and warm-up)."""
+    return make_cache_key(
+        category=category,
+        material=material,
+        color=color,
+        search=search,
+        min_price=min_price,
+        max_price=max_price,
+        page=None if cursor else page,
+        limit=limit,
+        include_description=include_description,
+        sort=sort,
+        cursor=cursor
+    )
+
+
+@api_router.get("/products")
+async def get_products(
+    request: Request,
+    category: Optional[str] = None,
+    material: Optional[str] = None,
+    color: Optional[str] = None,
+    search: Optional[str] = None,
+    min_price: Optional[float] = None,
+    max_price: Optional[float] = None,
+    page: int = Query(default=1, ge=1, description="Page number (starts at 1)"),
+    limit: int = Query(default=DEFAULT_PAGE_SIZE, ge=1, le=100, description="Products per page (max 100)"),
+    include_description: bool = Query(default=False, description="Include full description in response"),
+    sort: Optional[str] = Query(
+        default=None,
+        pattern="^(" + "|".join(PRODUCT_SORTS) + ")$",
+        description="Sort order; enables next_cursor in the response"
+    ),
+    cursor: Optional[str] = Query(default=None, description="Opaque cursor from a previous next_cursor")
+):
+    """
+    Get products with optional filtering and server-side pagination.
+    
+    Optimizations:
+    - Server-side pagination reduces payload size and improves load times
+    - Keyset (cursor) pagination for infinite scroll: constant cost per page
+    - `search` served by the in-process inverted index (relevance ranked,
+      prefix matching) instead of an unanchored $regex collection scan
+    - Description field excluded by default for lightweight list view
+    - In-process LRU catalog cache, invalidated on every product write
+    - HTTP Cache headers (5 minutes) for browser caching, plus a strong ETag
+      and Last-Modified from the catalog version; matching If-None-Match
+      revalidations get a 304 without touching the cache or MongoDB
+    
+    Args:
+        page: Page number (default: 1), ignored when `cursor` is given
+        limit: Products per page (default: 20, max: 100)
+        sort: newest | price_asc | price_desc
+        cursor: Resume after the last product of a previous page
+    
+    Returns:
+        Paginated products with metadata (total_products, total_pages, has_more,
+        next_cursor)
+    """
+    if cursor:
+        try:
+            cursor_data = decode_cursor(cursor)
+        except InvalidCursorError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        if cursor_data.get("s") not in PRODUCT_SORTS or "id" not in cursor_data or "v" not in cursor_data:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        if sort and sort != cursor_data["s"]:
+            raise HTTPException(status_code=400, detail="Cursor does not match sort order")
+        sort = cursor_data["s"]
+    
+    use_search_index = bool(search and search.strip()) and product_search_index.ready
+    if use_search_index and cursor:
+        raise HTTPException(
+            status_code=400,
+            detail="Cursor pagination is not supported together with search"
+        )
+    
+    cache_key = products_cache_key(
+        category=category,
+        material=material,
+        color=color,
+        search=search,
+        min_price=min_price,
+        max_price=max_price,
+        page=page,
+        limit=limit,
+        include_description=include_description,
+        sort=sort,
+        cursor=cursor
+    )
+    
+    # Conditional GET: the catalog version changes on every product write
+    version = catalog_version.tag
+    last_modified = catalog_version.last_modified
+    etag = make_etag("products", version, cache_key)
+    if is_not_modified(request, etag, last_modified):
+        return not_modified_response(etag, last_modified)
+    
+    # Keyed by version: entries filled under a superseded version are never read
+    cache_key = f"{version}|{cache_key}"
+    response_data = await catalog_cache.get(cache_key)
+    if response_data is None and use_search_index:
+        response_data = await _search_products_page(
+            search,
+            filters={
+                "category": category,
+                "material": material,
+                "color": color,
+                "min_price": min_price,
+                "max_price": max_price
+            },
+            page=page,
+            limit=limit,
+            include_description=include_description,
+            sort=sort
+        )
+        await cache_if_current(catalog_cache, cache_key, response_data, version)
+    elif response_data is None:
+        query = build_product_query(category, material, color, search, min_price, max_price)
+        response_data = await _query_products_page(
+            query,
+            page=page,
+            limit=limit,
+            include_description=include_description,
+            sort=sort,
+            cursor_data=cursor_data if cursor else None
+        )
+        await cache_if_current(catalog_cache, cache_key, response_data, version)
+    
+    # Return JSON with Cache-Control headers for browser caching
+    # Cache for 5 minutes (300 seconds) - reduces redundant API calls
+    return FastJSONResponse(
+        content=response_data,
+        headers=validator_headers(etag, last_modified)
+    )
+
+
+async def cache_if_current(cache, key: str, value, version: str) -> None:
+    """Store a query result unless a product write landed while it ran."""
+    if catalog_version.tag == version:
+        await cache.set(key, value)
+
+
+# Upper bounds are exclusive; the last bucket is open-ended
+PRICE_BUCKET_BOUNDARIES = [0, 1000, 2000, 3000, 5000, 10000]
+
+# Only real prices are bucketed: missing, negative, NaN or string prices
+# would otherwise fall into `$bucket`'s default and be counted as 10000+
+PRICED_PRODUCT = {"price": {"$type": "number", "$gte": 0}}
+
+
+@api_router.get("/products/facets")
+async def get_product_facets(
+    request: Request,
+    category: Optional[str] = None,
+    material: Optional[str] = None,
+    color: Optional[str] = None,
+    search: Optional[str] = None,
+    min_price: Optional[float] = None,
+    max_price: Optional[float] = None
+):
+    """
+    Get sidebar facet counts for the current catalog filter.
+    
+    Each facet is counted with every filter applied except its own, so the
+    sidebar can show alternatives (e.g. "Silk (42)" while Georgette is
+    selected). All facets are computed in a single `$facet` aggregation and
+    cached until the next product write.
+    
+    Returns:
+        total plus counts per category, material, color and price bucket
+    """
+    cache_key = make_cache_key(
+        category=category,
+        material=material,
+        color=color,
+        search=search,
+        min_price=min_price,
+        max_price=max_price
+    )
+    version = catalog_version.tag
+    last_modified = catalog_version.last_modified
+    etag = make_etag("facets", version, cache_key)
+    if is_not_modified(request, etag, last_modified):
+        return not_modified_response(etag, last_modified)
+    
+    cache_key = f"{version}|{cache_key}"
+    facets = await facet_cache.get(cache_key)
+    if facets is None:
+        facets = await _aggregate_product_facets(
+            category, material, color, search, min_price, max_price
+        )
+        await cache_if_current(facet_cache, cache_key, facets, version)
+    
+    return FastJSONResponse(
+        content=facets,
+        headers=validator_headers(etag, last_modified)
+    )
+
+
+async def _aggregate_product_facets(
+    category: Optional[str],
+    material: Optional[str],
+    color: Optional[str],
+    search: Optional[str],
+    min_price: Optional[float],
+    max_price: Optional[float]
+) -> dict:
+    """Compute all facet counts with one `$facet` aggregation."""
+    filters = {
+        "category": category,
+        "material": material,
+        "color": color,
+        "min_price": min_price,
+        "max_price": max_price
+    }
     
+    base_match = {}
+    if search and search.strip() and product_search_index.ready:
+        base_match = {"id": {"$in": product_search_index.search(search)}}
+    elif search:
+        base_match = build_product_query(search=search)
+    
+    def branch_match(exclude: Optional[str] = None) -> dict:
+        branch_filters = dict(filters)
+        if exclude == "price":
+            branch_filters["min_price"] = branch_filters["max_price"] = None
+        elif exclude:
+            branch_filters[exclude] = None
+        return build_product_query(**branch_filters)
+    
+    def value_counts(field: str) -> list:
+        return [
+            {"$match": branch_match(exclude=field)},
+            {"$group": {"_id": f"${field}", "count": {"$sum": 1}}},
+            {"$sort": {"count": -1, "_id": 1}}
+        ]
+    
+    pipeline = []
+    if base_match:
+        pipeline.append({"$match": base_match})
+    pipeline.append({"$facet": {
+        "total": [{"$match": branch_match()}, {"$count": "count"}],
+        "category": value_counts("category"),
+        "material": value_counts("material"),
+        "color": value_counts("color"),
+        "price": [
+            {"$match": branch_match(exclude="price")},
+            {"$match": PRICED_PRODUCT},
+            {"$bucket": {
+                "groupBy": "$price",
+                "boundaries": PRICE_BUCKET_BOUNDARIES,
+                # Left with prices at or above the last boundary
+                "default": PRICE_BUCKET_BOUNDARIES[-1],
+                "output": {"count": {"$sum": 1}}
+            }}
+        ]
+    }})
+    
+    result = await catalog_products().aggregate(pipeline).to_list(1)
+    raw = result[0] if result else {}
+    
+    price_buckets = []
+    upper_bounds = PRICE_BUCKET_BOUNDARIES[1:] + [None]
+    for bucket in raw.get("price", []):
+        i = PRICE_BUCKET_BOUNDARIES.index(bucket["_id"])
+        price_buckets.append({
+            "min": bucket["_id"],
+            "max": upper_bounds[i],
+            "count": bucket["count"]
+        })
+    
+    total = raw.get("total") or [{"count": 0}]
+    return {
+        "total": total[0]["count"],
+        **{
+            field: [
+                {"value": row["_id"], "count": row["count"]}
+                for row in raw.get(field, []) if row["_id"] is not None
+            ]
+            for field in ("category", "material", "color")
+        },
+        "price": price_buckets
+    }
+
+
+async def _query_products_page(
+    query: dict,
+    page: int,
+    limit: int,
+    include_description: bool,
+    sort: Optional[str] = None,
+    cursor_data: Optional[dict] = None
+) -> dict:
+    """Run the catalog query against MongoDB and return a JSON-safe page."""
     # Get total count for pagination metadata
-    total_products = await db.products.count_documents(query)
+    collection = catalog_products()
+    total_products = await collection.count_documents(query)
     total_pages = math.ceil(total_products / limit) if total_products > 0 else 1
     
-    # Calculate skip value for pagination
-    skip = (page - 1) * limit
-    
     # Projection: Exclude description for lightweight list view
     projection = {"_id": 0}
     if not include_description:
         projection["description"] = 0  # Exclude description to reduce payload
     
-    # Fetch paginated products using skip and limit
-    products = await db.products.find(query, projection).skip(skip).limit(limit).to_list(limit)
+    find_query = query
+    if cursor_data is not None:
+        # Keyset mode: seek past the last (sort key, id) instead of skipping
+        field, direction = PRODUCT_SORTS[sort]
+        seek = seek_filter(field, direction, cursor_data["v"], cursor_data["id"])
+        find_query = {"$and": [query, seek]} if query else seek
+    
+    products_cursor = collection.find(find_query, projection)
+    if sort:
+        products_cursor = products_cursor.sort(sort_spec(*PRODUCT_SORTS[sort]))
+    if cursor_data is None:
+        # Calculate skip value for pagination
+        products_cursor = products_cursor.skip((page - 1) * limit)
+    
+    # Fetch one extra row to learn whether another page exists
+    products = await products_cursor.limit(limit + 1).to_list(limit + 1)
+    has_more = len(products) > limit
+    products = products[:limit]
+    
+    next_cursor = None
+    if sort and has_more:
+        field = PRODUCT_SORTS[sort][0]
+        last = products[-1]
+        next_cursor = encode_cursor(s=sort, v=last.get(field), id=last["id"])
     
     for p in products:
-        if isinstance(p.get('created_at'), str):
-            p['created_at'] = datetime.fromisoformat(p['created_at'])
         # Set empty description if excluded (to satisfy Pydantic model)
         if not include_description and 'description' not in p:
             p['description'] = ""
     
-    # Build response with pagination metadata
-    response_data = {
+    # Build response with pagination metadata (rendered by FastJSONResponse,
+    # which encodes datetimes natively - no jsonable_encoder pass)
+    return {
         "products": products,
         "total_products": total_products,
         "total_pages": total_pages,
-        "current_page": page,
+        "current_page": None if cursor_data is not None else page,
         "limit": limit,
-        "has_more": page < total_pages
+        "has_more": has_more,
+        "next_cursor": next_cursor
     }
+
+async def _search_products_page(
+    search: str,
+    filters: dict,
+    page: int,
+    limit: int,
+    include_description: bool,
+    sort: Optional[str] = None
+) -> dict:
+    """
+    Resolve a search from the in-memory index and fetch only the page's rows.
     
-    # Return JSONResponse with Cache-Control headers for browser caching
-    # Cache for 5 minutes (300 seconds) - reduces redundant API calls
-    return JSONResponse(
-        content=response_data,
-        headers={
-            "Cache-Control": "public, max-age=300",
-            "Vary": "Accept-Encoding"
-        }
-    )
+    Matching, filtering, ranking and counting happen in process; MongoDB is
+    hit with a single `$in` lookup on the indexed `id` field for the page.
+    """
+    ranked_ids = product_search_index.search(search, filters)
+    if sort:
+        ranked_ids = product_search_index.sort_ids(ranked_ids, *PRODUCT_SORTS[sort])
+    
+    total_products = len(ranked_ids)
+    total_pages = math.ceil(total_products / limit) if total_products > 0 else 1
+    page_ids = ranked_ids[(page - 1) * limit:page * limit]
+    
+    projection = {"_id": 0}
+    if not include_description:
+        projection["description"] = 0
+    
+    products = []
+    if page_ids:
+        docs = await catalog_products().find({"id": {"$in": page_ids}}, projection).to_list(len(page_ids))
+        by_id = {doc["id"]: doc for doc in docs}
+        products = [by_id[pid] for pid in page_ids if pid in by_id]
+    
+    for p in products:
+        if not include_description and 'description' not in p:
+            p['description'] = ""
+    
+    return {
+        "products": products,
+        "total_products": total_products,
+        "total_pages": total_pages,
+        "current_page": page,
+        "limit": limit,
+        "has_more": page < total_pages,
+        "next_cursor": None
+    }
 
 @api_router.get("/products/{product_id}", response_model=Product)
-async def get_product(product_id: str):
-    product = await db.products.find_one({"id": product_id}, {"_id": 0})
+async def get_product(product_id: str, request: Request, response: Response):
+    """
+    Get a single product.
+    
+    Sends an ETag and Last-Modified derived from the catalog version; a
+    matching If-None-Match is answered with 304 without querying MongoDB.
+    """
+    last_modified = catalog_version.last_modified
+    etag = make_etag("product", catalog_version.tag, product_id)
+    if is_not_modified(request, etag, last_modified):
+        return not_modified_response(etag, last_modified)
+    
+    product = await catalog_products().find_one({"id": product_id}, PRODUCT_PROJECTION)
     if not product:
         raise HTTPException(status_code=404, detail="Product not found")
-    if isinstance(product.get('created_at'), str):
-        product['created_at'] = datetime.fromisoformat(product['created_at'])
-    return product
+    response.headers.update(validator_headers(etag, last_modified))
+    return respond(product, response)
 
 # =============================================================================
 # Protected Admin Product Routes
@@ -580,10 +1232,73 @@ async def create_product(
         
     product_obj = Product(**product_dict)
     doc = product_obj.model_dump()
-    doc['created_at'] = doc['created_at'].isoformat()
     await db.products.insert_one(doc)
+    product_search_index.upsert(doc)
+    await invalidate_catalog([product_obj.id])
+    await record_product_count_change(db, 1)
+    await invalidate_stats()
     logger.info(f"Product created by admin {current_admin['email']}: {product_obj.id}")
-    return product_obj
+    return respond(product_obj)
+
+IMPORT_FORMATS = {".csv": "csv", ".jsonl": "jsonl", ".ndjson": "jsonl"}
+
+@api_router.post("/products/import")
+async def import_products_file(
+    file: UploadFile = File(...),
+    import_format: Optional[str] = Query(
+        default=None, alias="format", pattern="^(csv|jsonl)$",
+        description="csv or jsonl; detected from the file extension if omitted"
+    ),
+    current_admin: dict = Depends(get_current_admin)
+):
+    """
+    Bulk import products from a JSONL or CSV upload (admin only).
+    
+    Rows are validated one at a time as the file is read (in a worker
+    thread) and upserted by `design_no` in unordered `bulk_write` chunks of
+    1000; each written chunk is applied to the search index incrementally.
+    CSV files need a header row and separate multiple image URLs with "|".
+    
+    Returns:
+        Insert/update counts, per-row errors and rows_per_second
+    """
+    if import_format is None:
+        import_format = IMPORT_FORMATS.get(Path(file.filename or "").suffix.lower())
+        if import_format is None:
+            raise HTTPException(
+                status_code=400,
+                detail="Unknown file type; upload .csv or .jsonl, or pass format=csv|jsonl"
+            )
+    
+    imported_ids: List[str] = []
+    
+    async def index_written(design_nos: List[str]) -> None:
+        docs = await db.products.find({"design_no": {"$in": design_nos}}, SEARCH_PROJECTION).to_list(None)
+        for doc in docs:
+            product_search_index.upsert(doc)
+            imported_ids.append(doc["id"])
+    
+    text = io.TextIOWrapper(file.file, encoding="utf-8-sig", newline="")
+    rows = iter_csv_rows(text) if import_format == "csv" else iter_jsonl_rows(text)
+    try:
+        report = await import_products(db.products, rows, ProductImportRow, on_written=index_written)
+    except UnicodeDecodeError:
+        raise HTTPException(status_code=400, detail="File must be UTF-8 encoded")
+    finally:
+        text.detach()
+    
+    if report["inserted"] or report["updated"]:
+        await invalidate_catalog(imported_ids)
+        await refresh_all_cart_lines(db)
+        await record_product_count_change(db, report["inserted"])
+        await invalidate_stats()
+    
+    logger.info(
+        f"Product import by admin {current_admin['email']}: {report['rows']} rows, "
+        f"{report['inserted']} inserted, {report['updated']} updated, {report['failed']} failed "
+        f"({report['rows_per_second']} rows/s)"
+    )
+    return report
 
 @api_router.put("/products/{product_id}", response_model=Product)
 async def update_product(
@@ -591,11 +1306,12 @@ async def update_product(
     product_update: ProductUpdate,
     current_admin: dict = Depends(get_current_admin)
 ):
-    """Update an existing product (admin only)."""
-    existing = await db.products.find_one({"id": product_id}, {"_id": 0})
-    if not existing:
-        raise HTTPException(status_code=404, detail="Product not found")
+    """
+    Update an existing product (admin only).
     
+    A single atomic `find_one_and_update` applies the change and returns the
+    updated document; a missing product is a 404.
+    """
     # Build update dict with only provided fields
     update_data = {k: v for k, v in product_update.model_dump().items() if v is not None}
     
@@ -606,14 +1322,23 @@ async def update_product(
     if not update_data:
         raise HTTPException(status_code=400, detail="No fields to update")
     
-    await db.products.update_one({"id": product_id}, {"$set": update_data})
+    updated = await db.products.find_one_and_update(
+        {"id": product_id},
+        {"$set": update_data},
+        projection=PRODUCT_PROJECTION,
+        return_document=ReturnDocument.AFTER
+    )
+    if updated is None:
+        raise HTTPException(status_code=404, detail="Product not found")
     
-    updated = await db.products.find_one({"id": product_id}, {"_id": 0})
-    if isinstance(updated.get('created_at'), str):
-        updated['created_at'] = datetime.fromisoformat(updated['created_at'])
+    product_search_index.upsert(updated)
+    await invalidate_catalog([product_id])
+    if any(field in update_data for field in SNAPSHOT_FIELDS.values()):
+        # Keep cart line snapshots priced like the catalog
+        await refresh_cart_lines(db, [updated])
     
     logger.info(f"Product updated by admin {current_admin['email']}: {product_id}")
-    return updated
+    return respond(updated)
 
 @api_router.delete("/products/{product_id}")
 async def delete_product(
@@ -621,40 +1346,142 @@ async def delete_product(
     current_admin: dict = Depends(get_current_admin)
 ):
     """Delete a product (admin only)."""
-    existing = await db.products.find_one({"id": product_id})
-    if not existing:
+    result = await db.products.delete_one({"id": product_id})
+    if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Product not found")
     
-    await db.products.delete_one({"id": product_id})
+    product_search_index.remove(product_id)
+    await invalidate_catalog([product_id])
+    await remove_cart_lines(db, [product_id])
+    await record_product_count_change(db, -1)
+    await invalidate_stats()
     logger.info(f"Product deleted by admin {current_admin['email']}: {product_id}")
     
     return {"message": "Product deleted successfully", "id": product_id}
 
 # =============================================================================
-# Public Order Routes
+# Cart Routes
 # =============================================================================
 
-@api_router.post("/orders", response_model=Order)
-async def create_order(
-    order: OrderCreate,
+def cart_response(cart: dict):
+    cart["total"] = cart_total(cart)
+    return respond(cart)
+
+
+def cart_owner_filter(cart_id: str, current_user: Optional[dict]) -> dict:
+    return cart_filter(cart_id, current_user["id"] if current_user else None)
+
+
+@api_router.post("/cart", response_model=Cart)
+async def create_cart(current_user: Optional[dict] = Depends(get_optional_current_user)):
+    """
+    Create a cart.
+    
+    Guests get a new cart whose id the client keeps and sends back on later
+    calls; a logged-in customer gets their own cart (one per user).
+    """
+    cart = await open_cart(db, current_user["id"] if current_user else None)
+    return cart_response(cart)
+
+
+@api_router.get("/cart/{cart_id}", response_model=Cart)
+async def get_cart(
+    cart_id: str,
+    current_user: Optional[dict] = Depends(get_optional_current_user)
+):
+    cart = await find_cart(db, cart_id, current_user["id"] if current_user else None)
+    if cart is None:
+        raise HTTPException(status_code=404, detail="Cart not found")
+    return cart_response(cart)
+
+
+@api_router.post("/cart/{cart_id}/items", response_model=Cart)
+async def add_cart_item(
+    cart_id: str,
+    item: CartItem,
     current_user: Optional[dict] = Depends(get_optional_current_user)
 ):
     """
-    Create a new order with product snapshots.
+    Add a product to the cart, incrementing its line if already present.
     
-    Product details (name, image, price) are snapshot at the time of purchase
-    to preserve historical accuracy and eliminate N+1 query problems.
+    The product is read once to snapshot its name, image and price; the
+    line is then updated with a single atomic `$inc` (or `$push`).
+    """
+    product = await db.products.find_one({"id": item.product_id}, SNAPSHOT_PROJECTION)
+    if not product:
+        raise HTTPException(status_code=400, detail=f"Product not found: {item.product_id}")
+    cart = await add_line(
+        db,
+        cart_owner_filter(cart_id, current_user),
+        {"product_id": item.product_id, "quantity": item.quantity, **snapshot(product)}
+    )
+    if cart is None:
+        raise HTTPException(status_code=404, detail="Cart not found")
+    return cart_response(cart)
+
+
+@api_router.put("/cart/{cart_id}/items/{product_id}", response_model=Cart)
+async def update_cart_item(
+    cart_id: str,
+    product_id: str,
+    quantity_update: CartQuantityUpdate,
+    current_user: Optional[dict] = Depends(get_optional_current_user)
+):
+    """Set a line's quantity (0 removes it)."""
+    match = cart_owner_filter(cart_id, current_user)
+    if quantity_update.quantity == 0:
+        cart = await remove_line(db, match, product_id)
+    else:
+        cart = await set_line_quantity(db, match, product_id, quantity_update.quantity)
+    if cart is None:
+        raise HTTPException(status_code=404, detail="Cart or item not found")
+    return cart_response(cart)
+
+
+@api_router.delete("/cart/{cart_id}/items/{product_id}", response_model=Cart)
+async def remove_cart_item(
+    cart_id: str,
+    product_id: str,
+    current_user: Optional[dict] = Depends(get_optional_current_user)
+):
+    cart = await remove_line(db, cart_owner_filter(cart_id, current_user), product_id)
+    if cart is None:
+        raise HTTPException(status_code=404, detail="Cart not found")
+    return cart_response(cart)
+
+
+@api_router.delete("/cart/{cart_id}")
+async def delete_cart(
+    cart_id: str,
+    current_user: Optional[dict] = Depends(get_optional_current_user)
+):
+    if not await discard_cart(db, cart_owner_filter(cart_id, current_user)):
+        raise HTTPException(status_code=404, detail="Cart not found")
+    return {"message": "Cart deleted successfully", "id": cart_id}
+
+# =============================================================================
+# Public Order Routes
+# =============================================================================
+
+async def build_order_items(cart_items: List[CartItem]) -> List[OrderItem]:
+    """
+    Snapshot product details for every cart line with one batched query.
     
-    If user is logged in, the order is linked to their account.
+    Raises 400 if any referenced product does not exist.
     """
-    # Fetch product details for each item and create snapshots
+    if not cart_items:
+        raise HTTPException(status_code=400, detail="Order must contain at least one item")
+    
+    product_ids = list({item.product_id for item in cart_items})
+    products = await db.products.find(
+        {"id": {"$in": product_ids}},
+        {"_id": 0, "id": 1, "name": 1, "image_url": 1, "price": 1}
+    ).to_list(len(product_ids))
+    products_by_id = {product["id"]: product for product in products}
+    
     order_items = []
-    for cart_item in order.items:
-        product = await db.products.find_one(
-            {"id": cart_item.product_id}, 
-            {"_id": 0, "name": 1, "image_url": 1, "price": 1}
-        )
-        
+    for cart_item in cart_items:
+        product = products_by_id.get(cart_item.product_id)
         if not product:
             raise HTTPException(
                 status_code=400, 
@@ -662,14 +1489,67 @@ async def create_order(
             )
         
         # Create OrderItem with product snapshot
-        order_item = OrderItem(
+        order_items.append(OrderItem(
             product_id=cart_item.product_id,
             quantity=cart_item.quantity,
             product_name=product["name"],
             product_image=product["image_url"],
             product_price=product["price"]
+        ))
+    return order_items
+
+
+def order_total(order_items: List[OrderItem]) -> float:
+    """Sum snapshot prices; never trust a client-supplied total."""
+    return round(sum(item.product_price * item.quantity for item in order_items), 2)
+
+
+@api_router.post(
+    "/orders",
+    response_model=Order,
+    dependencies=[Depends(admission("checkout", checkout_ip_limiter))]
+)
+async def create_order(
+    order: OrderCreate,
+    current_user: Optional[dict] = Depends(get_optional_current_user)
+):
+    """
+    Create a new order with product snapshots.
+    
+    Product details (name, image, price) are snapshot at the time of purchase
+    to preserve historical accuracy and eliminate N+1 query problems.
+    With `cart_id` the lines come from the server-side cart, whose snapshots
+    are kept current, so checkout is a single document read; the cart is
+    claimed atomically (read and deleted in one operation) and restored if
+    the order cannot be stored. Otherwise all `items` products are
+    fetched in a single `$in` query. The order total is always computed
+    server-side from the snapshot prices.
+    
+    If user is logged in, the order is linked to their account.
+    
+    Rate limited per IP and per account (user id, or email for guests).
+    """
+    account = current_user["id"] if current_user else order.customer_email.lower()
+    enforce_rate_limit(checkout_account_limiter, account)
+    cart = None
+    if order.cart_id:
+        # Claim (remove) the cart up front so a double-submitted checkout
+        # cannot turn one cart into two orders
+        cart = await claim_cart(db, cart_owner_filter(order.cart_id, current_user))
+        if cart is None:
+            if await find_cart(db, order.cart_id, current_user["id"] if current_user else None):
+                raise HTTPException(status_code=400, detail="Order must contain at least one item")
+            raise HTTPException(status_code=404, detail="Cart not found")
+        order_items = [OrderItem(**line) for line in cart["items"]]
+    else:
+        order_items = await build_order_items(order.items)
+    total = order_total(order_items)
+    
+    if order.total is not None and abs(order.total - total) > 0.01:
+        logger.warning(
+            f"Client total {order.total} differs from server total {total} "
+            f"for {order.customer_email}; using server total"
         )
-        order_items.append(order_item)
     
     # Create order with snapshot items
     order_obj = Order(
@@ -678,29 +1558,35 @@ async def create_order(
         customer_phone=order.customer_phone,
         user_id=current_user["id"] if current_user else None,
         items=order_items,
-        total=order.total,
+        total=total,
         payment_method=order.payment_method
     )
     
     doc = order_obj.model_dump()
-    doc['created_at'] = doc['created_at'].isoformat()
     # Convert items to dicts for MongoDB
     doc['items'] = [item.model_dump() for item in order_items]
     
-    await db.orders.insert_one(doc)
+    try:
+        await db.orders.insert_one(doc)
+    except Exception:
+        if cart is not None:
+            await restore_cart(db, cart)
+        raise
+    await record_order_created(db, doc)
+    await invalidate_stats()
+    if current_user:
+        await invalidate_order_history(current_user["id"])
     logger.info(f"Order created: {order_obj.id} for {order.customer_email}" + 
                 (f" (user: {current_user['id']})" if current_user else " (guest)"))
     
-    return order_obj
+    return respond(order_obj)
 
 @api_router.get("/orders/{order_id}", response_model=Order)
 async def get_order(order_id: str):
-    order = await db.orders.find_one({"id": order_id}, {"_id": 0})
+    order = await db.orders.find_one({"id": order_id}, ORDER_PROJECTION)
     if not order:
         raise HTTPException(status_code=404, detail="Order not found")
-    if isinstance(order.get('created_at'), str):
-        order['created_at'] = datetime.fromisoformat(order['created_at'])
-    return order
+    return respond(order)
 
 # =============================================================================
 # Admin Dashboard & Order Management Routes
@@ -711,46 +1597,57 @@ async def get_admin_stats(current_admin: dict = Depends(get_current_admin)):
     """
     Get dashboard statistics (admin only).
     
-    Optimized using MongoDB aggregation for revenue calculation
-    instead of fetching all documents.
+    Served from the `stats` rollup document, which write paths keep
+    current with atomic `$inc` updates - a single `_id` lookup regardless
+    of how many orders exist, cached briefly and dropped on order writes.
+    Rebuild with `python rebuild_stats.py`.
     """
-    
-    # Total products
-    total_products = await db.products.count_documents({})
-    
-    # Total orders count
-    total_orders = await db.orders.count_documents({})
-    
-    # Total revenue using aggregation pipeline (efficient for large datasets)
-    revenue_pipeline = [
-        {"$group": {"_id": None, "total_revenue": {"$sum": "$total"}}}
-    ]
-    revenue_result = await db.orders.aggregate(revenue_pipeline).to_list(1)
-    total_revenue = revenue_result[0]["total_revenue"] if revenue_result else 0.0
-    
-    # Pending orders count
-    pending_orders = await db.orders.count_documents({"status": "pending"})
-    
-    # Recent orders (last 10) - uses compound index (created_at, status)
-    recent_orders_cursor = db.orders.find({}, {"_id": 0}).sort("created_at", -1).limit(10)
-    recent_orders = await recent_orders_cursor.to_list(10)
-    
-    # Parse dates
-    for order in recent_orders:
-        if isinstance(order.get('created_at'), str):
-            order['created_at'] = datetime.fromisoformat(order['created_at']).isoformat()
+    stats = await stats_cache.get("dashboard")
+    if stats is None:
+        stats = await get_dashboard_stats(db)
+        stats.pop("_id", None)
+        await stats_cache.set("dashboard", stats)
+    orders_by_status = stats.get("orders_by_status", {})
+    recent_orders = stats.get("recent_orders", [])
     
     return AdminStats(
-        total_revenue=total_revenue,
-        total_orders=total_orders,
-        total_products=total_products,
-        pending_orders=pending_orders,
+        total_revenue=stats.get("total_revenue", 0.0),
+        total_orders=stats.get("total_orders", 0),
+        total_products=stats.get("total_products", 0),
+        pending_orders=orders_by_status.get("pending", 0),
+        orders_by_status=orders_by_status,
         recent_orders=recent_orders
     )
 
+def as_utc(value: datetime) -> datetime:
+    """Interpret naive datetimes from query strings as UTC."""
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+def build_order_query(
+    status: Optional[str] = None,
+    from_date: Optional[datetime] = None,
+    to_date: Optional[datetime] = None
+) -> dict:
+    """Build the MongoDB filter shared by the admin order list and export."""
+    query = {}
+    if status:
+        query["status"] = status
+    created_range = {}
+    if from_date is not None:
+        created_range["$gte"] = as_utc(from_date)
+    if to_date is not None:
+        created_range["$lt"] = as_utc(to_date)
+    if created_range:
+        query["created_at"] = created_range
+    return query
+
 @api_router.get("/admin/orders")
 async def get_all_orders(
     status: Optional[str] = None,
+    from_date: Optional[datetime] = Query(default=None, alias="from", description="Created at or after (ISO 8601)"),
+    to_date: Optional[datetime] = Query(default=None, alias="to", description="Created before (ISO 8601)"),
     limit: int = Query(default=50, le=200),
     offset: int = Query(default=0, ge=0),
     current_admin: dict = Depends(get_current_admin)
@@ -760,20 +1657,18 @@ async def get_all_orders(
     
     Optimization: Orders now include product snapshots (name, image, price)
     embedded at purchase time, eliminating N+1 query problems.
-    Uses compound index (created_at DESC, status) for efficient sorting.
+    Uses compound index (created_at DESC, status) for efficient sorting,
+    and (status, created_at DESC) for status + date-range reports.
+    
+    `from`/`to` filter on the native `created_at` date; naive values are
+    treated as UTC and the range is half-open [from, to).
     """
-    query = {}
-    if status:
-        query["status"] = status
+    query = build_order_query(status, from_date, to_date)
     
     total = await db.orders.count_documents(query)
     # Uses compound index for efficient sorting
     orders = await db.orders.find(query, {"_id": 0}).sort("created_at", -1).skip(offset).limit(limit).to_list(limit)
     
-    for order in orders:
-        if isinstance(order.get('created_at'), str):
-            order['created_at'] = datetime.fromisoformat(order['created_at']).isoformat()
-    
     return {
         "orders": orders,
         "total": total,
@@ -781,6 +1676,110 @@ async def get_all_orders(
         "offset": offset
     }
 
+EXPORT_BATCH_SIZE = 500
+EXPORT_COLUMNS = [
+    "order_id", "created_at", "status", "customer_name", "customer_email",
+    "customer_phone", "user_id", "payment_method", "order_total",
+    "item_index", "product_id", "product_name", "product_price", "quantity", "line_total"
+]
+# Spreadsheets evaluate text cells starting with these as formulas
+CSV_FORMULA_PREFIXES = ("=", "+", "-", "@", "\t", "\r")
+
+
+def csv_safe(value):
+    """Neutralize customer-supplied text that Excel/Sheets would run as a formula."""
+    if isinstance(value, str) and value.startswith(CSV_FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+def flatten_order(order: dict):
+    """Yield one flat row per item snapshot (or one row for an empty order)."""
+    created_at = order.get("created_at")
+    base = {
+        "order_id": order.get("id"),
+        "created_at": created_at.isoformat() if isinstance(created_at, datetime) else created_at,
+        "status": order.get("status"),
+        "customer_name": order.get("customer_name"),
+        "customer_email": order.get("customer_email"),
+        "customer_phone": order.get("customer_phone"),
+        "user_id": order.get("user_id"),
+        "payment_method": order.get("payment_method"),
+        "order_total": order.get("total"),
+    }
+    items = order.get("items") or [{}]
+    for index, item in enumerate(items):
+        price = item.get("product_price")
+        quantity = item.get("quantity")
+        yield {
+            **base,
+            "item_index": index if item else None,
+            "product_id": item.get("product_id"),
+            "product_name": item.get("product_name"),
+            "product_price": price,
+            "quantity": quantity,
+            "line_total": round(price * quantity, 2) if price is not None and quantity is not None else None,
+        }
+
+
+async def stream_order_export(query: dict, export_format: str):
+    """
+    Stream matching orders as CSV or NDJSON.
+    
+    Iterates a MongoDB cursor in batches of EXPORT_BATCH_SIZE and emits one
+    chunk per batch, so memory stays constant regardless of export size.
+    """
+    cursor = db.orders.find(query, {"_id": 0}).sort("created_at", 1).batch_size(EXPORT_BATCH_SIZE)
+    buffer = io.StringIO()
+    writer = None
+    if export_format == "csv":
+        writer = csv.DictWriter(buffer, fieldnames=EXPORT_COLUMNS, extrasaction="ignore")
+        writer.writeheader()
+    rows_in_buffer = 0
+    try:
+        async for order in cursor:
+            for row in flatten_order(order):
+                if writer is not None:
+                    writer.writerow({k: csv_safe(v) for k, v in row.items()})
+                else:
+                    buffer.write(fast_json_dumps(row).decode("utf-8"))
+                    buffer.write("\n")
+                rows_in_buffer += 1
+            if rows_in_buffer >= EXPORT_BATCH_SIZE:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+                rows_in_buffer = 0
+        if buffer.tell():
+            yield buffer.getvalue()
+    finally:
+        await cursor.close()
+
+
+@api_router.get("/admin/orders/export")
+async def export_orders(
+    export_format: str = Query(default="csv", alias="format", pattern="^(csv|ndjson)$"),
+    status: Optional[str] = None,
+    from_date: Optional[datetime] = Query(default=None, alias="from", description="Created at or after (ISO 8601)"),
+    to_date: Optional[datetime] = Query(default=None, alias="to", description="Created before (ISO 8601)"),
+    current_admin: dict = Depends(get_current_admin)
+):
+    """
+    Export orders as a streamed CSV or NDJSON download (admin only).
+    
+    One row per order line item; order-level columns are repeated on each
+    row. Accepts the same filters as `/api/admin/orders` with no row limit.
+    """
+    query = build_order_query(status, from_date, to_date)
+    media_type = "text/csv" if export_format == "csv" else "application/x-ndjson"
+    filename = f"orders-{datetime.now(timezone.utc):%Y%m%d-%H%M%S}.{export_format}"
+    logger.info(f"Order export ({export_format}) started by admin {current_admin['email']}: {query}")
+    return StreamingResponse(
+        stream_order_export(query, export_format),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
 @api_router.put("/admin/orders/{order_id}/status")
 async def update_order_status(
     order_id: str,
@@ -788,7 +1787,7 @@ async def update_order_status(
     current_admin: dict = Depends(get_current_admin)
 ):
     """Update order status (admin only)."""
-    valid_statuses = ["pending", "confirmed", "shipped", "delivered", "cancelled"]
+    valid_statuses = ORDER_STATUSES
     
     if status_update.status not in valid_statuses:
         raise HTTPException(
@@ -796,34 +1795,264 @@ async def update_order_status(
             detail=f"Invalid status. Must be one of: {', '.join(valid_statuses)}"
         )
     
-    existing = await db.orders.find_one({"id": order_id})
-    if not existing:
-        raise HTTPException(status_code=404, detail="Order not found")
-    
-    await db.orders.update_one(
+    # One atomic round trip: apply the change and get the previous status
+    previous = await db.orders.find_one_and_update(
         {"id": order_id},
-        {"$set": {"status": status_update.status}}
+        {"$set": {"status": status_update.status}},
+        projection=ORDER_PROJECTION,
+        return_document=ReturnDocument.BEFORE
     )
+    if previous is None:
+        raise HTTPException(status_code=404, detail="Order not found")
     
-    updated = await db.orders.find_one({"id": order_id}, {"_id": 0})
-    if isinstance(updated.get('created_at'), str):
-        updated['created_at'] = datetime.fromisoformat(updated['created_at']).isoformat()
+    await record_order_status_change(
+        db, order_id, previous.get("status"), status_update.status
+    )
+    await invalidate_stats()
+    if previous.get("user_id"):
+        await invalidate_order_history(previous["user_id"])
+    updated = {**previous, "status": status_update.status}
     
     logger.info(f"Order {order_id} status updated to {status_update.status} by admin {current_admin['email']}")
     
     return updated
 
+@api_router.post("/admin/orders/bulk-status")
+async def bulk_update_order_status(
+    bulk_update: OrderBulkStatusUpdate,
+    current_admin: dict = Depends(get_current_admin)
+):
+    """
+    Move many orders to one status (admin only).
+    
+    Select orders either by `order_ids` (max 1000, per-id results returned)
+    or by `filter` (status / from / to, counts returned). Only orders whose
+    current status may move to the target (see ORDER_STATUS_TRANSITIONS) are
+    updated, with one conditional `update_many` per source status.
+    """
+    target = bulk_update.status
+    if target not in ORDER_STATUSES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid status. Must be one of: {', '.join(ORDER_STATUSES)}"
+        )
+    if (bulk_update.order_ids is None) == (bulk_update.filter is None):
+        raise HTTPException(status_code=400, detail="Provide exactly one of order_ids or filter")
+    order_filter = bulk_update.filter
+    if order_filter is not None and not (order_filter.status or order_filter.from_date or order_filter.to_date):
+        # An empty filter would move every eligible order in the database
+        raise HTTPException(status_code=400, detail="filter needs at least one of status, from or to")
+    
+    sources = [s for s, targets in ORDER_STATUS_TRANSITIONS.items() if target in targets]
+    
+    if bulk_update.order_ids is not None:
+        order_ids = list(dict.fromkeys(bulk_update.order_ids))
+        current = await db.orders.find(
+            {"id": {"$in": order_ids}}, {"_id": 0, "id": 1, "status": 1, "user_id": 1}
+        ).to_list(len(order_ids))
+        current_status = {o["id"]: o.get("status") for o in current}
+        order_users = {o["id"]: o.get("user_id") for o in current}
+        
+        results = {}
+        ids_by_source = {}
+        for order_id in order_ids:
+            if order_id not in current_status:
+                results[order_id] = {"result": "not_found"}
+                continue
+            old_status = current_status[order_id]
+            if old_status == target:
+                results[order_id] = {"result": "unchanged", "status": target}
+            elif old_status not in sources:
+                results[order_id] = {"result": "invalid_transition", "status": old_status}
+            else:
+                ids_by_source.setdefault(old_status, []).append(order_id)
+        
+        affected_users = {order_users[i] for ids in ids_by_source.values() for i in ids}
+        moved = await _apply_status_moves(
+            {s: {"id": {"$in": ids}} for s, ids in ids_by_source.items()}, target
+        )
+        conflicted = []
+        for source, ids in ids_by_source.items():
+            if moved.get(source, 0) == len(ids):
+                for order_id in ids:
+                    results[order_id] = {"result": "updated", "from": source, "status": target}
+            else:
+                conflicted.extend(ids)
+        if conflicted:
+            # Some orders changed status concurrently; report what they are now
+            now = await db.orders.find(
+                {"id": {"$in": conflicted}}, {"_id": 0, "id": 1, "status": 1}
+            ).to_list(len(conflicted))
+            now_status = {o["id"]: o.get("status") for o in now}
+            for order_id in conflicted:
+                results[order_id] = {
+                    "result": "updated" if now_status.get(order_id) == target else "conflict",
+                    "status": now_status.get(order_id)
+                }
+        response = {
+            "status": target,
+            "updated": sum(moved.values()),
+            "results": [{"order_id": order_id, **results[order_id]} for order_id in order_ids]
+        }
+    else:
+        query = build_order_query(None, order_filter.from_date, order_filter.to_date)
+        if order_filter.status:
+            sources = [s for s in sources if s == order_filter.status]
+        # Customers whose order history may change (read before the move)
+        affected_users = set(await db.orders.distinct(
+            "user_id", {**query, "status": {"$in": sources}}
+        )) if sources else set()
+        moved = await _apply_status_moves({s: query for s in sources}, target)
+        response = {"status": target, "updated": sum(moved.values()), "moved_from": moved}
+    
+    await record_bulk_status_change(db, moved, target)
+    await invalidate_stats()
+    await asyncio.gather(*[
+        invalidate_order_history(user_id) for user_id in affected_users if user_id
+    ])
+    logger.info(
+        f"Bulk status update to {target} by admin {current_admin['email']}: "
+        f"{response['updated']} orders"
+    )
+    return response
+
+
+async def _apply_status_moves(queries_by_source: dict, target: str) -> dict:
+    """Run one conditional update_many per source status, concurrently."""
+    sources = list(queries_by_source)
+    results = await asyncio.gather(*[
+        db.orders.update_many(
+            {**queries_by_source[source], "status": source},
+            {"$set": {"status": target}}
+        )
+        for source in sources
+    ])
+    return {source: result.modified_count for source, result in zip(sources, results)}
+
+@api_router.get("/admin/cache/stats")
+async def get_cache_stats(current_admin: dict = Depends(get_current_admin)):
+    """Get hit/miss counters for the in-process caches (admin only)."""
+    return {
+        "catalog": catalog_cache.stats(),
+        "facets": facet_cache.stats(),
+        "principals": principal_cache.stats(),
+        "stats": stats_cache.stats(),
+        "order_history": order_history_cache.stats(),
+        "compressed_responses": compressed_cache.stats(),
+        "search_index": product_search_index.stats()
+    }
+
+@api_router.get("/admin/indexes")
+async def get_index_report(
+    explain: bool = Query(default=True, description="Explain registered query shapes"),
+    current_admin: dict = Depends(get_current_admin)
+):
+    """
+    Diff the declared index registry against MongoDB (admin only).
+    
+    Read-only: lists missing, conflicting and undeclared indexes and, with
+    `explain=true`, reports which registered query shapes still resolve to a
+    COLLSCAN. Missing indexes are built by `POST /admin/indexes/build`.
+    """
+    report = {"indexes": await inspect_indexes(db)}
+    if explain:
+        shapes = await explain_query_shapes(db)
+        report["query_shapes"] = shapes
+        report["collscans"] = [s for s in shapes if s.get("collscan")]
+    return jsonable_encoder(report)
+
+@api_router.post("/admin/indexes/build")
+async def build_missing_indexes(current_admin: dict = Depends(get_current_admin)):
+    """
+    Build every declared index that is missing (admin only).
+    
+    Same build as startup: runs under the `index-build` lock, so a build
+    already in progress elsewhere is reported as `pending` instead.
+    """
+    logger.info(f"Index build requested by admin {current_admin['email']}")
+    return jsonable_encoder({"indexes": await ensure_indexes(db)})
+
+@api_router.get("/admin/rate-limits/stats")
+async def get_rate_limit_stats(current_admin: dict = Depends(get_current_admin)):
+    """Get token-bucket and concurrency-cap counters for this worker (admin only)."""
+    return rate_limit_stats()
+
+@api_router.get("/admin/password-hashing/stats")
+async def get_password_hashing_stats(current_admin: dict = Depends(get_current_admin)):
+    """Get bcrypt executor concurrency and queue-time metrics (admin only)."""
+    return password_hash_metrics.snapshot()
+
 # =============================================================================
 # Categories
 # =============================================================================
 
+CATEGORIES = [
+    {"id": "new-arrivals", "name": "New Arrivals"},
+    {"id": "festive", "name": "Festive Anecdotes"},
+    {"id": "silk", "name": "Exquisite Silk"}
+]
+# Static: rendered once, tagged by content
+CATEGORIES_BODY = fast_json_dumps(CATEGORIES)
+CATEGORIES_ETAG = make_etag("categories", CATEGORIES_BODY)
+
 @api_router.get("/categories")
-async def get_categories():
-    return [
-        {"id": "new-arrivals", "name": "New Arrivals"},
-        {"id": "festive", "name": "Festive Anecdotes"},
-        {"id": "silk", "name": "Exquisite Silk"}
-    ]
+async def get_categories(request: Request):
+    if is_not_modified(request, CATEGORIES_ETAG, None):
+        return not_modified_response(CATEGORIES_ETAG, None)
+    return Response(
+        content=CATEGORIES_BODY,
+        media_type="application/json",
+        headers=validator_headers(CATEGORIES_ETAG, None)
+    )
+
+# =============================================================================
+# Metrics
+# =============================================================================
+
+METRICS_ENABLED = os.environ.get("METRICS_ENABLED", "true").lower() in ("1", "true", "yes")
+
+metrics_registry.add_collector(stats_collector(
+    "cache",
+    lambda: {
+        "catalog": catalog_cache.stats(),
+        "facets": facet_cache.stats(),
+        "principals": principal_cache.stats(),
+        "stats": stats_cache.stats(),
+        "order_history": order_history_cache.stats(),
+        "compressed_responses": compressed_cache.stats(),
+    },
+    ("entries", "hits", "misses", "errors", "evictions", "invalidations")
+))
+metrics_registry.add_collector(stats_collector(
+    "rate_limit",
+    lambda: rate_limit_stats()["buckets"],
+    ("allowed", "limited", "tracked_keys")
+))
+metrics_registry.add_collector(stats_collector(
+    "admission",
+    lambda: rate_limit_stats()["concurrency"],
+    ("limit", "active", "peak", "shed")
+))
+metrics_registry.add_collector(stats_collector(
+    "password_hash",
+    lambda: {"bcrypt": password_hash_metrics.snapshot()},
+    ("calls", "waiting", "running", "avg_queue_ms", "max_queue_ms", "avg_run_ms")
+))
+
+@app.get("/metrics", include_in_schema=False)
+async def get_metrics():
+    """
+    Prometheus text exposition for this worker.
+    
+    Served outside /api so the default nginx config does not expose it
+    publicly; scrape each worker/pod directly.
+    """
+    if not METRICS_ENABLED:
+        raise HTTPException(status_code=404, detail="Not Found")
+    return PlainTextResponse(
+        metrics_registry.render(),
+        media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
 
 # =============================================================================
 # App Configuration
@@ -840,13 +2069,145 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-@app.on_event("startup")
-async def startup_event():
-    """Initialize database indexes on application startup."""
+if COMPRESSION_ENABLED:
+    app.add_middleware(CompressionMiddleware)
+
+if DB_MONITORING_ENABLED:
+    app.add_middleware(DBStatsMiddleware)
+
+# Added last so it is the outermost middleware and times the whole stack
+if METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+
+CACHE_WARMUP_ENABLED = os.environ.get("CACHE_WARMUP", "true").lower() in ("1", "true", "yes")
+CACHE_WARMUP_TIMEOUT_SECONDS = float(os.environ.get("CACHE_WARMUP_TIMEOUT_SECONDS", "10"))
+
+# First pages the storefront requests on load: the products page (unfiltered
+# and per category) and the home page's "new arrivals" strip
+CATALOG_WARMUP_PAGES = [
+    {},
+    {"category": "new-arrivals", "limit": 4},
+    *({"category": category["id"]} for category in CATEGORIES),
+]
+
+
+async def warm_catalog_page(category: Optional[str] = None, limit: int = DEFAULT_PAGE_SIZE) -> bool:
+    """Fill the catalog cache for a first page unless it is already cached."""
+    version = catalog_version.tag
+    cache_key = f"{version}|{products_cache_key(category=category, limit=limit)}"
+    if await catalog_cache.get(cache_key) is not None:
+        return False
+    query = build_product_query(category=category)
+    page = await _query_products_page(query, page=1, limit=limit, include_description=False)
+    await cache_if_current(catalog_cache, cache_key, page, version)
+    return True
+
+
+async def warm_facets() -> bool:
+    version = catalog_version.tag
+    cache_key = f"{version}|{make_cache_key()}"
+    if await facet_cache.get(cache_key) is not None:
+        return False
+    facets = await _aggregate_product_facets(None, None, None, None, None, None)
+    await cache_if_current(facet_cache, cache_key, facets, version)
+    return True
+
+
+async def warm_caches() -> int:
+    """
+    Pre-fill hot catalog pages and facets concurrently.
+    
+    Entries already present (e.g. warmed by another worker through the
+    shared backend) are skipped. Categories are static and pre-rendered at
+    import. Returns the number of entries filled.
+    """
+    results = await asyncio.gather(
+        *(warm_catalog_page(**params) for params in CATALOG_WARMUP_PAGES),
+        warm_facets(),
+        return_exceptions=True
+    )
+    for result in results:
+        if isinstance(result, Exception):
+            logger.warning(f"Cache warm-up entry failed: {result}")
+    return sum(1 for result in results if result is True)
+
+
+# Collections read with `created_at` sorts, cursors and date ranges
+DATE_MIGRATION_COLLECTIONS = ("products", "orders")
+DATE_MIGRATION_CHECK = os.environ.get("DATE_MIGRATION_CHECK", "true").lower() in ("1", "true", "yes")
+
+
+async def check_date_migration():
+    """
+    Refuse to start while `created_at` strings remain (see migrate_dates.py).
+    
+    String and date values sort into separate BSON type brackets, so mixed
+    collections page and filter incorrectly. The probe uses the created_at
+    indexes; if MongoDB is unreachable it is skipped rather than blocking boot.
+    """
+    if not DATE_MIGRATION_CHECK:
+        return
+    try:
+        found = await asyncio.gather(*(
+            db[name].find_one({"created_at": {"$type": "string"}}, {"_id": 1})
+            for name in DATE_MIGRATION_COLLECTIONS
+        ))
+    except Exception as e:
+        logger.warning(f"Could not check for unmigrated created_at values: {e}")
+        return
+    pending = [name for name, doc in zip(DATE_MIGRATION_COLLECTIONS, found) if doc is not None]
+    if pending:
+        raise RuntimeError(
+            f"created_at is still stored as strings in {', '.join(pending)}; "
+            "run `python migrate_dates.py` before starting this version"
+        )
+
+
+async def timed(phase: str, awaitable, timings: dict):
+    """Await `awaitable`, recording its duration in milliseconds."""
+    started = time.perf_counter()
+    try:
+        return await awaitable
+    finally:
+        timings[phase] = round((time.perf_counter() - started) * 1000, 1)
+
+
+async def startup():
+    """
+    Bring the worker up: shared cache, indexes, search index, warm caches.
+    
+    Index verification (builds run under a cross-worker lock) and the search
+    index load run concurrently; warm-up is bounded by a timeout so a slow
+    database delays readiness by at most CACHE_WARMUP_TIMEOUT_SECONDS.
+    Phase timings are logged.
+    """
+    started = time.perf_counter()
+    timings = {}
     logger.info("Application starting up...")
-    await create_indexes()
-    logger.info("Application startup complete")
+    logger.info(describe_db_config(mongo_client_options, catalog_read_preference))
+    await timed("dates", check_date_migration(), timings)
+    await timed("cache", start_cache(), timings)
+    await asyncio.gather(
+        timed("indexes", create_indexes(), timings),
+        timed("search_index", load_search_index(), timings)
+    )
+    if CACHE_WARMUP_ENABLED:
+        try:
+            warmed = await timed(
+                "warmup",
+                asyncio.wait_for(warm_caches(), CACHE_WARMUP_TIMEOUT_SECONDS),
+                timings
+            )
+            logger.info(f"Cache warm-up filled {warmed} entries")
+        except asyncio.TimeoutError:
+            logger.warning(f"Cache warm-up timed out after {CACHE_WARMUP_TIMEOUT_SECONDS}s")
+    total = round((time.perf_counter() - started) * 1000, 1)
+    phases = ", ".join(f"{phase} {ms}ms" for phase, ms in timings.items())
+    logger.info(
+        f"Application startup complete in {total}ms ({phases}); "
+        f"cache backend: {cache_backend.name}"
+    )
 
-@app.on_event("shutdown")
-async def shutdown_db_client():
+async def shutdown():
+    await stop_cache()
     client.close()
@@ -6,6 +6,7 @@ import { useAuth } from '@/context/AuthContext';
 import axios from 'axios';
 
 const BACKEND_URL = process.env.REACT_APP_BACKEND_URL;
+const ORDERS_PAGE_SIZE = 20;
 
 const statusConfig = {
   pending: { icon: Clock, color: 'text-yellow-600 bg-yellow-100', label: 'Pending' },
@@ -20,6 +21,30 @@ export default function MyOrdersPage() {
   const { isAuthenticated, token, loading: authLoading } = useAuth();
   const [orders, setOrders] = useState([]);
   const [loading, setLoading] = useState(true);
+  const [nextCursor, setNextCursor] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
+
+  const fetchOrdersPage = async (cursor) => {
+    const response = await axios.get(`${BACKEND_URL}/api/auth/orders`, {
+      headers: { Authorization: `Bearer ${token}` },
+      params: { limit: ORDERS_PAGE_SIZE, ...(cursor ? { cursor } : {}) },
+    });
+    setNextCursor(response.data.next_cursor || null);
+    return response.data.orders || [];
+  };
+
+  const loadMoreOrders = async () => {
+    if (!nextCursor || loadingMore) return;
+    setLoadingMore(true);
+    try {
+      const more = await fetchOrdersPage(nextCursor);
+      setOrders((previous) => [...previous, ...more]);
+    } catch (error) {
+      console.error('Failed to fetch more orders:', error);
+    } finally {
+      setLoadingMore(false);
+    }
+  };
 
   useEffect(() => {
     if (!authLoading && !isAuthenticated) {
@@ -31,10 +56,7 @@ export default function MyOrdersPage() {
       if (!token) return;
       
       try {
-        const response = await axios.get(`${BACKEND_URL}/api/auth/orders`, {
-          headers: { Authorization: `Bearer ${token}` },
-        });
-        setOrders(response.data.orders || []);
+        setOrders(await fetchOrdersPage(null));
       } catch (error) {
         console.error('Failed to fetch orders:', error);
       } finally {
@@ -45,7 +67,7 @@ export default function MyOrdersPage() {
     if (isAuthenticated) {
       fetchOrders();
     }
-  }, [isAuthenticated, authLoading, token, navigate]);
+  }, [isAuthenticated, authLoading, token, navigate]); // eslint-disable-line react-hooks/exhaustive-deps
 
   if (authLoading || loading) {
     return (
@@ -89,7 +111,7 @@ export default function MyOrdersPage() {
                   key={order.id}
                   initial={{ opacity: 0, y: 20 }}
                   animate={{ opacity: 1, y: 0 }}
-                  transition={{ delay: index * 0.1 }}
+                  transition={{ delay: (index % ORDERS_PAGE_SIZE) * 0.1 }}
                   className="bg-white border border-gray-200 p-6 hover:shadow-lg transition-shadow"
                   data-testid={`order-${order.id}`}
                 >
@@ -147,6 +169,18 @@ export default function MyOrdersPage() {
                 </motion.div>
               );
             })}
+            {nextCursor && (
+              <div className="text-center pt-4">
+                <button
+                  onClick={loadMoreOrders}
+                  disabled={loadingMore}
+                  className="btn-primary inline-flex items-center gap-2 disabled:opacity-50"
+                  data-testid="load-more-orders"
+                >
+                  {loadingMore ? 'LOADING...' : 'LOAD MORE ORDERS'}
+                </button>
+              </div>
+            )}
           </div>
         )}
       </div>
@@ -0,0 +1,141 @@
+import asyncio
+from datetime import datetime, timezone
+
+import pytest
+
+import cache
+from cache import Cache, LRUCache, MemoryCacheBackend, deserialize, make_cache_key, serialize
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(cache.time, "monotonic", fake)
+    return fake
+
+
+@pytest.fixture
+def memory_backend(monkeypatch):
+    backend = MemoryCacheBackend()
+    monkeypatch.setattr(cache, "cache_backend", backend)
+    return backend
+
+
+class BrokenBackend(MemoryCacheBackend):
+    async def get(self, cache, key):
+        raise ConnectionError("down")
+
+    async def set(self, cache, key, value):
+        raise ConnectionError("down")
+
+
+def test_lru_evicts_least_recently_used():
+    lru = LRUCache("test", max_entries=2)
+    lru.set("a", 1)
+    lru.set("b", 2)
+    # Reading "a" makes "b" the oldest
+    assert lru.get("a") == 1
+    lru.set("c", 3)
+    assert lru.get("b") is None
+    assert lru.get("a") == 1 and lru.get("c") == 3
+    assert lru.stats()["evictions"] == 1
+
+
+def test_lru_entries_expire_after_ttl(clock):
+    lru = LRUCache("test", ttl_seconds=30)
+    lru.set("a", 1)
+    clock.now += 29.9
+    assert lru.get("a") == 1
+    clock.now += 0.1
+    assert lru.get("a") is None
+    assert lru.stats()["entries"] == 0
+
+
+def test_lru_without_ttl_never_expires(clock):
+    lru = LRUCache("test")
+    lru.set("a", 1)
+    clock.now += 10 ** 6
+    assert lru.get("a") == 1
+
+
+def test_lru_set_refreshes_expiry(clock):
+    lru = LRUCache("test", ttl_seconds=30)
+    lru.set("a", 1)
+    clock.now += 20
+    lru.set("a", 2)
+    clock.now += 20
+    assert lru.get("a") == 2
+
+
+def test_lru_stats_and_invalidation():
+    lru = LRUCache("test")
+    lru.set("a", 1)
+    lru.get("a")
+    lru.get("missing")
+    lru.clear()
+    assert lru.get("a") is None
+    stats = lru.stats()
+    assert (stats["hits"], stats["misses"], stats["invalidations"]) == (1, 2, 1)
+    assert stats["hit_ratio"] == pytest.approx(1 / 3, abs=1e-4)
+
+
+def test_cache_key_normalizes_equivalent_requests():
+    assert make_cache_key(search="silk ", page=1, color=None) == make_cache_key(page=1, search="silk")
+    assert make_cache_key(search="  ") == make_cache_key()
+    assert make_cache_key(page=1) != make_cache_key(page=2)
+
+
+def test_serialize_preserves_datetimes():
+    value = {"created_at": datetime(2024, 11, 5, 10, 30, tzinfo=timezone.utc), "items": [1, "a"]}
+    assert deserialize(serialize(value)) == value
+
+
+def test_cache_goes_through_memory_backend(memory_backend, clock):
+    products = Cache("products", max_entries=1, ttl_seconds=30)
+
+    async def run():
+        assert await products.get("a") is None
+        await products.set("a", {"id": "a"})
+        assert await products.get("a") == {"id": "a"}
+        await products.set("b", {"id": "b"})
+        assert await products.get("a") is None
+        clock.now += 30
+        assert await products.get("b") is None
+        await products.set("c", 1)
+        await products.delete("c")
+        assert await products.get("c") is None
+
+    asyncio.run(run())
+    stats = products.stats()
+    assert stats["backend"] == "memory"
+    assert (stats["hits"], stats["misses"], stats["errors"]) == (1, 4, 0)
+    assert stats["evictions"] == 1
+
+
+def test_backend_failures_degrade_to_misses(monkeypatch):
+    monkeypatch.setattr(cache, "cache_backend", BrokenBackend())
+    products = Cache("products")
+
+    async def run():
+        await products.set("a", 1)
+        return await products.get("a")
+
+    assert asyncio.run(run()) is None
+    assert products.stats()["errors"] == 2
+    assert products.stats()["misses"] == 1
+
+
+def test_memory_backend_catalog_entries_have_a_ttl():
+    # Per-process catalog pages must expire for workers that missed a write
+    if cache.cache_backend.shared:
+        pytest.skip("shared backend configured")
+    assert cache.catalog_cache.ttl_seconds == cache.CATALOG_CACHE_TTL_SECONDS
+    assert cache.facet_cache.ttl_seconds == cache.CATALOG_CACHE_TTL_SECONDS
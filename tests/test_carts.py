@@ -0,0 +1,244 @@
+import asyncio
+import copy
+from types import SimpleNamespace
+
+import pytest
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+from carts import (
+    add_line,
+    cart_filter,
+    cart_total,
+    claim_cart,
+    find_cart,
+    merge_guest_cart,
+    open_cart,
+    restore_cart,
+)
+
+
+# =============================================================================
+# In-memory stand-in for the carts collection
+# =============================================================================
+#
+# Implements only the filter and update operators carts.py uses, with the
+# unique `id` and sparse unique `user_id` indexes. Each call runs without
+# awaiting in between, like a single-document MongoDB operation.
+
+class FakeCarts:
+    def __init__(self):
+        self.docs = []
+
+    @staticmethod
+    def _line_index(doc, product_id):
+        for i, line in enumerate(doc.get("items", [])):
+            if line["product_id"] == product_id:
+                return i
+        return None
+
+    def _matches(self, doc, match):
+        for key, expected in match.items():
+            if key == "items.product_id":
+                found = self._line_index(doc, expected["$ne"] if isinstance(expected, dict) else expected)
+                if (found is None) != isinstance(expected, dict):
+                    return False
+            elif key == "items.0":
+                if bool(doc.get("items")) != expected["$exists"]:
+                    return False
+            elif doc.get(key) != expected:
+                return False
+        return True
+
+    def _check_unique(self, doc, ignore=None):
+        for other in self.docs:
+            if other is ignore:
+                continue
+            if other["id"] == doc["id"] or (doc.get("user_id") and other.get("user_id") == doc["user_id"]):
+                raise DuplicateKeyError("duplicate key")
+
+    @staticmethod
+    def _project(doc, projection):
+        doc = copy.deepcopy(doc)
+        doc.pop("_id", None)
+        included = [k for k, v in (projection or {}).items() if v and k != "_id"]
+        return {k: doc[k] for k in included if k in doc} if included else doc
+
+    def _apply(self, doc, match, update):
+        position = self._line_index(doc, match.get("items.product_id"))
+        for op, fields in update.items():
+            for path, value in fields.items():
+                if path.startswith("items.$."):
+                    line = doc["items"][position]
+                    field = path[len("items.$."):]
+                    line[field] = line[field] + value if op == "$inc" else value
+                elif op == "$set":
+                    doc[path] = value
+                elif op == "$push":
+                    doc.setdefault(path, []).append(copy.deepcopy(value))
+                elif op == "$pull":
+                    doc[path] = [line for line in doc.get(path, []) if line["product_id"] != value["product_id"]]
+
+    async def find_one(self, match, projection=None):
+        for doc in self.docs:
+            if self._matches(doc, match):
+                return self._project(doc, projection)
+        return None
+
+    async def find_one_and_update(self, match, update, projection=None, upsert=False,
+                                  return_document=ReturnDocument.BEFORE):
+        for doc in self.docs:
+            if self._matches(doc, match):
+                before = self._project(doc, projection)
+                updated = copy.deepcopy(doc)
+                self._apply(updated, match, update)
+                self._check_unique(updated, ignore=doc)
+                doc.clear()
+                doc.update(updated)
+                return self._project(doc, projection) if return_document == ReturnDocument.AFTER else before
+        if not upsert:
+            return None
+        doc = {k: v for k, v in match.items() if not isinstance(v, dict)}
+        doc.update(copy.deepcopy(update.get("$setOnInsert", {})))
+        self._apply(doc, match, {k: v for k, v in update.items() if k != "$setOnInsert"})
+        self._check_unique(doc)
+        self.docs.append(doc)
+        return self._project(doc, projection) if return_document == ReturnDocument.AFTER else None
+
+    async def find_one_and_delete(self, match, projection=None):
+        for doc in self.docs:
+            if self._matches(doc, match):
+                self.docs.remove(doc)
+                return self._project(doc, projection)
+        return None
+
+    async def insert_one(self, doc):
+        doc = copy.deepcopy(doc)
+        self._check_unique(doc)
+        self.docs.append(doc)
+
+    async def delete_one(self, match):
+        for doc in self.docs:
+            if self._matches(doc, match):
+                self.docs.remove(doc)
+                return SimpleNamespace(deleted_count=1)
+        return SimpleNamespace(deleted_count=0)
+
+
+@pytest.fixture
+def db():
+    return {"carts": FakeCarts()}
+
+
+def line(product_id, quantity=1, price=100.0):
+    return {
+        "product_id": product_id, "quantity": quantity,
+        "product_name": f"Saree {product_id}", "product_image": "", "product_price": price,
+    }
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def test_open_cart_returns_the_users_single_cart(db):
+    first = run(open_cart(db, "u1"))
+    second = run(open_cart(db, "u1"))
+    assert first["id"] == second["id"]
+    assert len(db["carts"].docs) == 1
+    guest = run(open_cart(db))
+    assert "user_id" not in guest
+
+
+def test_add_line_increments_and_refreshes_snapshot(db):
+    cart = run(open_cart(db, "u1"))
+    match = cart_filter(cart["id"], "u1")
+    run(add_line(db, match, line("p1", 2)))
+    cart = run(add_line(db, match, line("p1", 1, price=90.0)))
+    run(add_line(db, match, line("p2")))
+    cart = run(find_cart(db, cart["id"], "u1"))
+    assert [(item["product_id"], item["quantity"]) for item in cart["items"]] == [("p1", 3), ("p2", 1)]
+    assert cart["items"][0]["product_price"] == 90.0
+    assert cart_total(cart) == 370.0
+
+
+def test_add_line_to_missing_cart_returns_none(db):
+    assert run(add_line(db, cart_filter("nope", None), line("p1"))) is None
+
+
+def test_claim_cart_hands_a_cart_to_one_checkout_only(db):
+    cart = run(open_cart(db, "u1"))
+    match = cart_filter(cart["id"], "u1")
+    run(add_line(db, match, line("p1")))
+
+    async def checkout_twice():
+        return await asyncio.gather(claim_cart(db, match), claim_cart(db, match))
+
+    claims = run(checkout_twice())
+    assert sum(claim is not None for claim in claims) == 1
+    assert run(find_cart(db, cart["id"], "u1")) is None
+
+
+def test_empty_cart_is_not_claimed(db):
+    cart = run(open_cart(db, "u1"))
+    assert run(claim_cart(db, cart_filter(cart["id"], "u1"))) is None
+    assert run(find_cart(db, cart["id"], "u1")) is not None
+
+
+def test_claim_requires_the_owner(db):
+    cart = run(open_cart(db, "u1"))
+    run(add_line(db, cart_filter(cart["id"], "u1"), line("p1")))
+    assert run(claim_cart(db, cart_filter(cart["id"], "u2"))) is None
+    assert run(claim_cart(db, cart_filter(cart["id"], None))) is None
+
+
+def test_restore_cart_puts_a_failed_checkout_back(db):
+    cart = run(open_cart(db, "u1"))
+    match = cart_filter(cart["id"], "u1")
+    run(add_line(db, match, line("p1", 2)))
+    claimed = run(claim_cart(db, match))
+    run(restore_cart(db, claimed))
+    assert run(find_cart(db, cart["id"], "u1"))["items"][0]["quantity"] == 2
+
+
+def test_restore_cart_merges_into_a_newer_cart(db):
+    cart = run(open_cart(db, "u1"))
+    run(add_line(db, cart_filter(cart["id"], "u1"), line("p1", 2)))
+    claimed = run(claim_cart(db, cart_filter(cart["id"], "u1")))
+    # The customer started a new cart while the checkout was failing
+    new_cart = run(open_cart(db, "u1"))
+    run(add_line(db, cart_filter(new_cart["id"], "u1"), line("p1", 1)))
+    run(restore_cart(db, claimed))
+    carts = db["carts"].docs
+    assert len(carts) == 1
+    assert carts[0]["id"] == new_cart["id"]
+    assert carts[0]["items"][0]["quantity"] == 3
+
+
+def test_restore_guest_cart_never_merges_into_other_guests(db):
+    guest = run(open_cart(db))
+    other = run(open_cart(db))
+    run(add_line(db, cart_filter(other["id"], None), line("p9")))
+    # Same id as an existing guest cart: nothing to merge into safely
+    run(restore_cart(db, {**guest, "items": [line("p1")]}))
+    other = run(find_cart(db, other["id"], None))
+    assert [item["product_id"] for item in other["items"]] == ["p9"]
+
+
+def test_merge_guest_cart_claims_it_when_user_has_none(db):
+    guest = run(open_cart(db))
+    run(add_line(db, cart_filter(guest["id"], None), line("p1")))
+    assert run(merge_guest_cart(db, guest["id"], "u1")) == guest["id"]
+    assert run(find_cart(db, guest["id"], "u1"))["items"][0]["product_id"] == "p1"
+
+
+def test_merge_guest_cart_folds_lines_into_users_cart(db):
+    user_cart = run(open_cart(db, "u1"))
+    run(add_line(db, cart_filter(user_cart["id"], "u1"), line("p1", 1)))
+    guest = run(open_cart(db))
+    run(add_line(db, cart_filter(guest["id"], None), line("p1", 2)))
+    run(add_line(db, cart_filter(guest["id"], None), line("p2", 1)))
+    assert run(merge_guest_cart(db, guest["id"], "u1")) == user_cart["id"]
+    merged = run(find_cart(db, user_cart["id"], "u1"))
+    assert [(item["product_id"], item["quantity"]) for item in merged["items"]] == [("p1", 3), ("p2", 1)]
+    assert run(find_cart(db, guest["id"], None)) is None
@@ -0,0 +1,153 @@
+import asyncio
+from datetime import datetime, timezone
+
+import pytest
+
+import cache
+from cache import CATALOG_VERSION_ID, CatalogVersion, MongoCatalogVersionStore
+
+MODIFIED = datetime(2024, 11, 5, tzinfo=timezone.utc)
+
+
+class FakeVersionCollection:
+    def __init__(self):
+        self.doc = {"_id": CATALOG_VERSION_ID, "epoch": "e1", "counter": 0, "modified": MODIFIED, "changes": []}
+
+    async def find_one(self, filter, projection=None):
+        return dict(self.doc)
+
+
+class FakeVersionStore(MongoCatalogVersionStore):
+    """The Mongo store with the atomic bump done in Python."""
+
+    def __init__(self):
+        super().__init__(FakeVersionCollection())
+
+    async def read_version(self):
+        return self._version(self.collection.doc)
+
+    async def bump_version(self, product_ids=None):
+        doc = self.collection.doc
+        doc["counter"] += 1
+        doc["changes"] = (doc["changes"] + [{"counter": doc["counter"], "product_ids": product_ids}])[
+            -cache.RECENT_CHANGES_LIMIT:
+        ]
+        return self._version(doc)
+
+
+@pytest.fixture
+def store(monkeypatch):
+    fake = FakeVersionStore()
+    monkeypatch.setattr(cache, "catalog_version", CatalogVersion())
+    monkeypatch.setattr(cache, "_mongo_version_store", fake)
+    monkeypatch.setattr(cache, "_catalog_listeners", [])
+    return fake
+
+
+@pytest.fixture
+def notified(store):
+    seen = []
+
+    async def listener(product_ids):
+        seen.append(product_ids)
+
+    cache.add_catalog_listener(listener)
+    return seen
+
+
+def test_apply_returns_replaced_counter():
+    version = CatalogVersion()
+    assert version.apply("s", 3, MODIFIED) == -1
+    assert version.apply("s", 5, MODIFIED) == 3
+    assert version.apply("s", 4, MODIFIED) is None
+    assert version.apply("s", 5, MODIFIED) is None
+    assert version.tag == "s:5"
+    # A new scope says nothing about the versions in between
+    assert version.apply("t", 1, MODIFIED) == -1
+
+
+def test_changes_since_collects_skipped_ids():
+    doc = {"counter": 4, "changes": [
+        {"counter": 2, "product_ids": ["a"]},
+        {"counter": 3, "product_ids": ["b", "a"]},
+        {"counter": 4, "product_ids": ["c"]},
+    ]}
+    store = MongoCatalogVersionStore(None)
+    assert store.changes_since(doc, 1) == ["a", "b", "c"]
+    assert store.changes_since(doc, 3) == ["c"]
+    # Unknown ids (None) or entries no longer kept mean a full refresh
+    assert store.changes_since(doc, 0) is None
+    doc["changes"][1]["product_ids"] = None
+    assert store.changes_since(doc, 2) is None
+
+
+def test_own_write_catches_up_on_overtaken_versions(store, notified):
+    async def run():
+        await cache.start_cache()
+        await cache.invalidate_catalog(["p1"])
+        # Another worker writes counter 2; this worker writes 3 before
+        # adopting it, so the event for 2 will look stale
+        await store.bump_version(["p2"])
+        await cache.invalidate_catalog(["p3"])
+        await cache.stop_cache()
+
+    asyncio.run(run())
+    assert cache.catalog_version.counter == 3
+    assert notified == [["p2", "p3"]]
+
+
+def test_own_write_in_sequence_notifies_nobody(store, notified):
+    async def run():
+        await cache.start_cache()
+        await cache.invalidate_catalog(["p1"])
+        await cache.invalidate_catalog(["p2"])
+        await cache.stop_cache()
+
+    asyncio.run(run())
+    assert cache.catalog_version.counter == 2
+    assert notified == []
+
+
+def broadcast(counter, product_ids):
+    return {
+        "type": "catalog", "origin": "other-worker", "scope": "mongo.e1", "counter": counter,
+        "last_modified": MODIFIED.isoformat(), "product_ids": product_ids,
+    }
+
+
+async def fire_out_of_order(store):
+    # Counters 3, 4 and 5 were written elsewhere; 4's event arrives last
+    for counter in range(1, 6):
+        await store.bump_version([f"p{counter}"])
+    cache.catalog_version.apply("mongo.e1", 2, MODIFIED)
+    for counter in (3, 5, 4):
+        await cache._handle_cache_event(broadcast(counter, [f"p{counter}"]))
+
+
+def test_out_of_order_events_keep_skipped_ids(store, notified):
+    asyncio.run(fire_out_of_order(store))
+    assert cache.catalog_version.counter == 5
+    assert notified == [["p3"], ["p4", "p5"]]
+
+
+def test_out_of_order_events_without_change_log_refresh_everything(store, notified, monkeypatch):
+    async def no_log(counter):
+        return None
+
+    monkeypatch.setattr(store, "changes_after", no_log)
+    asyncio.run(fire_out_of_order(store))
+    assert notified == [["p3"], None]
+
+
+def test_poll_reports_every_version_since_the_last_one_seen(store, notified):
+    async def run():
+        await cache.start_cache()
+        await store.bump_version(["p1"])
+        await store.bump_version(["p2"])
+        await store.poll_once(cache._handle_cache_event)
+        await store.poll_once(cache._handle_cache_event)
+        await cache.stop_cache()
+
+    asyncio.run(run())
+    assert cache.catalog_version.counter == 2
+    assert notified == [["p1", "p2"]]
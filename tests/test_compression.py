@@ -0,0 +1,39 @@
+import gzip
+
+import pytest
+
+import compression
+from compression import compress, negotiate_encoding
+
+
+@pytest.fixture
+def gzip_only(monkeypatch):
+    monkeypatch.setattr(compression, "brotli", None)
+
+
+def test_prefers_brotli_when_available():
+    if compression.brotli is None:
+        pytest.skip("brotli not installed")
+    assert negotiate_encoding("gzip, deflate, br") == "br"
+
+
+def test_gzip_without_brotli(gzip_only):
+    assert negotiate_encoding("gzip, deflate, br") == "gzip"
+
+
+@pytest.mark.parametrize("header", ["", "identity", "deflate", "gzip;q=0", "*;q=0"])
+def test_no_acceptable_encoding(gzip_only, header):
+    assert negotiate_encoding(header) is None
+
+
+def test_q_values_and_wildcard(gzip_only):
+    assert negotiate_encoding("GZIP;q=0.5") == "gzip"
+    assert negotiate_encoding("*") == "gzip"
+    assert negotiate_encoding("gzip;q=bad") is None
+
+
+def test_gzip_output_is_deterministic():
+    body = b'{"products": []}' * 100
+    first = compress(body, "gzip")
+    assert gzip.decompress(first) == body
+    assert compress(body, "gzip") == first
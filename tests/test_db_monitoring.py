@@ -0,0 +1,133 @@
+import asyncio
+import os
+import uuid
+from types import SimpleNamespace
+
+import pytest
+
+from db_monitoring import CommandMonitor, command_shape, current_db_stats, filter_shape, track_db_commands
+
+
+def command_events(monitor: CommandMonitor, name: str, micros: int, failed: bool = False, request_id: int = 1):
+    event = SimpleNamespace(
+        connection_id=("localhost", 27017),
+        request_id=request_id,
+        command_name=name,
+        command={name: "orders", "filter": {"status": "pending"}},
+        database_name="test",
+        duration_micros=micros,
+    )
+    monitor.started(event)
+    (monitor.failed if failed else monitor.succeeded)(event)
+
+
+def test_track_db_commands_counts_commands_in_block():
+    monitor = CommandMonitor(slow_query_ms=-1)
+    with track_db_commands() as stats:
+        command_events(monitor, "find", 1500)
+        command_events(monitor, "find", 500, request_id=2)
+        command_events(monitor, "insert", 1000, failed=True, request_id=3)
+    # Outside the block nothing is attributed
+    command_events(monitor, "find", 1000, request_id=4)
+
+    assert current_db_stats() is None
+    assert stats.as_dict() == {
+        "commands": 3,
+        "failures": 1,
+        "duration_ms": 3.0,
+        "by_command": {"find": 2, "insert": 1},
+    }
+
+
+def test_nested_tracking_is_isolated():
+    monitor = CommandMonitor(slow_query_ms=-1)
+    with track_db_commands() as outer:
+        command_events(monitor, "find", 100)
+        with track_db_commands() as inner:
+            command_events(monitor, "update", 100, request_id=2)
+        assert current_db_stats() is outer
+    assert outer.by_command == {"find": 1}
+    assert inner.by_command == {"update": 1}
+
+
+def test_slow_commands_are_logged_with_shape(caplog):
+    monitor = CommandMonitor(slow_query_ms=10)
+    with caplog.at_level("WARNING", logger="db_monitoring"):
+        command_events(monitor, "find", 5_000)
+        command_events(monitor, "find", 50_000, request_id=2)
+    messages = [r.getMessage() for r in caplog.records]
+    assert len(messages) == 1
+    assert "test.orders took 50.0ms" in messages[0]
+    assert "{'filter': {'status': '?'}}" in messages[0]
+
+
+def test_filter_shape_hides_values():
+    assert filter_shape({"$or": [{"name": "x"}, {"price": {"$gte": 5}}], "id": {"$in": ["a", "b"]}}) == {
+        "$or": [{"name": "?"}, {"price": {"$gte": "?"}}],
+        "id": {"$in": "?"},
+    }
+
+
+def test_update_batches_are_truncated():
+    updates = [{"q": {"id": str(i)}, "u": {}} for i in range(5)]
+    assert command_shape("update", {"update": "orders", "updates": updates}) == {
+        "updates": [{"id": "?"}] * 3,
+        "updates_total": 5,
+    }
+
+
+# =============================================================================
+# create_order against a real MongoDB (set TEST_MONGO_URL to run)
+# =============================================================================
+
+TEST_MONGO_URL = os.environ.get("TEST_MONGO_URL")
+
+
+@pytest.fixture(scope="module")
+def server_module():
+    if not TEST_MONGO_URL:
+        pytest.skip("TEST_MONGO_URL not set")
+    os.environ["MONGO_URL"] = TEST_MONGO_URL
+    os.environ["DB_NAME"] = f"test_{uuid.uuid4().hex[:8]}"
+    import server
+    yield server
+    server.client.close()
+
+
+def test_create_order_command_count(server_module):
+    server = server_module
+
+    async def scenario():
+        db = server.db
+        try:
+            await db.products.insert_one({
+                "id": "p1", "name": "Silk Saree", "image_url": "https://example.com/1.jpg", "price": 1000.0
+            })
+            order = server.OrderCreate(
+                customer_name="Test",
+                customer_email="test@example.com",
+                customer_phone="9999999999",
+                items=[{"product_id": "p1", "quantity": 2}],
+                payment_method="cod",
+            )
+            with track_db_commands() as stats:
+                await server.create_order(order, None)
+            # Batched product lookup, order insert, dashboard rollup
+            assert stats.commands <= 3, stats.as_dict()
+            assert stats.by_command.get("find") == 1
+
+            cart = await server.open_cart(db)
+            await server.add_line(db, {"id": cart["id"]}, {
+                "product_id": "p1", "quantity": 1, "product_name": "Silk Saree",
+                "product_image": "https://example.com/1.jpg", "product_price": 1000.0,
+            })
+            order = order.model_copy(update={"items": [], "cart_id": cart["id"]})
+            with track_db_commands() as stats:
+                await server.create_order(order, None)
+            # Cart claim replaces the product lookup
+            assert stats.commands <= 3, stats.as_dict()
+            assert "find" not in stats.by_command
+        finally:
+            await server.client.drop_database(os.environ["DB_NAME"])
+
+    asyncio.run(scenario())
@@ -0,0 +1,89 @@
+import asyncio
+
+from indexes import INDEX_REGISTRY, diff_indexes, index_name, inspect_indexes
+
+
+def existing(*indexes):
+    info = {"_id_": {"key": [("_id", 1)]}}
+    for keys, options in indexes:
+        info[index_name(keys)] = {"key": keys, **options}
+    return info
+
+
+def test_index_name_matches_mongodb_default():
+    assert index_name([("created_at", -1), ("status", 1)]) == "created_at_-1_status_1"
+
+
+def test_missing_indexes_are_reported():
+    specs = [{"keys": [("id", 1)], "unique": True}, {"keys": [("category", 1)]}]
+    report = diff_indexes(specs, existing(([("id", 1)], {"unique": True})))
+    assert report["missing"] == [{"keys": [("category", 1)]}]
+    assert report["present"] == ["id_1"]
+    assert report["conflicts"] == []
+    assert report["unmanaged"] == []
+
+
+def test_option_mismatch_is_a_conflict_not_missing():
+    specs = [{"keys": [("id", 1)], "unique": True}]
+    report = diff_indexes(specs, existing(([("id", 1)], {})))
+    assert report["missing"] == []
+    assert report["conflicts"] == [{"name": "id_1", "declared": {"unique": True}, "existing": {}}]
+
+
+def test_undeclared_indexes_are_unmanaged():
+    report = diff_indexes([], existing(([("legacy", 1)], {})))
+    assert report["unmanaged"] == ["legacy_1"]
+
+
+def test_key_directions_are_normalized():
+    # index_information() may report directions as floats
+    specs = [{"keys": [("created_at", -1), ("id", -1)]}]
+    report = diff_indexes(specs, {"x": {"key": [("created_at", -1.0), ("id", -1.0)]}})
+    assert report["present"] == ["x"]
+
+
+def test_registry_is_fully_present_against_itself():
+    for collection, specs in INDEX_REGISTRY.items():
+        info = existing(*[
+            (spec["keys"], {k: v for k, v in spec.items() if k != "keys"}) for spec in specs
+        ])
+        report = diff_indexes(specs, info)
+        assert report["missing"] == [] and report["conflicts"] == [], collection
+
+
+class FakeCollection:
+    def __init__(self, info):
+        self.info = info
+
+    async def index_information(self):
+        return self.info
+
+    async def create_indexes(self, models):
+        raise AssertionError("inspect_indexes must not build")
+
+
+def test_inspect_indexes_reports_missing_without_building():
+    registry = {"products": [{"keys": [("id", 1)], "unique": True}, {"keys": [("category", 1)]}]}
+    db = {"products": FakeCollection(existing(([("id", 1)], {"unique": True})))}
+    report = asyncio.run(inspect_indexes(db, registry))
+    assert report == {
+        "products": {"present": ["id_1"], "missing": ["category_1"], "conflicts": [], "unmanaged": []}
+    }
+
+
+def test_special_index_types_do_not_break_the_diff():
+    specs = [{"keys": [("id", 1)], "unique": True}]
+    info = existing(([("id", 1)], {"unique": True}))
+    info["name_text"] = {"key": [("_fts", "text"), ("_ftsx", 1)]}
+    info["loc_2dsphere"] = {"key": [("loc", "2dsphere")]}
+    info["user_id_hashed"] = {"key": [("user_id", "hashed")]}
+    report = diff_indexes(specs, info)
+    assert report["present"] == ["id_1"]
+    assert sorted(report["unmanaged"]) == ["loc_2dsphere", "name_text", "user_id_hashed"]
+
+
+def test_declared_special_index_matches():
+    specs = [{"keys": [("user_id", "hashed")]}]
+    report = diff_indexes(specs, {"user_id_hashed": {"key": [("user_id", "hashed")]}})
+    assert report["present"] == ["user_id_hashed"]
+    assert report["missing"] == []
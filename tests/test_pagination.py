@@ -0,0 +1,67 @@
+import base64
+import json
+from datetime import datetime, timezone
+
+import pytest
+
+from pagination import InvalidCursorError, decode_cursor, encode_cursor, seek_filter, sort_spec
+
+
+def test_cursor_round_trip_preserves_datetimes():
+    created = datetime(2024, 11, 5, 10, 30, tzinfo=timezone.utc)
+    cursor = encode_cursor(s="newest", v=created, id="abc")
+    assert "=" not in cursor
+    assert decode_cursor(cursor) == {"s": "newest", "v": created, "id": "abc"}
+
+
+def test_cursor_round_trip_plain_values():
+    assert decode_cursor(encode_cursor(s="price_asc", v=2500.0, id="p1")) == {
+        "s": "price_asc", "v": 2500.0, "id": "p1"
+    }
+
+
+@pytest.mark.parametrize("cursor", ["not-base64!", "bm90IGpzb24", "%%%"])
+def test_malformed_cursor_is_rejected(cursor):
+    with pytest.raises(InvalidCursorError):
+        decode_cursor(cursor)
+
+
+def test_non_object_cursor_is_rejected():
+    # base64 of the JSON list [1]
+    with pytest.raises(InvalidCursorError):
+        decode_cursor("WzFd")
+
+
+def test_seek_filter_descending():
+    assert seek_filter("created_at", -1, "v", "id9") == {
+        "$or": [
+            {"created_at": {"$lt": "v"}},
+            {"created_at": "v", "id": {"$lt": "id9"}},
+        ]
+    }
+
+
+def test_seek_filter_ascending_matches_sort_spec():
+    assert seek_filter("price", 1, 100, "p1")["$or"][0] == {"price": {"$gt": 100}}
+    assert sort_spec("price", 1) == [("price", 1), ("id", 1)]
+    assert sort_spec("created_at", -1) == [("created_at", -1), ("id", -1)]
+
+
+@pytest.mark.parametrize("payload", [
+    {"s": "newest", "v": {"$date": "garbage"}, "id": "p1"},
+    {"s": "newest", "v": {"$date": 5}, "id": "p1"},
+    {"s": ["newest"], "v": 1, "id": "p1"},
+    {"s": "newest", "v": 1, "id": {"$gt": ""}},
+    {"s": "price_asc", "v": {"$gt": 0}, "id": "p1"},
+    {"s": "price_asc", "v": [1, 2], "id": "p1"},
+    {"s": "price_asc", "v": {"$date": "2024-11-05T00:00:00", "$ne": 1}, "id": "p1"},
+    {"s": "price_asc", "v": 1, "id": "p1", "extra": 1},
+])
+def test_tampered_cursor_is_rejected(payload):
+    cursor = base64.urlsafe_b64encode(json.dumps(payload).encode()).decode()
+    with pytest.raises(InvalidCursorError):
+        decode_cursor(cursor)
+
+
+def test_missing_sort_value_round_trips():
+    assert decode_cursor(encode_cursor(s="price_asc", v=None, id="p1"))["v"] is None
@@ -0,0 +1,52 @@
+import asyncio
+import threading
+from types import SimpleNamespace
+
+from pydantic import BaseModel
+
+from product_import import import_products, iter_jsonl_rows
+
+
+class Row(BaseModel):
+    design_no: str
+    name: str
+
+
+class FakeProducts:
+    def __init__(self):
+        self.writes = []
+
+    async def bulk_write(self, operations, ordered=True):
+        self.writes.append(len(operations))
+        return SimpleNamespace(bulk_api_result={
+            "nUpserted": len(operations), "nMatched": 0, "nModified": 0,
+        })
+
+
+def _lines(count, reader_threads):
+    for i in range(count):
+        reader_threads.add(threading.get_ident())
+        yield f'{{"design_no": "D{i}", "name": "Ring {i}"}}\n'
+    yield "not json\n"
+
+
+def test_import_reads_off_loop_and_reports_each_chunk():
+    reader_threads = set()
+    written = []
+
+    async def on_written(design_nos):
+        written.append(design_nos)
+
+    async def run():
+        collection = FakeProducts()
+        report = await import_products(
+            collection, iter_jsonl_rows(_lines(5, reader_threads)), Row, chunk_size=2, on_written=on_written
+        )
+        return collection, report, threading.get_ident()
+
+    collection, report, loop_thread = asyncio.run(run())
+    assert loop_thread not in reader_threads
+    assert collection.writes == [2, 2, 1]
+    assert written == [["D0", "D1"], ["D2", "D3"], ["D4"]]
+    assert report["inserted"] == 5
+    assert report["failed"] == 1
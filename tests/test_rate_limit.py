@@ -0,0 +1,107 @@
+import pytest
+from starlette.requests import Request
+
+import rate_limit
+from rate_limit import ConcurrencyLimiter, TokenBucketLimiter, client_ip, parse_rate
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(rate_limit.time, "monotonic", fake)
+    return fake
+
+
+def test_parse_rate():
+    assert parse_rate("10/minute") == (10, 60)
+    assert parse_rate(" 5 / second ") == (5, 1)
+    with pytest.raises(ValueError):
+        parse_rate("10 per minute")
+    with pytest.raises(ValueError):
+        parse_rate("10/day")
+
+
+def test_bucket_allows_burst_then_limits(clock):
+    limiter = TokenBucketLimiter("test", "3/minute")
+    assert [limiter.hit("ip") for _ in range(3)] == [0, 0, 0]
+    wait = limiter.hit("ip")
+    # One token refills every 20 seconds
+    assert wait == pytest.approx(20.0)
+    assert limiter.stats()["allowed"] == 3
+    assert limiter.stats()["limited"] == 1
+
+
+def test_bucket_refills_over_time(clock):
+    limiter = TokenBucketLimiter("test", "3/minute")
+    for _ in range(3):
+        limiter.hit("ip")
+    clock.now += 20
+    assert limiter.hit("ip") == 0
+    assert limiter.hit("ip") > 0
+
+
+def test_buckets_are_per_key(clock):
+    limiter = TokenBucketLimiter("test", "1/minute")
+    assert limiter.hit("a") == 0
+    assert limiter.hit("a") > 0
+    assert limiter.hit("b") == 0
+
+
+def test_tracked_keys_are_bounded(clock):
+    limiter = TokenBucketLimiter("test", "1/minute", max_keys=2)
+    for key in ("a", "b", "c"):
+        limiter.hit(key)
+    assert limiter.stats()["tracked_keys"] == 2
+    # "a" was evicted, so it starts with a full bucket again
+    assert limiter.hit("a") == 0
+
+
+def test_concurrency_limiter_sheds_excess():
+    limiter = ConcurrencyLimiter("test", 2)
+    assert limiter.try_acquire() and limiter.try_acquire()
+    assert not limiter.try_acquire()
+    limiter.release()
+    assert limiter.try_acquire()
+    assert limiter.stats() == {"limit": 2, "active": 2, "peak": 2, "shed": 1}
+
+
+def make_request(forwarded=(), peer="127.0.0.1"):
+    headers = [(b"x-forwarded-for", value.encode()) for value in forwarded]
+    return Request({"type": "http", "headers": headers, "client": (peer, 5000)})
+
+
+@pytest.fixture
+def behind_proxy(monkeypatch):
+    monkeypatch.setattr(rate_limit, "RATE_LIMIT_TRUST_PROXY", True)
+    monkeypatch.setattr(rate_limit, "RATE_LIMIT_PROXY_HOPS", 1)
+
+
+def test_client_ip_uses_peer_unless_proxy_trusted(monkeypatch):
+    monkeypatch.setattr(rate_limit, "RATE_LIMIT_TRUST_PROXY", False)
+    assert client_ip(make_request(["203.0.113.9"], peer="198.51.100.1")) == "198.51.100.1"
+
+
+def test_client_ip_ignores_client_supplied_entries(behind_proxy):
+    # The client sent "1.2.3.4"; nginx appended the address it saw
+    assert client_ip(make_request(["1.2.3.4, 203.0.113.9"])) == "203.0.113.9"
+    assert client_ip(make_request(["1.2.3.4", "203.0.113.9"])) == "203.0.113.9"
+
+
+def test_client_ip_counts_trusted_hops(behind_proxy, monkeypatch):
+    monkeypatch.setattr(rate_limit, "RATE_LIMIT_PROXY_HOPS", 2)
+    # forged, client as seen by the CDN, CDN as seen by nginx
+    assert client_ip(make_request(["1.2.3.4, 203.0.113.9, 192.0.2.7"])) == "203.0.113.9"
+    # Fewer entries than trusted proxies: the chain is misconfigured
+    assert client_ip(make_request(["192.0.2.7"])) == "127.0.0.1"
+
+
+def test_client_ip_without_header_falls_back_to_peer(behind_proxy):
+    assert client_ip(make_request()) == "127.0.0.1"
@@ -0,0 +1,112 @@
+from datetime import datetime, timezone
+
+from search import SearchIndex, tokenize
+
+PRODUCTS = [
+    {"id": "p1", "name": "Red Georgette Saree", "design_no": "D.NO.1490", "material": "Georgette",
+     "color": "Red", "description": "Light georgette drape", "category": "georgette", "price": 2500},
+    {"id": "p2", "name": "Banarasi Silk Saree", "design_no": "D.NO.1501", "material": "Silk",
+     "color": "Gold", "description": "Handwoven silk with zari", "category": "silk", "price": 12000},
+    {"id": "p3", "name": "Silk Georgette Blend", "design_no": "D.NO.1502", "material": "Georgette",
+     "color": "Blue", "description": "Silk blend", "category": "georgette", "price": 4000},
+]
+
+
+def build():
+    index = SearchIndex()
+    index.rebuild(PRODUCTS)
+    return index
+
+
+def test_tokenize_lowercases_and_splits():
+    assert tokenize("D.NO.1490 Red-Silk") == ["d", "no", "1490", "red", "silk"]
+    assert tokenize("") == []
+
+
+def test_every_term_must_match():
+    index = build()
+    assert index.search("silk georgette") == ["p3"]
+    assert index.search("silk velvet") == []
+
+
+def test_name_matches_rank_above_description_matches():
+    index = build()
+    # p2/p3 have "silk" in the name; p2 also in material and description
+    results = index.search("silk")
+    assert set(results) == {"p2", "p3"}
+    assert results[0] == "p2"
+
+
+def test_prefix_and_design_number_matching():
+    index = build()
+    assert set(index.search("geor")) == {"p1", "p3"}
+    assert index.search("1490") == ["p1"]
+    assert index.search("dno1490") == ["p1"]
+
+
+def test_filters_apply_to_matches():
+    index = build()
+    assert index.search("georgette", {"category": "georgette", "max_price": 3000}) == ["p1"]
+    assert index.search("silk", {"min_price": 5000}) == ["p2"]
+
+
+def test_incremental_upsert_and_remove():
+    index = build()
+    index.upsert({**PRODUCTS[0], "name": "Crimson Chiffon Saree", "material": "Chiffon",
+                  "description": "Chiffon drape"})
+    assert index.search("georgette") == ["p3"]
+    assert index.search("crimson") == ["p1"]
+    index.remove("p1")
+    assert index.search("crimson") == []
+    assert len(index) == 2
+    # Tokens only p1 used are dropped from the vocabulary
+    assert index.search("chif") == []
+
+
+def test_sort_ids_by_stored_attribute():
+    index = build()
+    assert index.sort_ids(["p1", "p2", "p3"], "price", -1) == ["p2", "p3", "p1"]
+    assert index.sort_ids(["p2", "p1"], "price", 1) == ["p1", "p2"]
+
+
+def test_sort_ids_tolerates_mixed_types():
+    index = SearchIndex()
+    index.rebuild([
+        {"id": "new", "name": "a", "created_at": datetime(2024, 11, 5, tzinfo=timezone.utc)},
+        {"id": "naive", "name": "a", "created_at": datetime(2024, 11, 4)},
+        {"id": "legacy", "name": "a", "created_at": "2024-11-06T10:00:00"},
+        {"id": "none", "name": "a"},
+    ])
+    # Unmigrated strings sort below every date, as in MongoDB
+    assert index.sort_ids(["legacy", "new", "none", "naive"], "created_at", -1) == [
+        "new", "naive", "legacy", "none"
+    ]
+
+
+def test_tokenize_keeps_non_ascii_words():
+    assert tokenize("Crêpe de Chine") == ["crepe", "de", "chine"]
+    assert tokenize("Straße") == ["strasse"]
+    # Full-width design numbers fold to ASCII
+    assert tokenize("Ｄ.NO.１４９０") == ["d", "no", "1490"]
+    # Devanagari vowel signs stay inside the word
+    assert tokenize("रेशमी साड़ी") == tokenize("रेशमी") + tokenize("साड़ी")
+    assert len(tokenize("साड़ी")) == 1
+
+
+def test_ascii_and_unicode_paths_agree():
+    from search import _unicode_tokens
+
+    text = "D.NO.1490 Red-Silk_Georgette 2024"
+    assert tokenize(text) == _unicode_tokens(text)
+
+
+def test_non_ascii_search_matches():
+    index = SearchIndex()
+    index.rebuild([
+        {"id": "s1", "name": "Banarasi साड़ी", "material": "Silk"},
+        {"id": "s2", "name": "Crêpe Saree", "material": "Crêpe"},
+    ])
+    assert index.search("साड़ी") == ["s1"]
+    assert index.search("crêpe") == ["s2"]
+    assert index.search("crepe") == ["s2"]
+    assert index.search("CRÊP") == ["s2"]